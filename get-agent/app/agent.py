@@ -1,27 +1,50 @@
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 from logging import Logger
-from typing import Dict , Any
+from typing import TYPE_CHECKING, Dict , Any, Optional
 
-import boto3
-from bedrock_agentcore.runtime import (
-    BedrockAgentCoreApp,
-)
+# Imported first so the cost of the imports below can be measured from it.
+from app.startup import IMPORTS_STARTED , lazy_import , startup_timer
 
 from httpx import AsyncClient
+from optum_us_ml_gen_ai_common_basic.security.Keyrefresher import KeyRefresher
 from optum_us_ml_gen_ai_common_strands.agent.agentfactory import KeyReferenceAgentFactory , AgentFactory
 from optum_us_ml_gen_ai_common_strands.agent.agentlogging import init_logging
-from optum_us_ml_gen_ai_common_strands.agent.context import AgentContext
-from optum_us_ml_gen_ai_common_strands.mcp import StremableHttpMcpClientFactory
+from optum_us_ml_gen_ai_common_strands.context import AgentCoreContext
+from optum_us_ml_gen_ai_common_strands.mcp import StreamableHttpMcpClientFactory
 from optum_us_ml_gen_ai_common_strands.mcp import get_mcp_tools
 
-from app.config import get_gap_exception_config , GapExceptionEnvSettings
+from app.agentpool import AgentPool
+from app.answercache import AnswerCache
+from app.bootstrap import Bootstrap
+from app.config import GapExceptionConfig , GapExceptionEnvSettings
+from app.configloader import ConfigLoader
 from app.context import AgentRequestContext
-from app.hooks import RequestContextInjectingHook
+from app.fastpath import FastPath
+from app.hook import RequestContextInjectingHook , ToolCallTimingHook
+from app.mcpsession import McpSession , McpSessionPool
+from app.memory import PrefetchingMemoryClient
+from app.metrics import begin_request , end_request , metrics , record_stage , stage
+from app.profiler import RequestProfiler
+from app.runtime import AgentRuntime , RuntimeHolder
+from app.speculation import SearchSpeculator , end_speculation , speculation_stats
+from app.validation import InputValidator
+from app.warmup import WarmUp
+
+if TYPE_CHECKING:
+    # The AgentCore runtime (starlette, uvicorn) is imported by create_app on first use.
+    from bedrock_agentcore.runtime import BedrockAgentCoreApp
+
+# strands, and boto3 through it, cannot be deferred: the optum agent and MCP packages, the tool hooks
+# and the agent pool import it at module load. Its cost is reported with the other startup phases.
+startup_timer.record("import strands, optum packages and app modules", time.perf_counter() - IMPORTS_STARTED)
 
 SYSTEM_PROMPT = """
 You are a healpful assistant . You are an expert in finding providers.
 Please use the provided tools to find providers based on user queries.
-When calling the tool, it is OK if lat, lang, and plan are not porived. It will be injected from state.
+When calling the tool, it is OK if lat, lng, and plan are not porived. It will be injected from state.
 
 When returning providers:
 -Create a url link on their name to the web url returned by the tool.
@@ -29,63 +52,324 @@ When returning providers:
 """
 
 async def invoke(
-        mcp_client_factory: StremableHttpMcpClientFactory,
+        mcp_client_factory: StreamableHttpMcpClientFactory,
         agent_factory:AgentFactory,
         logger: Logger,
         payload: Dict[str, Any],
-        
+        mcp_session_pool: Optional[McpSessionPool] = None,
+        agent_pool: Optional[AgentPool] = None,
+        llm_key_refresher: Optional[KeyRefresher] = None,
+        memory_client: Optional[PrefetchingMemoryClient] = None,
+        input_validator: Optional[InputValidator] = None,
+        fast_path: Optional[FastPath] = None,
+        speculator: Optional[SearchSpeculator] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        profiler: Optional[RequestProfiler] = None,
 ):
-    agent_core_context = AgentCoreContext.get_context()
-    request_context = AgentRequestContext.from_agent_core_context(agent_core_context)
     user_input = payload["prompt"]
-    mcp_client = await mcp_client_factory.get_mcp_client()
-    my_agent = await agent_factory.create_agent(
-        tool_factory = lambda: get_mcp_tools(mcp_client),
-        state=request_context.model_dump()
-    )
+    timings = begin_request()
+    if input_validator is not None:
+        # Rejected prompts are answered before any agent, MCP or memory work is started.
+        with stage("validation"):
+            error_message = input_validator.validate(user_input)
+        if error_message is not None:
+            logger.info(f"User input rejected by validation: {error_message}")
+            end_request(logger)
+            yield error_message
+            return
+
+    with stage("context"):
+        agent_core_context = AgentCoreContext.get_context()
+        request_context = AgentRequestContext.from_agent_core_context(agent_core_context)
+    timings.trace_id = getattr(request_context, "trace_id", None)
+    timings.session_id = getattr(request_context, "session_id", None)
+    profile = profiler.begin(request_context) if profiler is not None else None
+
+    def finish_request():
+        end_request(logger)
+        if profile is not None:
+            profiler.end(profile, timings)
+
+    async def remember(answer: str):
+        # Answers given without the agent never reach the memory hooks, so the turn is saved here.
+        if memory_client is not None:
+            await memory_client.record_turn(
+                getattr(request_context, "actor_id", None), getattr(request_context, "session_id", None), user_input, answer
+            )
+
+    answer_key = answer_cache.key(user_input, request_context) if answer_cache is not None else None
+    if answer_key is not None:
+        cached_answer = answer_cache.get(answer_key)
+        if cached_answer is not None:
+            logger.info("Answered from the answer cache.")
+            finish_request()
+            for chunk in cached_answer:
+                yield chunk
+            await remember("".join(cached_answer))
+            return
+
+    fast_path_client = None
+    arguments = fast_path.extract(user_input, request_context) if fast_path is not None else None
+    if arguments is not None:
+        # Plain lookups call the search tool directly and skip the LLM; anything else goes to the agent.
+        answer = None
+        try:
+            with stage("fast_path"):
+                if mcp_session_pool is not None:
+                    answer = await fast_path.answer((await mcp_session_pool.acquire()).client, arguments)
+                else:
+                    fast_path_client = await mcp_client_factory.get_mcp_client()
+                    answer = await fast_path.answer(fast_path_client, arguments)
+        except Exception as e:
+            logger.warning(f"Fast path failed: {str(e)}. Falling back to the agent.")
+        if answer is not None:
+            logger.info(f"Answered from the fast path with tool arguments: {arguments}")
+            if answer_key is not None:
+                answer_cache.put(answer_key, [answer])
+            finish_request()
+            yield answer
+            await remember(answer)
+            return
+
+    if memory_client is not None:
+        memory_client.begin_request()
+    speculation = speculator.begin(user_input, request_context) if speculator is not None else None
 
+    async def load_tools():
+        with stage("mcp_session"):
+            if mcp_session_pool is not None:
+                mcp_session = await mcp_session_pool.acquire()
+                return mcp_session, lambda: mcp_session.tools
+            mcp_client = fast_path_client or await mcp_client_factory.get_mcp_client()
+            return mcp_client, lambda: get_mcp_tools(mcp_client)
+
+    async def load_memory():
+        if memory_client is not None:
+            with stage("memory_prefetch"):
+                await memory_client.prefetch(request_context.actor_id, request_context.session_id, user_input)
+
+    async def load_llm_key():
+        if llm_key_refresher is not None:
+            await llm_key_refresher.get_key()
+
+    async def speculate(tools):
+        # Only starts the search; the agent does not wait for it.
+        tools_owner, _ = tools
+        speculation.launch(tools_owner.client if isinstance(tools_owner, McpSession) else tools_owner)
+
+    async def build_agent(tools, _memory, _llm_key):
+        tools_owner, tool_factory = tools
+        if agent_pool is not None:
+            return await agent_pool.acquire(
+                tool_factory=tool_factory,
+                state=request_context.model_dump(),
+                tools_owner=tools_owner
+            )
+        return await agent_factory.create_agent(
+            tool_factory = tool_factory,
+            state=request_context.model_dump()
+        )
+
+    # MCP session, memory and LLM key are loaded concurrently; the agent waits for all of them.
+    bootstrap = Bootstrap()
+    bootstrap.add("tools", load_tools)
+    bootstrap.add("memory", load_memory)
+    bootstrap.add("llm_key", load_llm_key)
+    bootstrap.add("agent", build_agent, depends_on=["tools", "memory", "llm_key"])
+    if speculation is not None:
+        bootstrap.add("speculation", speculate, depends_on=["tools"])
+
+    my_agent = None
+    completed = False
+    chunks = []
     try:
+        with stage("bootstrap"):
+            my_agent = (await bootstrap.run())["agent"]
+        started = time.perf_counter()
         async for event in my_agent.stream_async(user_input):
             if "data" in event:
+                if not chunks:
+                    record_stage("llm_first_token", time.perf_counter() - started)
+                chunks.append(event["data"])
                 yield event["data"]
+        record_stage("llm_generation", time.perf_counter() - started)
+        completed = True
+        # Only answers streamed to the end are cached, never partial or error responses.
+        if answer_key is not None:
+            answer_cache.put(answer_key, chunks)
     except Exception as e:
         logger.exception(f"Error during agent invocation: {str(e)}" , exc_info=True)
         yield f"Error occurred while processing your request. Please try again later."
+    finally:
+        end_speculation()
+        finish_request()
+        if agent_pool is not None and my_agent is not None:
+            # Only agents whose run finished cleanly go back to the pool.
+            agent_pool.release(my_agent) if completed else agent_pool.discard(my_agent)
+
+def build_runtime(
+        config: GapExceptionConfig,
+        system_prompt: str,
+        async_client: AsyncClient,
+        logger: Logger
+) -> AgentRuntime:
+    config.update_env_variables()
+    with startup_timer.phase("create key refreshers"):
+        key_refresh_scheduler = config.create_key_refresh_scheduler(logger=logger)
+        llm_key_refresher = key_refresh_scheduler.schedule(
+            "llm",
+            config.create_llm_key_refresher(async_client = async_client ,logger=logger),
+            request_token=config.create_llm_token_request(async_client=async_client)
+        )
+        mcp_key_refresher = key_refresh_scheduler.schedule(
+            "mcp",
+            config.create_mcp_key_refresher(async_client=async_client , logger=logger),
+            request_token=config.create_mcp_token_request(async_client=async_client)
+        )
+    with startup_timer.phase("create llm model"):
+        model = config.create_llm_model()
+    with startup_timer.phase("create memory hooks"):
+        memory_client = config.create_prefetching_memory_client(logger)
+        memory_hooks = config.create_memory_hooks(logger, memory_client=memory_client)
 
-def create_app(system_prompt: str) -> BedrockAgentCoreApp:
+    with startup_timer.phase("create agent factory"):
+        agent_factory = KeyReferenceAgentFactory(
+            key_refresher = llm_key_refresher,
+            model = model,
+            system_prompt = system_prompt,
+            hooks=[
+                memory_hooks,
+                RequestContextInjectingHook(logger=logger),
+                ToolCallTimingHook()
+            ]
+        )
+    with startup_timer.phase("create mcp client factory and pools"):
+        mcp_client_factory = config.create_mcp_client_factory(key_refresher = mcp_key_refresher , logger=logger)
+        mcp_session_pool = config.create_mcp_session_pool(
+            client_factory=mcp_client_factory,
+            key_refresher=mcp_key_refresher,
+            logger=logger
+        )
+        agent_pool = config.create_agent_pool(agent_factory=agent_factory, logger=logger)
+    return AgentRuntime(
+        config=config,
+        model=model,
+        agent_factory=agent_factory,
+        mcp_client_factory=mcp_client_factory,
+        mcp_session_pool=mcp_session_pool,
+        agent_pool=agent_pool,
+        key_refresh_scheduler=key_refresh_scheduler,
+        llm_key_refresher=llm_key_refresher,
+        memory_client=memory_client,
+        input_validator=config.create_input_validator(),
+        fast_path=config.create_fast_path(logger),
+        speculator=config.create_search_speculator(),
+        answer_cache=config.create_answer_cache(),
+        output_batcher=config.create_output_batcher(),
+        profiler=config.create_request_profiler(logger)
+    )
+
+def create_app(system_prompt: str) -> "BedrockAgentCoreApp":
     logger = logging.getLogger("app.agent")
     init_logging(logger , log_level=logging.INFO)
     logger.info("Starting application...")
-    ssm = boto3.client("ssm")
     env_settings = GapExceptionEnvSettings()
-    config = get_gap_exception_config(env_settings = env_settings , ssm=ssm)
-    config.update_env_variable()
+    config_loader = ConfigLoader(
+        env_settings=env_settings,
+        ssm_factory=lambda: lazy_import(globals(), "boto3", "boto3").client("ssm"),
+        logger=logger,
+        snapshot_path=env_settings.config_snapshot_path,
+        refresh_interval_seconds=env_settings.config_refresh_interval_seconds
+    )
     async_client =AsyncClient()
-    llm_key_refresher = config.create_llm_key_refresher(async_client = async_client ,logger=logger)
-    mcp_key_refresher = config.create_mcp_key_refresher(async_client=async_client , logger=logger)
-    model = config.create_llm_model()
-    memory_hooks = config.create_memory_hooks(logger)
-
-    agent_factory = KeyReferenceAgentFactory(
-        key_refresher = llm_key_refresher,
-        model = model,
-        system_prompt = system_prompt,
-        hooks=[
-            memory_hooks,
-            RequestContextInjectingHook(logger=logger)
-        ]
+
+    def build_first_runtime() -> AgentRuntime:
+        with startup_timer.phase("load config"):
+            config = config_loader.load()
+        runtime = build_runtime(config, system_prompt, async_client, logger)
+        startup_timer.report(logger, "Runtime build phases")
+        return runtime
+
+    runtime = RuntimeHolder(
+        build=build_first_runtime,
+        logger=logger,
+        retire_grace_seconds=env_settings.runtime_retire_grace_seconds
+    )
+    config_loader.add_listener(
+        lambda config: runtime.swap(build_runtime(config, system_prompt, async_client, logger))
     )
-    mcp_client_factory = config.create_mcp_client_factory(key_refresher = mcp_key_refresher , logger=logger)
 
-    app = BedrockerAgentCoreApp()
-    app.enterypoint(lambda payload: invoke(
-        agent_factory=agent_factory,
-        mcp_client_factory=mcp_client_factory,
+    warm_up = WarmUp(
         logger=logger,
-        payload=payload
-    ))
+        timeout_seconds=env_settings.warmup_timeout_seconds,
+        tool_name=env_settings.warmup_tool_name,
+        tool_arguments=env_settings.warmup_tool_arguments,
+        llm_completion=env_settings.warmup_llm_completion
+    )
+
+    @asynccontextmanager
+    async def lifespan(_app):
+        config_loader.start()
+        warm_up_task = None
+        if env_settings.warmup_enabled:
+            warm_up_task = asyncio.get_running_loop().create_task(warm_up.run(runtime))
+        else:
+            warm_up.ready = True
+        yield
+        if warm_up_task is not None:
+            warm_up_task.cancel()
+        await config_loader.close()
+        if runtime.current is not None:
+            await runtime.current.close()
+
+    def handle(payload: Dict[str, Any]):
+        # Returns the stream instead of iterating it here, so the app streams it on its main event
+        # loop where the lifespan started the warm-up and background refresh tasks.
+        current = runtime.get()
+        stream = invoke(
+            agent_factory=current.agent_factory,
+            mcp_client_factory=current.mcp_client_factory,
+            logger=logger,
+            payload=payload,
+            mcp_session_pool=current.mcp_session_pool,
+            agent_pool=current.agent_pool,
+            llm_key_refresher=current.llm_key_refresher,
+            memory_client=current.memory_client,
+            input_validator=current.input_validator,
+            fast_path=current.fast_path,
+            speculator=current.speculator,
+            answer_cache=current.answer_cache,
+            profiler=current.profiler
+        )
+        if current.output_batcher is not None:
+            return current.output_batcher.batch(stream)
+        return stream
+
+    app_class = lazy_import(globals(), "BedrockAgentCoreApp", "bedrock_agentcore.runtime")
+    with startup_timer.phase("create app"):
+        app = app_class(lifespan=lifespan)
+        app.entrypoint(handle)
+        app.ping(warm_up.ping_status)
+        if env_settings.metrics_enabled:
+            add_metrics_route(app, runtime)
+    if env_settings.prewarm_on_start:
+        # Optional explicit pre-warm: pay for the runtime at boot instead of on the first request.
+        runtime.get()
+    startup_timer.report(logger)
     logger.info("Application initialized..")
     return app
 
+def add_metrics_route(app: "BedrockAgentCoreApp", runtime: RuntimeHolder) -> None:
+    """Serve the request histograms and the stats of the current runtime's caches and refreshers at /metrics."""
+    response_class = lazy_import(globals(), "PlainTextResponse", "starlette.responses")
+    metrics.add_gauges("gap_agent_speculation", speculation_stats.stats)
+    metrics.add_gauges("gap_agent_answer_cache", lambda: runtime.current.answer_cache.stats())
+    metrics.add_gauges("gap_agent_token_refresh", lambda: runtime.current.key_refresh_scheduler.stats())
+
+    async def render(_request):
+        return response_class(metrics.render(), media_type="text/plain; version=0.0.4")
+
+    app.add_route("/metrics", render, methods=["GET"])
+
 if __name__ == "__main__":
     create_app(system_prompt=SYSTEM_PROMPT).run()
\ No newline at end of file
@@ -0,0 +1,113 @@
+import copy
+import time
+from collections import deque
+from logging import Logger
+from typing import Any, Callable, Dict, List
+
+from optum_us_ml_gen_ai_common_strands.agent.agentfactory import AgentFactory
+from strands.agent.state import AgentState
+from strands.hooks import AgentInitializedEvent
+from strands.telemetry.metrics import EventLoopMetrics
+
+
+class _PooledAgent:
+    def __init__(self, agent: Any, tools_owner: Any):
+        self.agent = agent
+        self.tools_owner = tools_owner
+        self.system_prompt = agent.system_prompt
+        self.conversation_state = copy.deepcopy(agent.conversation_manager.get_state())
+        self.uses = 0
+        self.released_at = time.monotonic()
+
+
+class AgentPool:
+    """
+    Pool of pre-built agents that are reset and reused across requests.
+
+    An agent is only reused with the tools it was built with: tools_owner identifies the MCP
+    session (or client) that produced them. Agents built from another owner stay idle for their
+    own owner's requests, since sessions are handed out round robin, and agents of a replaced
+    session are evicted once idle_timeout_seconds pass without a request for them.
+    The pool never awaits between checking and taking an idle agent, so it is safe to share
+    between concurrent asyncio requests.
+
+    Reuse resets the messages, system prompt, state, event loop metrics and conversation manager.
+    State that hooks keep on themselves cannot be reset from here, so an agent is retired after
+    max_uses requests.
+    """
+
+    def __init__(
+        self,
+        agent_factory: AgentFactory,
+        logger: Logger,
+        max_size: int,
+        idle_timeout_seconds: float,
+        max_uses: int = 100
+    ):
+        self.agent_factory = agent_factory
+        self.logger = logger
+        self.max_size = max_size
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.max_uses = max_uses
+        self.created = 0
+        self.reused = 0
+        self._idle: deque = deque()
+        self._leased: Dict[int, _PooledAgent] = {}
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    async def acquire(self, tool_factory: Callable[[], List[Any]], state: Dict[str, Any], tools_owner: Any) -> Any:
+        """Return an agent reset for a new request with the given per-request state."""
+        self._evict_idle()
+        for index in range(len(self._idle) - 1, -1, -1):
+            pooled = self._idle[index]
+            if pooled.tools_owner is tools_owner:
+                del self._idle[index]
+                self._reset(pooled, state)
+                pooled.uses += 1
+                self._leased[id(pooled.agent)] = pooled
+                self.reused += 1
+                return pooled.agent
+        pooled = await self._create(tool_factory, state, tools_owner)
+        pooled.uses += 1
+        self._leased[id(pooled.agent)] = pooled
+        return pooled.agent
+
+    def release(self, agent: Any) -> None:
+        """Return an agent to the pool after a request completed normally."""
+        pooled = self._leased.pop(id(agent), None)
+        if pooled is None or len(self._idle) >= self.max_size or pooled.uses >= self.max_uses:
+            return
+        pooled.released_at = time.monotonic()
+        self._idle.append(pooled)
+
+    def discard(self, agent: Any) -> None:
+        """Drop an agent whose request failed, so a half-finished conversation is never reused."""
+        self._leased.pop(id(agent), None)
+
+    async def prewarm(self, tool_factory: Callable[[], List[Any]], tools_owner: Any) -> None:
+        """Build agents until the pool is full so the first requests do not pay for agent setup."""
+        while len(self._idle) < self.max_size:
+            self._idle.append(await self._create(tool_factory, {}, tools_owner))
+        self.logger.info(f"Agent pool pre-warmed with {len(self._idle)} agents.")
+
+    async def _create(self, tool_factory: Callable[[], List[Any]], state: Dict[str, Any], tools_owner: Any) -> _PooledAgent:
+        agent = await self.agent_factory.create_agent(tool_factory=tool_factory, state=state)
+        self.created += 1
+        return _PooledAgent(agent, tools_owner)
+
+    def _reset(self, pooled: _PooledAgent, state: Dict[str, Any]) -> None:
+        agent = pooled.agent
+        agent.messages.clear()
+        agent.system_prompt = pooled.system_prompt
+        agent.state = AgentState(state)
+        agent.event_loop_metrics = EventLoopMetrics()
+        agent.conversation_manager.restore_from_session(copy.deepcopy(pooled.conversation_state))
+        # Hooks that load per-session context when an agent is built (e.g. memory) run again for the new request.
+        agent.hooks.invoke_callbacks(AgentInitializedEvent(agent=agent))
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_timeout_seconds
+        while self._idle and self._idle[0].released_at < cutoff:
+            self._idle.popleft()
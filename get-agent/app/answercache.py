@@ -0,0 +1,132 @@
+import hashlib
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.context import AgentRequestContext
+from app.fastpath import find_cpt_codes, find_radius_in_meters
+
+# A number keeps its minus sign, so coordinates west of Greenwich or south of the equator are not
+# confused with their mirror images.
+_WORD = re.compile(r"(?<![a-z0-9])-[0-9]+(?:\.[0-9]+)?|[a-z0-9]+(?:\.[0-9]+)?")
+
+# Words that do not change what is being asked, so "find me dentists for D2750" and
+# "please find dentists for D2750" share one entry.
+STOPWORDS = frozenset("""
+    a an the please me my i we us you for of to in at with and or can could would will show find search list get
+    give need want looking look that which who is are be near nearby around some any
+""".split())
+
+
+def prompt_fingerprint(prompt: str) -> str:
+    """Hash of the prompt's distinct meaningful words, independent of case, punctuation and word order."""
+    words = sorted({word for word in _WORD.findall(prompt.lower()) if word not in STOPWORDS})
+    return hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """
+    Bounded TTL + LRU cache of streamed agent answers, replayed chunk by chunk on a hit.
+
+    Answers are keyed on the request's intent (CPT codes, plan, location snapped to a grid cell and
+    radius) plus a fingerprint of the prompt. Prompts without CPT codes are not provider lookups and
+    are never cached. The TTL should stay below how long provider data is considered fresh.
+
+    Agent answers can be personalized from memory, so by default (scope "session") an answer is only
+    replayed to the same actor in the same session. Scope "actor" shares answers across an actor's
+    sessions and "shared" across all actors.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        max_bytes: int,
+        location_precision_degrees: float,
+        scope: str = "session",
+        clock=time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.location_precision_degrees = location_precision_degrees
+        self.scope = scope
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, List[Any]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, prompt: str, request_context: AgentRequestContext) -> Optional[Hashable]:
+        """Build the cache key for a request, or None when the request should not be cached."""
+        text = prompt.lower()
+        codes, _ = find_cpt_codes(text)
+        if not codes:
+            return None
+        cell = None
+        if request_context.lat is not None and request_context.lng is not None:
+            cell = (self._snap(request_context.lat), self._snap(request_context.lng))
+        plan = request_context.plan.strip().casefold() if request_context.plan else None
+        return tuple(codes), plan, cell, find_radius_in_meters(text), prompt_fingerprint(prompt), self._owner(request_context)
+
+    def _owner(self, request_context: AgentRequestContext) -> Optional[tuple]:
+        if self.scope == "session":
+            return request_context.actor_id, request_context.session_id
+        if self.scope == "actor":
+            return (request_context.actor_id,)
+        return None
+
+    def get(self, key: Hashable) -> Optional[List[Any]]:
+        """Return the cached answer chunks for key, or None when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, chunks = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return chunks
+
+    def put(self, key: Hashable, chunks: List[Any]) -> None:
+        """Store a completed answer under key, evicting least recently used entries to stay within bounds."""
+        size = sum(len(str(chunk).encode("utf-8")) for chunk in chunks)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self._clock() + self.ttl_seconds, size, list(chunks))
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    def _snap(self, value: float) -> float:
+        return math.floor(value / self.location_precision_degrees) * self.location_precision_degrees
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
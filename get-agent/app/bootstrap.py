@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Sequence
+
+
+class Bootstrap:
+    """
+    Small async dependency graph for request setup.
+
+    Every step starts as soon as the steps it depends on have finished, so independent steps run
+    concurrently. A step receives the results of its dependencies as positional arguments. If any
+    step fails, the remaining steps are cancelled and the error is raised.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, tuple] = {}
+
+    def add(self, name: str, step: Callable[..., Awaitable[Any]], depends_on: Sequence[str] = ()) -> None:
+        missing = [dependency for dependency in depends_on if dependency not in self._steps]
+        if missing:
+            raise ValueError(f"Bootstrap step {name} depends on unknown steps: {missing}")
+        self._steps[name] = (step, list(depends_on))
+
+    async def run(self) -> Dict[str, Any]:
+        """Run all steps and return their results by name."""
+        tasks: Dict[str, asyncio.Task] = {}
+        for name, (step, depends_on) in self._steps.items():
+            tasks[name] = asyncio.ensure_future(self._run_step(step, [tasks[d] for d in depends_on]))
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
+
+    @staticmethod
+    async def _run_step(step: Callable[..., Awaitable[Any]], dependencies: List[asyncio.Task]) -> Any:
+        results = [await dependency for dependency in dependencies]
+        return await step(*results)
@@ -1,21 +1,48 @@
 import os
 from logging import Logger
-from typing import Optional
-from unittest import result
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional
 
-from bedrock_agentcore.memory import MemoryClient
 from httpx import AsyncClient
 from optum_us_ml_gen_ai_common_basic.ssm import get_json_ssm_parameter
-from optum_us_ml_gen_ai_common_basic.security.Keyrefresher import Oauth2KeyRefresher , KeyReferenceConfig
-from optum_us_ml_gen_ai_common_strands.mcp import StremableHttpMcpClientFactory
-from optum_us_ml_gen_ai_common_strands.memory.agentcorememory import AskAiSearchMemoryHooks
+from optum_us_ml_gen_ai_common_basic.security.Keyrefresher import KeyRefresher, Oauth2KeyRefresher , KeyReferenceConfig
+from optum_us_ml_gen_ai_common_strands.agent.agentfactory import AgentFactory
+from optum_us_ml_gen_ai_common_strands.mcp import StreamableHttpMcpClientFactory
 from pydantic import BaseModel
-from pydentic_settings import BaseSettings , SettingsConfigDict
-from strands.models import Model
-from strands.model.litellm import LiteLLModel
+from pydantic_settings import BaseSettings , SettingsConfigDict
+
+from app.agentpool import AgentPool
+from app.answercache import AnswerCache
+from app.fastpath import FastPath
+from app.mcpsession import McpSessionPool
+from app.outputbatch import OutputBatcher
+from app.profiler import RequestProfiler
+from app.memory import PrefetchingMemoryClient
+from app.startup import lazy_import
+from app.speculation import SearchSpeculator
+from app.tokenrefresh import KeyRefreshScheduler, OAuth2TokenRequest
+from app.validation import DEFAULT_BLACKLIST, DEFAULT_DOMAIN_KEYWORDS, DEFAULT_MAX_WORDS, InputValidator
+
+if TYPE_CHECKING:
+    # Imported on first use: litellm and the AgentCore memory client are slow to import at cold start.
+    from bedrock_agentcore.memory import MemoryClient
+    from optum_us_ml_gen_ai_common_strands.memory.agentcorememory import AskAiSearchMemoryHooks
+    from strands.models import Model
 
 class GapExceptionEnvSettings(BaseSettings):
     env:str = "dev"
+    config_snapshot_path: Optional[str] = "/tmp/askai_search_gap_exception_config.json"
+    config_refresh_interval_seconds: float = 300.0
+    runtime_retire_grace_seconds: float = 900.0
+    prewarm_on_start: bool = False
+    warmup_enabled: bool = True
+    warmup_timeout_seconds: float = 30.0
+    warmup_tool_name: Optional[str] = None
+    warmup_tool_arguments: Dict[str, Any] = {}
+    warmup_llm_completion: bool = False
+    metrics_enabled: bool = True
+
+    def ssm_parameter_name(self) -> str:
+        return f"/askai/search/gap-exception/{self.env}/config"
 
     model_config = SettingsConfigDict(env_prefix = 'askai_search_gap_exception_')
 
@@ -26,6 +53,10 @@ class GapExceptionConfig(BaseModel):
     aws_region: str = "us-east-1"
     memory_agent_init_number_of_events: int = 20
     memory_customer_context_top_k: int = 3
+    memory_customer_context_namespaces: List[str] = [
+        "askai/search/gapException/{actorId}/preferences",
+        "askai/search/gapException/{actorId}/semantic",
+    ]
     lim_project_id: str
     llm_client_id: str
     llm_client_secret: str
@@ -38,12 +69,52 @@ class GapExceptionConfig(BaseModel):
     mcp_client_secret: Optional[str] = None
     mcp_token_url: Optional[str] = None
     mcp_scope: Optional [str] = None
+    mcp_session_pool_size: int = 1
+    mcp_health_check_interval_seconds: float = 60.0
+    mcp_session_max_age_seconds: float = 3000.0
+    # Longer than the 15 minute AgentCore request limit, so requests still using a rotated session can finish.
+    mcp_session_retire_grace_seconds: float = 900.0
+    agent_pool_size: int = 4
+    agent_pool_idle_seconds: float = 600.0
+    agent_pool_max_uses: int = 100
+    token_refresh_fraction: float = 0.8
+    token_refresh_jitter_fraction: float = 0.1
+    token_default_lifetime_seconds: float = 3600.0
+    token_refresh_retry_seconds: float = 15.0
+    validation_max_words: int = DEFAULT_MAX_WORDS
+    validation_blacklist: List[str] = DEFAULT_BLACKLIST
+    validation_domain_keywords: List[str] = DEFAULT_DOMAIN_KEYWORDS
+    fast_path_enabled: bool = True
+    fast_path_tool_name: str = "gap_exception_service"
+    fast_path_default_radius_in_meters: float = 16093.44
+    fast_path_limit: int = 5
+    speculation_enabled: bool = True
+    # As wide as the model's searches usually are: a narrower radius or page is cut from the prefetch.
+    speculation_radius_in_meters: float = 40233.6
+    speculation_limit: int = 10
+    answer_cache_enabled: bool = True
+    # Kept well below how long provider search results are considered fresh.
+    answer_cache_ttl_seconds: float = 300.0
+    answer_cache_max_entries: int = 1000
+    answer_cache_max_bytes: int = 16 * 1024 * 1024
+    answer_cache_location_precision_degrees: float = 0.01
+    answer_cache_scope: Literal["session", "actor", "shared"] = "session"
+    output_batching_enabled: bool = True
+    output_batch_max_bytes: int = 512
+    output_batch_max_delay_seconds: float = 0.1
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = 0.0
+    profiling_slow_request_seconds: float = 30.0
+    profiling_interval_seconds: float = 0.005
+    profiling_max_samples: int = 20000
+    profiling_max_concurrent: int = 2
+    profiling_output_dir: str = "/tmp/askai_search_gap_exception_profiles"
 
     def update_env_variables(self):
          os.environ["AZURE_API_BASE"] = self.azure_api_base
          os.environ["AZURE_API_VERSION"] = self.azure_api_version
 
-    def create_lim_key_refresher(self, async_client: AsyncClient, logger: Logger) -> KeyRefresher:
+    def create_llm_key_refresher(self, async_client: AsyncClient, logger: Logger) -> KeyRefresher:
          return Oauth2KeyRefresher(
             client_id=self.llm_client_id,
             client_secret=self.llm_client_secret,
@@ -66,12 +137,100 @@ class GapExceptionConfig(BaseModel):
             )
         return None
 
-    def create_llm_model(self) -> Model:
-        return LiteLLMModel(
+    def create_llm_token_request(self, async_client: AsyncClient) -> OAuth2TokenRequest:
+        return OAuth2TokenRequest(
+            token_url=self.llm_token_url,
+            client_id=self.llm_client_id,
+            client_secret=self.llm_client_secret,
+            scope=self.llm_scope,
+            httpx_async_client=async_client
+        )
+
+    def create_mcp_token_request(self, async_client: AsyncClient) -> Optional[OAuth2TokenRequest]:
+        if self.mcp_client_id and self.mcp_client_secret and self.mcp_token_url and self.mcp_scope:
+            return OAuth2TokenRequest(
+                token_url=self.mcp_token_url,
+                client_id=self.mcp_client_id,
+                client_secret=self.mcp_client_secret,
+                scope=self.mcp_scope,
+                httpx_async_client=async_client
+            )
+        return None
+
+    def create_key_refresh_scheduler(self, logger: Logger) -> KeyRefreshScheduler:
+        return KeyRefreshScheduler(
+            logger=logger,
+            refresh_fraction=self.token_refresh_fraction,
+            jitter_fraction=self.token_refresh_jitter_fraction,
+            default_lifetime_seconds=self.token_default_lifetime_seconds,
+            retry_seconds=self.token_refresh_retry_seconds
+        )
+
+    def create_input_validator(self) -> InputValidator:
+        return InputValidator(
+            blacklist=self.validation_blacklist,
+            domain_keywords=self.validation_domain_keywords,
+            max_words=self.validation_max_words
+        )
+
+    def create_fast_path(self, logger: Logger) -> Optional[FastPath]:
+        if not self.fast_path_enabled:
+            return None
+        return FastPath(
+            tool_name=self.fast_path_tool_name,
+            default_radius_in_meters=self.fast_path_default_radius_in_meters,
+            limit=self.fast_path_limit,
+            logger=logger
+        )
+
+    def create_search_speculator(self) -> Optional[SearchSpeculator]:
+        if not self.speculation_enabled:
+            return None
+        return SearchSpeculator(
+            tool_name=self.fast_path_tool_name,
+            radius_in_meters=self.speculation_radius_in_meters,
+            limit=self.speculation_limit
+        )
+
+    def create_answer_cache(self) -> Optional[AnswerCache]:
+        if not self.answer_cache_enabled:
+            return None
+        return AnswerCache(
+            ttl_seconds=self.answer_cache_ttl_seconds,
+            max_entries=self.answer_cache_max_entries,
+            max_bytes=self.answer_cache_max_bytes,
+            location_precision_degrees=self.answer_cache_location_precision_degrees,
+            scope=self.answer_cache_scope
+        )
+
+    def create_output_batcher(self) -> Optional[OutputBatcher]:
+        if not self.output_batching_enabled:
+            return None
+        return OutputBatcher(
+            max_bytes=self.output_batch_max_bytes,
+            max_delay_seconds=self.output_batch_max_delay_seconds
+        )
+
+    def create_request_profiler(self, logger: Logger) -> Optional[RequestProfiler]:
+        if not self.profiling_enabled:
+            return None
+        return RequestProfiler(
+            output_dir=self.profiling_output_dir,
+            sample_rate=self.profiling_sample_rate,
+            slow_request_seconds=self.profiling_slow_request_seconds,
+            interval_seconds=self.profiling_interval_seconds,
+            max_samples=self.profiling_max_samples,
+            max_concurrent=self.profiling_max_concurrent,
+            logger=logger
+        )
+
+    def create_llm_model(self) -> "Model":
+        model_class = lazy_import(globals(), "LiteLLMModel", "strands.models.litellm")
+        return model_class(
             model_id=self.llm_model_id,
             params={
                 "extra_headers": {
-                    "projectId": self.llm_project_id
+                    "projectId": self.lim_project_id
                 }
             }
         )
@@ -82,12 +241,40 @@ class GapExceptionConfig(BaseModel):
             key_refresher=key_refresher,
             logger=logger
         )
+    def create_mcp_session_pool(
+            self,
+            client_factory: StreamableHttpMcpClientFactory,
+            key_refresher: Optional[KeyRefresher],
+            logger: Logger
+    ) -> McpSessionPool:
+        return McpSessionPool(
+            client_factory=client_factory,
+            key_refresher=key_refresher,
+            logger=logger,
+            size=self.mcp_session_pool_size,
+            health_check_interval_seconds=self.mcp_health_check_interval_seconds,
+            max_session_age_seconds=self.mcp_session_max_age_seconds,
+            retire_grace_seconds=self.mcp_session_retire_grace_seconds
+        )
+
+    def create_agent_pool(self, agent_factory: AgentFactory, logger: Logger) -> AgentPool:
+        return AgentPool(
+            agent_factory=agent_factory,
+            logger=logger,
+            max_size=self.agent_pool_size,
+            idle_timeout_seconds=self.agent_pool_idle_seconds,
+            max_uses=self.agent_pool_max_uses
+        )
+
     def create_memory_hooks(
             self,
             logger: Logger ,
-            memory_client: Optional [MemoryClient] = None
-    )-> AskAiSearchMemoryHooks:
-        return AskAiSearchMemoryHooks(
+            memory_client: Optional ["MemoryClient"] = None
+    )-> "AskAiSearchMemoryHooks":
+        hooks_class = lazy_import(
+            globals(), "AskAiSearchMemoryHooks", "optum_us_ml_gen_ai_common_strands.memory.agentcorememory"
+        )
+        return hooks_class(
             memory_id=self.memory_id,
             client=memory_client if memory_client is not None else self.create_memory_client(),
             logger=logger,
@@ -95,14 +282,30 @@ class GapExceptionConfig(BaseModel):
             customer_context_top_k=self.memory_customer_context_top_k
         )
 
-    def create_memory_client(self) -> MemoryClient:
-        return MemoryClient(region_name=self.aws_region)
+    def create_memory_client(self) -> "MemoryClient":
+        client_class = lazy_import(globals(), "MemoryClient", "bedrock_agentcore.memory")
+        return client_class(region_name=self.aws_region)
 
-    def get_gap_exception_config(env_settings: GapExceptionEnvSettings, ssm) -> GapExceptionConfig:
-        ssm_parameter_name = f"/askai/search/gap-exception/{env_settings.env}/config"
-        config_dict = get_json_ssm_parameter(
-            name=ssm_parameter_name,
-            ssm=ssm
+    def create_prefetching_memory_client(
+            self,
+            logger: Logger,
+            memory_client: Optional["MemoryClient"] = None
+    ) -> PrefetchingMemoryClient:
+        return PrefetchingMemoryClient(
+            # The AgentCore client is only built when the first request reads memory.
+            client_factory=(lambda: memory_client) if memory_client is not None else self.create_memory_client,
+            memory_id=self.memory_id,
+            number_of_events=self.memory_agent_init_number_of_events,
+            customer_context_top_k=self.memory_customer_context_top_k,
+            customer_context_namespaces=self.memory_customer_context_namespaces,
+            logger=logger
         )
-        result = GapExceptionConfig(**config_dict)
-        return result
\ No newline at end of file
+
+def get_gap_exception_config(env_settings: GapExceptionEnvSettings, ssm) -> GapExceptionConfig:
+    ssm_parameter_name = f"/askai/search/gap-exception/{env_settings.env}/config"
+    config_dict = get_json_ssm_parameter(
+        name=ssm_parameter_name,
+        ssm=ssm
+    )
+    result = GapExceptionConfig(**config_dict)
+    return result
\ No newline at end of file
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import json
+import os
+from logging import Logger
+from typing import Any, Callable, Dict, List, Optional
+
+from optum_us_ml_gen_ai_common_basic.ssm import get_json_ssm_parameter
+
+from app.config import GapExceptionConfig, GapExceptionEnvSettings
+
+
+def config_hash(config_dict: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(config_dict, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ConfigLoader:
+    """
+    Load GapExceptionConfig from a local last-known-good snapshot and keep it in sync with SSM.
+
+    The snapshot stores the SSM parameter name and a sha256 of the config, and is only used when
+    both match. Without a valid snapshot the first load reads SSM synchronously. A background task
+    polls SSM and notifies listeners with the new config whenever its hash changes. The new hash
+    and snapshot are only kept once every listener has applied the config, so a failed apply is
+    retried on the next poll and never becomes the next cold start's config. The snapshot holds
+    the same secrets as the parameter, so it is written readable by the owner only.
+    """
+
+    def __init__(
+        self,
+        env_settings: GapExceptionEnvSettings,
+        ssm_factory: Callable[[], Any],
+        logger: Logger,
+        snapshot_path: Optional[str],
+        refresh_interval_seconds: float
+    ):
+        self.parameter_name = env_settings.ssm_parameter_name()
+        self.ssm_factory = ssm_factory
+        self._ssm = None
+        self.logger = logger
+        self.snapshot_path = snapshot_path
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.config_hash: Optional[str] = None
+        self.reloads = 0
+        self._listeners: List[Callable[[GapExceptionConfig], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> GapExceptionConfig:
+        """Return the config to start with, preferring the local snapshot over an SSM round trip."""
+        config_dict = self._read_snapshot()
+        if config_dict is not None:
+            self.logger.info(f"Loaded config from snapshot {self.snapshot_path}.")
+        else:
+            config_dict = self._fetch()
+            self._write_snapshot(config_dict)
+        self.config_hash = config_hash(config_dict)
+        return GapExceptionConfig(**config_dict)
+
+    def add_listener(self, listener: Callable[[GapExceptionConfig], None]) -> None:
+        """Register a callback that receives every new config after a change in SSM."""
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Start polling SSM on the running event loop. Safe to call more than once."""
+        if self._task is None and self.refresh_interval_seconds > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def reload(self) -> bool:
+        """Fetch the parameter once and apply it if it changed. Returns whether it changed."""
+        config_dict = await asyncio.to_thread(self._fetch)
+        new_hash = config_hash(config_dict)
+        if new_hash == self.config_hash:
+            return False
+        # Validate before anything is swapped so a bad parameter keeps the current config running.
+        config = GapExceptionConfig(**config_dict)
+        self.logger.info(f"Config parameter {self.parameter_name} changed. Applying new config.")
+        for listener in self._listeners:
+            listener(config)
+        await asyncio.to_thread(self._write_snapshot, config_dict)
+        self.config_hash = new_hash
+        self.reloads += 1
+        return True
+
+    def _fetch(self) -> Dict[str, Any]:
+        if self._ssm is None:
+            # Starting from a snapshot never needs the SSM client before the first background poll.
+            self._ssm = self.ssm_factory()
+        return get_json_ssm_parameter(name=self.parameter_name, ssm=self._ssm)
+
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            config_dict = snapshot["config"]
+            if snapshot["parameter"] != self.parameter_name or snapshot["sha256"] != config_hash(config_dict):
+                self.logger.warning(f"Ignoring config snapshot {self.snapshot_path}: it does not match {self.parameter_name}.")
+                return None
+            GapExceptionConfig(**config_dict)
+            return config_dict
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable config snapshot {self.snapshot_path}: {str(e)}")
+            return None
+
+    def _write_snapshot(self, config_dict: Dict[str, Any]) -> None:
+        if not self.snapshot_path:
+            return
+        snapshot = {"parameter": self.parameter_name, "sha256": config_hash(config_dict), "config": config_dict}
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            self.logger.warning(f"Could not write config snapshot {self.snapshot_path}: {str(e)}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Checked straight away too, since the process may have started from an old snapshot.
+                await self.reload()
+            except Exception as e:
+                self.logger.warning(f"Config refresh from {self.parameter_name} failed: {str(e)}. Keeping current config.")
+            await asyncio.sleep(self.refresh_interval_seconds)
@@ -1,3 +1,7 @@
 HDR_LAT = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Location-Lat"
 HDR_LNG = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Location-Lng"
-HDR_PLAN = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Location-Network-Plan"
\ No newline at end of file
+HDR_PLAN = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Location-Network-Plan"
+HDR_ACTOR_ID = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Actor-Id"
+HDR_SESSION_ID = "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"
+HDR_TRACE_ID = "X-Amzn-Trace-Id"
+HDR_PROFILE = "X-Amzn-Bedrock-AgentCore-Runtime-Custom-Profile"
\ No newline at end of file
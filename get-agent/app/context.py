@@ -4,21 +4,29 @@ from typing import Optional
 
 from optum_us_ml_gen_ai_common_strands.context import AgentCoreContext
 from pydantic import BaseModel
-from strands.model.hooks import BeforeAgentRunHook
+from strands.hooks import BeforeToolCallEvent
 
-from app.constants import HDR_LAT , HDR_LANG , HDR_PLAN
+from app.constants import HDR_LAT , HDR_LNG , HDR_PLAN , HDR_ACTOR_ID , HDR_SESSION_ID , HDR_TRACE_ID , HDR_PROFILE
 
 class AgentRequestContext(BaseModel):
     lat: Optional[float] 
-    lang: Optional[float] 
+    lng: Optional[float] 
     plan: Optional[str] 
+    actor_id: Optional[str] = None
+    session_id: Optional[str] = None
+    trace_id: Optional[str] = None
+    profile: Optional[bool] = None
 
     @staticmethod
     def from_agent_core_context(src_ctx: AgentCoreContext) -> "AgentRequestContext":
         return AgentRequestContext(
             lat = src_ctx.get_header_values(HDR_LAT),
-            lang = src_ctx.get_header_values(HDR_LANG),
-            plan = src_ctx.get_header_values(HDR_PLAN)  
+            lng = src_ctx.get_header_values(HDR_LNG),
+            plan = src_ctx.get_header_values(HDR_PLAN),
+            actor_id = src_ctx.get_header_values(HDR_ACTOR_ID),
+            session_id = src_ctx.get_header_values(HDR_SESSION_ID),
+            trace_id = src_ctx.get_header_values(HDR_TRACE_ID),
+            profile = src_ctx.get_header_values(HDR_PROFILE)
         )
     
     def update_event(self, event: BeforeToolCallEvent , logger: Logger):
@@ -28,8 +36,8 @@ class AgentRequestContext(BaseModel):
         if "lat" in tool_key and self.lat is not None:
             tool_input["lat"] = self.lat
 
-        if "lang" in tool_key and self.lang is not None:
-            tool_input["lang"] = self.lang
+        if "lng" in tool_key and self.lng is not None:
+            tool_input["lng"] = self.lng
 
         if "plan" in tool_key and self.plan is not None:
             tool_input["plan"] = self.plan
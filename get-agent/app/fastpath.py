@@ -0,0 +1,206 @@
+import json
+import math
+import re
+import uuid
+from logging import Logger
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.context import AgentRequestContext
+
+METERS_PER_MILE = 1609.344
+
+_CODE = r"(?:\d{5}|\d{4}[ft]|[a-z]\d{4})"
+# Patterns match the prompt as written, ignoring case, so extracted values like the plan keep their casing.
+# The code system must be named, so "zip code 60601" is not taken for a procedure code.
+_CODE_PHRASE = re.compile(
+    rf"\b(?:cpt|cdt|hcpcs|procedure)\s*codes?\s*(?:of|:|=|#)?\s*(?P<codes>{_CODE}(?:\s*(?:,|and|or|&|/)\s*{_CODE})*)\b",
+    re.IGNORECASE
+)
+# Letter-prefixed codes (D2750) are recognised on their own; a bare 5 digit number could be a zip code.
+_BARE_CODE = re.compile(r"\b(?:[a-z]\d{4}|\d{4}[ft])\b", re.IGNORECASE)
+_CODE_IN_PHRASE = re.compile(_CODE, re.IGNORECASE)
+_LAT = re.compile(r"\b(?:latitude|lat)\s*(?:of|is|=|:)?\s*(?P<value>[-+]?\d{1,2}(?:\.\d+)?)", re.IGNORECASE)
+_LNG = re.compile(r"\b(?:longitude|lng|lon|long)\s*(?:of|is|=|:)?\s*(?P<value>[-+]?\d{1,3}(?:\.\d+)?)", re.IGNORECASE)
+_LAT_LNG_PAIR = re.compile(r"(?P<lat>[-+]?\d{1,2}\.\d+)\s*,\s*(?P<lng>[-+]?\d{1,3}\.\d+)")
+_RADIUS = re.compile(
+    r"\b(?:within\s+)?(?:a\s+)?(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>miles?|mi|kilometers?|km|meters?|m)\b(?:\s+radius)?",
+    re.IGNORECASE
+)
+_PLAN = re.compile(r"\bplan\s*(?:is|:|=)\s*(?P<plan>[a-z0-9][a-z0-9 \-]*?)\s*(?=$|[,.;])", re.IGNORECASE)
+_WORD = re.compile(r"[a-z0-9'\-.]+", re.IGNORECASE)
+
+_RADIUS_UNIT_METERS = {
+    "mile": METERS_PER_MILE, "miles": METERS_PER_MILE, "mi": METERS_PER_MILE,
+    "kilometer": 1000.0, "kilometers": 1000.0, "km": 1000.0,
+    "meter": 1.0, "meters": 1.0, "m": 1.0,
+}
+
+# Words a structured lookup may contain besides the values extracted above. Anything else means the
+# user asked for something more than a plain lookup, and the agent answers instead.
+FILLER_WORDS = frozenset("""
+    find search show list get give me us i need want looking look for provider providers data dentist dentists
+    doctor doctors clinic clinics that who which can could handle handles perform performs accept accepts with
+    and the a an near nearby around in network in-network of please at to location my is are any all some
+    cpt cdt code codes within radius from .
+""".split())
+
+
+class FastPath:
+    """
+    Answer plain provider lookups without the LLM.
+
+    extract pulls CPT codes, coordinates, radius and plan out of the prompt with compiled patterns,
+    taking coordinates and plan from the request headers when they are set. It only returns tool
+    arguments when every word of the prompt is accounted for; otherwise the request is ambiguous
+    and goes to the agent. answer calls the search tool directly and renders the providers with the
+    fields and links the system prompt asks the agent for.
+    """
+
+    def __init__(self, tool_name: str, default_radius_in_meters: float, limit: int, logger: Logger):
+        self.tool_name = tool_name
+        self.default_radius_in_meters = default_radius_in_meters
+        self.limit = limit
+        self.logger = logger
+
+    def extract(self, prompt: str, request_context: AgentRequestContext) -> Optional[Dict[str, Any]]:
+        """Return the search tool arguments for a structured lookup, or None when it is ambiguous."""
+        codes, spans = find_cpt_codes(prompt)
+
+        lat = _first_float(_LAT, prompt, spans)
+        lng = _first_float(_LNG, prompt, spans)
+        pair = _LAT_LNG_PAIR.search(self._blank(prompt, spans))
+        if pair is not None and lat is None and lng is None:
+            lat, lng = float(pair.group("lat")), float(pair.group("lng"))
+            spans.append(pair.span())
+
+        radius_in_meters = self.default_radius_in_meters
+        radius = _RADIUS.search(self._blank(prompt, spans))
+        if radius is not None:
+            radius_in_meters = find_radius_in_meters(radius.group(0))
+            spans.append(radius.span())
+        if not 0 < radius_in_meters < math.inf:
+            # A zero radius, or one too large to be a float, is not a plain lookup.
+            return None
+
+        plan = None
+        plan_match = _PLAN.search(self._blank(prompt, spans))
+        if plan_match is not None:
+            plan = plan_match.group("plan").strip()
+            spans.append(plan_match.span())
+
+        # Header values win, as they do when the context hook injects them into the agent's tool calls.
+        lat = request_context.lat if request_context.lat is not None else lat
+        lng = request_context.lng if request_context.lng is not None else lng
+        plan = request_context.plan if request_context.plan is not None else plan
+
+        residual = [
+            word for word in _WORD.findall(self._blank(prompt, spans)) if word.strip(".") and word.lower() not in FILLER_WORDS
+        ]
+        if not codes or lat is None or lng is None or residual:
+            return None
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return None
+        return {
+            "cpt_codes": codes,
+            "lat": lat,
+            "lng": lng,
+            "radius_in_meters": radius_in_meters,
+            "plan": plan,
+            "skip": 0,
+            "limit": self.limit,
+        }
+
+    async def answer(self, mcp_client: Any, arguments: Dict[str, Any]) -> Optional[str]:
+        """Call the search tool and render the answer. Returns None when the agent should answer instead."""
+        result = await mcp_client.call_tool_async(
+            tool_use_id=f"fast-path-{uuid.uuid4()}", name=self.tool_name, arguments=arguments
+        )
+        if result.get("status") != "success":
+            self.logger.warning(f"Fast path tool call failed: {result.get('content')}. Falling back to the agent.")
+            return None
+        text = "".join(block.get("text", "") for block in result.get("content", []))
+        try:
+            providers = json.loads(text)
+        except ValueError:
+            self.logger.warning("Fast path tool result is not JSON. Falling back to the agent.")
+            return None
+        if isinstance(providers, dict):
+            providers = providers.get("providers", [])
+        return render_providers(providers, arguments)
+
+    @staticmethod
+    def _blank(text: str, spans: List[tuple]) -> str:
+        return _blank(text, spans)
+
+
+def find_cpt_codes(text: str) -> Tuple[List[str], List[tuple]]:
+    """Return the sorted, upper-cased procedure codes in a prompt and the spans they were found in."""
+    codes = []
+    spans = []
+    for match in _CODE_PHRASE.finditer(text):
+        codes.extend(_CODE_IN_PHRASE.findall(match.group("codes")))
+        spans.append(match.span())
+    for match in _BARE_CODE.finditer(_blank(text, spans)):
+        codes.append(match.group(0))
+        spans.append(match.span())
+    return sorted({code.upper() for code in codes}), spans
+
+
+def find_radius_in_meters(text: str) -> Optional[float]:
+    """Return the search radius a prompt asks for, in meters, or None when it names none."""
+    match = _RADIUS.search(text)
+    if match is None:
+        return None
+    return float(match.group("value")) * _RADIUS_UNIT_METERS[match.group("unit").lower()]
+
+
+def _blank(text: str, spans: List[tuple]) -> str:
+    """Replace already matched spans with spaces so they are neither matched again nor left over."""
+    chars = list(text)
+    for start, end in spans:
+        chars[start:end] = " " * (end - start)
+    return "".join(chars)
+
+
+def _first_float(pattern: re.Pattern, text: str, spans: List[tuple]) -> Optional[float]:
+    match = pattern.search(text)
+    if match is None:
+        return None
+    spans.append(match.span())
+    return float(match.group("value"))
+
+
+def distance_in_miles(provider: Dict[str, Any]) -> Optional[float]:
+    if provider.get("distance_in_miles") is not None:
+        return float(provider["distance_in_miles"])
+    if provider.get("distance") is not None:
+        return float(provider["distance"])
+    if provider.get("distance_in_meters") is not None:
+        return float(provider["distance_in_meters"]) / METERS_PER_MILE
+    return None
+
+
+def render_providers(providers: List[Dict[str, Any]], arguments: Dict[str, Any]) -> str:
+    """Render providers the way the agent is asked to: linked name, specialty, address, phone and distance."""
+    codes = ", ".join(arguments["cpt_codes"])
+    label = "CPT code" if len(arguments["cpt_codes"]) == 1 else "CPT codes"
+    radius_in_miles = arguments["radius_in_meters"] / METERS_PER_MILE
+    if not providers:
+        return f"I could not find any providers that can handle {label} {codes} within {radius_in_miles:.1f} miles of the provided location."
+
+    lines = [f"Here are the providers that can handle {label} {codes} near the provided location:", ""]
+    for number, provider in enumerate(providers, start=1):
+        name = provider.get("name") or "Unknown provider"
+        if provider.get("web_url"):
+            name = f"[{name}]({provider['web_url']})"
+        lines.append(f"{number}. **{name}**")
+        if provider.get("specialty"):
+            lines.append(f"   - Specialty: {provider['specialty']}")
+        if provider.get("address"):
+            lines.append(f"   - Address: {provider['address']}")
+        if provider.get("phone"):
+            lines.append(f"   - Phone: {provider['phone']}")
+        distance = distance_in_miles(provider)
+        if distance is not None:
+            lines.append(f"   - Distance: {distance:.1f} miles")
+    return "\n".join(lines)
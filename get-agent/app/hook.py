@@ -1,9 +1,12 @@
-from typing import Any
+import time
+from typing import Any, Dict
 
 from strands.agent.state import AgentState
-from strands.hooks import HookProvider, BeforeToolCallEvent , HookRegistry
+from strands.hooks import AfterToolCallEvent, HookProvider, BeforeToolCallEvent , HookRegistry
 
 from app.context import AgentRequestContext
+from app.metrics import TOOL_CALL_SECONDS, metrics, record_stage
+from app.speculation import serve_speculative_search
 
 class RequestContextInjectingHook(HookProvider):
     "Hook to inject request context into agent message"
@@ -14,9 +17,32 @@ class RequestContextInjectingHook(HookProvider):
     def before_invocation(self , event: BeforeToolCallEvent):
         "Inject request context into agent before Invocation"
         state : AgentState = event.agent.state
-        ctx :   AgentRequestContext(**state.get())
+        ctx =   AgentRequestContext(**state.get())
         ctx.update_event(event , self.logger)
+        # With the final arguments known, the search may already have been started speculatively.
+        serve_speculative_search(event , self.logger)
     
     def register_hooks(self, registry: HookRegistry , **kwargs:Any) -> None:
         """Register customer support memory hooks"""
-        registry.add_callback(BeforeToolCallEvent , self.before_invocation)
\ No newline at end of file
+        registry.add_callback(BeforeToolCallEvent , self.before_invocation)
+
+class ToolCallTimingHook(HookProvider):
+    "Hook to time each tool call from its BeforeToolCallEvent to the matching AfterToolCallEvent"
+
+    def __init__(self):
+        self._started: Dict[str, float] = {}
+
+    def before_tool_call(self, event: BeforeToolCallEvent):
+        self._started[event.tool_use["toolUseId"]] = time.perf_counter()
+
+    def after_tool_call(self, event: AfterToolCallEvent):
+        started = self._started.pop(event.tool_use["toolUseId"], None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        metrics.observe(TOOL_CALL_SECONDS, seconds, tool=event.tool_use["name"])
+        record_stage("tool_calls", seconds)
+
+    def register_hooks(self, registry: HookRegistry , **kwargs:Any) -> None:
+        registry.add_callback(BeforeToolCallEvent , self.before_tool_call)
+        registry.add_callback(AfterToolCallEvent , self.after_tool_call)
@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import time
+from logging import Logger
+from typing import Any, List, Optional
+
+from optum_us_ml_gen_ai_common_basic.security.Keyrefresher import KeyRefresher
+from optum_us_ml_gen_ai_common_strands.mcp import StreamableHttpMcpClientFactory
+from optum_us_ml_gen_ai_common_strands.mcp import get_mcp_tools
+
+
+def tools_fingerprint(tools: List[Any]) -> str:
+    """Hash the tool specs so a changed tool list on the server can be detected."""
+    specs = sorted((tool.tool_spec for tool in tools), key=lambda spec: spec.get("name", ""))
+    return hashlib.sha256(json.dumps(specs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class McpSession:
+    "An open MCP client with its cached tool list"
+
+    def __init__(self, client: Any, tools: List[Any], token: Optional[str]):
+        self.client = client
+        self.tools = tools
+        self.fingerprint = tools_fingerprint(tools)
+        self.token = token
+        self.created_at = time.monotonic()
+
+
+class McpSessionPool:
+    """
+    Keep MCP client sessions and their tool specs open across requests.
+
+    Sessions are handed out round robin. A session is replaced when it is older than
+    max_session_age_seconds, when the MCP key refresher returns a different token, or when a
+    background health check fails. The cached tools are only re-listed when the health check sees
+    the server's tool list change, and then the session object is replaced so agents pooled with
+    the old tools are not reused. A replaced session is closed retire_grace_seconds later, which
+    should exceed the longest request, since requests that acquired it may still call its tools.
+    """
+
+    def __init__(
+        self,
+        client_factory: StreamableHttpMcpClientFactory,
+        key_refresher: Optional[KeyRefresher],
+        logger: Logger,
+        size: int = 1,
+        health_check_interval_seconds: float = 60.0,
+        max_session_age_seconds: float = 3000.0,
+        retire_grace_seconds: float = 900.0
+    ):
+        self.client_factory = client_factory
+        self.key_refresher = key_refresher
+        self.logger = logger
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.max_session_age_seconds = max_session_age_seconds
+        self.retire_grace_seconds = retire_grace_seconds
+        self._sessions: List[Optional[McpSession]] = [None] * size
+        self._locks = [asyncio.Lock() for _ in range(size)]
+        self._next = 0
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def acquire(self) -> McpSession:
+        """Return an open session, connecting or rotating it first when needed."""
+        self._ensure_health_checks()
+        slot = self._next
+        self._next = (self._next + 1) % len(self._sessions)
+        session = self._sessions[slot]
+        token = await self._current_token()
+        if session is not None and not self._needs_rotation(session, token):
+            return session
+        async with self._locks[slot]:
+            session = self._sessions[slot]
+            if session is None or self._needs_rotation(session, token):
+                session = await self._reconnect(slot, token)
+            return session
+
+    async def health_check(self) -> None:
+        """Re-list tools on every open session, reconnecting broken ones and refreshing changed tool lists."""
+        for slot, session in enumerate(self._sessions):
+            if session is None:
+                continue
+            try:
+                tools = await asyncio.to_thread(get_mcp_tools, session.client)
+            except Exception as e:
+                self.logger.warning(f"MCP session health check failed: {str(e)}. Reconnecting.")
+                async with self._locks[slot]:
+                    if self._sessions[slot] is session:
+                        await self._reconnect(slot, await self._current_token())
+                continue
+            if tools_fingerprint(tools) != session.fingerprint and self._sessions[slot] is session:
+                self.logger.info("MCP server tool list changed. Refreshing cached tool specs.")
+                # A new session object over the same client, so the agent pool drops agents built with the old tools.
+                refreshed = McpSession(client=session.client, tools=tools, token=session.token)
+                refreshed.created_at = session.created_at
+                self._sessions[slot] = refreshed
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        for slot, session in enumerate(self._sessions):
+            if session is not None:
+                self._sessions[slot] = None
+                await self._stop(session)
+
+    def _needs_rotation(self, session: McpSession, token: Optional[str]) -> bool:
+        return token != session.token or time.monotonic() - session.created_at > self.max_session_age_seconds
+
+    async def _current_token(self) -> Optional[str]:
+        return await self.key_refresher.get_key() if self.key_refresher is not None else None
+
+    async def _reconnect(self, slot: int, token: Optional[str]) -> McpSession:
+        previous = self._sessions[slot]
+        client = await self.client_factory.get_mcp_client()
+        tools = await asyncio.to_thread(get_mcp_tools, client)
+        session = McpSession(client=client, tools=tools, token=token)
+        self._sessions[slot] = session
+        self.logger.info(f"Opened MCP session with {len(tools)} tools.")
+        if previous is not None:
+            # Requests that acquired the previous session may still be calling its tools.
+            asyncio.get_running_loop().create_task(self._retire(previous))
+        return session
+
+    async def _retire(self, session: McpSession) -> None:
+        await asyncio.sleep(self.retire_grace_seconds)
+        await self._stop(session)
+
+    async def _stop(self, session: McpSession) -> None:
+        try:
+            await asyncio.to_thread(session.client.stop, None, None, None)
+        except Exception as e:
+            self.logger.warning(f"Error while closing MCP session: {str(e)}")
+
+    def _ensure_health_checks(self) -> None:
+        if self._health_task is None and self.health_check_interval_seconds > 0:
+            self._health_task = asyncio.get_running_loop().create_task(self._run_health_checks())
+
+    async def _run_health_checks(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval_seconds)
+            try:
+                await self.health_check()
+            except Exception as e:
+                self.logger.exception(f"Error during MCP session health check: {str(e)}", exc_info=True)
@@ -0,0 +1,123 @@
+import asyncio
+from contextvars import ContextVar
+from logging import Logger
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from app.metrics import stage
+from app.startup import startup_timer
+
+if TYPE_CHECKING:
+    from bedrock_agentcore.memory import MemoryClient
+
+# Results prefetched for the request being handled, keyed by the MemoryClient call they answer.
+_prefetched: ContextVar[Optional[Dict[tuple, Any]]] = ContextVar("prefetched_memory", default=None)
+
+
+class PrefetchingMemoryClient:
+    """
+    MemoryClient wrapper that lets request bootstrap load memory concurrently with other setup.
+
+    prefetch runs the reads AskAiSearchMemoryHooks makes (the last turns of the session and the
+    customer context for the prompt) in worker threads. When the hooks later make the same calls
+    they are answered from the prefetched results. Every other call goes to the wrapped client.
+    record_turn saves turns answered without the agent, which the hooks never see.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], "MemoryClient"],
+        memory_id: str,
+        number_of_events: int,
+        customer_context_top_k: int,
+        customer_context_namespaces: List[str],
+        logger: Logger
+    ):
+        self._client_factory = client_factory
+        self._client: Optional["MemoryClient"] = None
+        self.memory_id = memory_id
+        self.number_of_events = number_of_events
+        self.customer_context_top_k = customer_context_top_k
+        self.customer_context_namespaces = customer_context_namespaces
+        self.logger = logger
+
+    @property
+    def client(self) -> "MemoryClient":
+        if self._client is None:
+            with startup_timer.phase("create memory client"):
+                self._client = self._client_factory()
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def begin_request(self) -> None:
+        """
+        Start an empty prefetch scope for the current request.
+
+        Must be called from the request's own context before prefetch runs in a child task, so the
+        hooks running later in the request see what the child task stored.
+        """
+        _prefetched.set({})
+
+    async def prefetch(self, actor_id: Optional[str], session_id: Optional[str], query: str) -> None:
+        """Load this request's memory. Failures are logged and left to the hooks' own reads."""
+        results = _prefetched.get()
+        if results is None or not actor_id or not session_id:
+            return
+        try:
+            await self._prefetch(results, actor_id, session_id, query)
+        except Exception as e:
+            self.logger.warning(f"Memory prefetch failed: {str(e)}")
+
+    async def _prefetch(self, results: Dict[tuple, Any], actor_id: str, session_id: str, query: str) -> None:
+        namespaces = [namespace.format(actorId=actor_id) for namespace in self.customer_context_namespaces]
+        client = await asyncio.to_thread(lambda: self.client)
+        turns, *contexts = await asyncio.gather(
+            asyncio.to_thread(
+                client.get_last_k_turns,
+                memory_id=self.memory_id, actor_id=actor_id, session_id=session_id, k=self.number_of_events
+            ),
+            *(
+                asyncio.to_thread(
+                    client.retrieve_memories,
+                    memory_id=self.memory_id, namespace=namespace, query=query, top_k=self.customer_context_top_k
+                )
+                for namespace in namespaces
+            )
+        )
+        results[("get_last_k_turns", self.memory_id, actor_id, session_id, self.number_of_events)] = turns
+        for namespace, context in zip(namespaces, contexts):
+            results[("retrieve_memories", self.memory_id, namespace, query, self.customer_context_top_k)] = context
+
+    async def record_turn(self, actor_id: Optional[str], session_id: Optional[str], prompt: str, answer: str) -> None:
+        """Save a turn answered without the agent, like a cached replay. Failures are logged, the answer is already sent."""
+        if not actor_id or not session_id:
+            return
+        try:
+            client = await asyncio.to_thread(lambda: self.client)
+            await asyncio.to_thread(
+                client.create_event,
+                memory_id=self.memory_id,
+                actor_id=actor_id,
+                session_id=session_id,
+                messages=[(prompt, "USER"), (answer, "ASSISTANT")]
+            )
+        except Exception as e:
+            self.logger.warning(f"Could not save the turn to memory: {str(e)}")
+
+    def get_last_k_turns(self, memory_id: str, actor_id: str, session_id: str, k: int = 5, **kwargs) -> Any:
+        key = ("get_last_k_turns", memory_id, actor_id, session_id, k)
+        prefetched = _prefetched.get()
+        with stage("memory_retrieval"):
+            if not kwargs and prefetched is not None and key in prefetched:
+                return prefetched.pop(key)
+            return self.client.get_last_k_turns(memory_id=memory_id, actor_id=actor_id, session_id=session_id, k=k, **kwargs)
+
+    def retrieve_memories(self, memory_id: str, namespace: Optional[str] = None, query: Optional[str] = None,
+                          top_k: int = 3, **kwargs) -> Any:
+        key = ("retrieve_memories", memory_id, namespace, query, top_k)
+        prefetched = _prefetched.get()
+        with stage("memory_retrieval"):
+            if not kwargs and prefetched is not None and key in prefetched:
+                return prefetched.pop(key)
+            return self.client.retrieve_memories(memory_id=memory_id, namespace=namespace, query=query, top_k=top_k, **kwargs)
@@ -0,0 +1,173 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import Logger
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Seconds. Wide enough to cover a regex check and a multi-minute agent run.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+STAGE_SECONDS = "gap_agent_stage_seconds"
+TOOL_CALL_SECONDS = "gap_agent_tool_call_seconds"
+
+# Stage timings of the request being handled, logged together with its trace and session ids.
+_request_timings: ContextVar[Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus layout. Observing is a bisect and three additions."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((_format_number(bound), total))
+        result.append(("+Inf", self.count))
+        return result
+
+
+class MetricsRegistry:
+    """
+    In-process latency histograms and stats gauges, rendered in the Prometheus text format.
+
+    Histograms are created on first observation, one per metric name and label set. Gauge sources
+    are callables returning the stats() dict of a cache, pool or refresher; their numeric values
+    are read at render time, so collecting them costs nothing on the request path.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._gauge_sources: List[Tuple[str, Callable[[], Any]]] = []
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        series = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def histogram(self, name: str, **labels: str) -> Optional[Histogram]:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def add_gauges(self, name: str, source: Callable[[], Any]) -> None:
+        """Expose the numbers of a stats() dict, or a list of them, as gauges named name_<key>."""
+        self._gauge_sources.append((name, source))
+
+    def render(self) -> str:
+        lines = []
+        for name, series in self._histograms.items():
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in series.items():
+                for bound, count in histogram.cumulative_counts():
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        for name, source in self._gauge_sources:
+            try:
+                stats = source()
+            except Exception:
+                continue
+            for labels, key, value in _gauge_values(stats):
+                lines.append(f"{name}_{key}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.describe(STAGE_SECONDS, "Time spent in each stage of handling an agent request.")
+metrics.describe(TOOL_CALL_SECONDS, "Time between a tool call being selected and its result.")
+
+
+class RequestTimings:
+    "Stage durations of one request, keyed by stage name"
+
+    def __init__(self):
+        self.trace_id: Optional[str] = None
+        self.session_id: Optional[str] = None
+        self.stages: Dict[str, float] = {}
+        self.started = time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        stages = ", ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in self.stages.items())
+        return f"Request timings trace_id={self.trace_id} session_id={self.session_id}: {stages}"
+
+
+def begin_request() -> RequestTimings:
+    """Start collecting stage timings for the current request. Call from the request's own context."""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def end_request(logger: Logger) -> None:
+    """Log the request's stage timings on one line, so they can be found by trace or session id."""
+    timings = _request_timings.get()
+    _request_timings.set(None)
+    if timings is not None and timings.stages:
+        logger.info(timings.summary())
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    metrics.observe(STAGE_SECONDS, seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        # A stage run more than once in a request, like a memory read, is summed.
+        timings.stages[stage] = timings.stages.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the enclosed block as a request stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def _gauge_values(stats: Any) -> Iterator[Tuple[Tuple[Tuple[str, str], ...], str, Any]]:
+    entries = stats if isinstance(stats, list) else [stats]
+    for entry in entries:
+        labels = tuple((key, str(value)) for key, value in entry.items() if key == "name")
+        for key, value in entry.items():
+            if isinstance(value, bool):
+                yield labels, key, int(value)
+            elif isinstance(value, (int, float)):
+                yield labels, key, value
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value))
@@ -0,0 +1,81 @@
+import asyncio
+import re
+import time
+from typing import AsyncIterator, List, Optional
+
+# A chunk ending a sentence or containing a line break is a natural point to flush; markdown lists
+# and tables are line based.
+_BOUNDARY = re.compile(r"[.!?][\"')\]*_]*\s*$|\n")
+
+_END = object()
+
+
+class OutputBatcher:
+    """
+    Coalesce the many small text fragments of a streamed answer into fewer, larger frames.
+
+    Pending text is flushed when it reaches max_bytes, when max_delay_seconds have passed since its
+    first fragment arrived, or when a fragment ends a sentence or a markdown line, whichever comes
+    first. The first fragment is always sent on its own so time to first token is unchanged.
+
+    The source is consumed by a single background task, so an agent stream keeps running in one task
+    while the batcher waits for the delay deadline.
+    """
+
+    def __init__(self, max_bytes: int, max_delay_seconds: float, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.max_delay_seconds = max_delay_seconds
+        self._clock = clock
+
+    async def batch(self, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.ensure_future(self._produce(chunks, queue))
+        pending: List[str] = []
+        pending_bytes = 0
+        deadline: Optional[float] = None
+        first = True
+        try:
+            while True:
+                try:
+                    timeout = None if deadline is None else max(0.0, deadline - self._clock())
+                    item = await asyncio.wait_for(queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    yield "".join(pending)
+                    pending, pending_bytes, deadline = [], 0, None
+                    continue
+
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    if pending:
+                        yield "".join(pending)
+                    raise item
+                if first:
+                    first = False
+                    yield item
+                    continue
+
+                pending.append(item)
+                pending_bytes += len(item.encode("utf-8"))
+                if deadline is None:
+                    deadline = self._clock() + self.max_delay_seconds
+                if pending_bytes >= self.max_bytes or _BOUNDARY.search(item):
+                    yield "".join(pending)
+                    pending, pending_bytes, deadline = [], 0, None
+            if pending:
+                yield "".join(pending)
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.wait([producer])
+
+    @staticmethod
+    async def _produce(chunks: AsyncIterator[str], queue: asyncio.Queue) -> None:
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    queue.put_nowait(chunk)
+        except Exception as e:
+            queue.put_nowait(e)
+            return
+        queue.put_nowait(_END)
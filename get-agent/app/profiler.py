@@ -0,0 +1,145 @@
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from logging import Logger
+from typing import Any, Dict, Optional
+
+from app.context import AgentRequestContext
+from app.metrics import RequestTimings
+
+
+class StackSampler(threading.Thread):
+    """Sample the stack of one thread at a fixed interval and count identical stacks."""
+
+    def __init__(self, thread_id: int, interval_seconds: float, max_samples: int):
+        super().__init__(name="request-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_seconds = interval_seconds
+        self.max_samples = max_samples
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval_seconds) and self.samples < self.max_samples:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.stacks[collapse_stack(frame)] += 1
+            self.samples += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+class ProfiledRequest:
+    "Sampler and metadata of one profiled invocation"
+
+    def __init__(self, sampler: StackSampler, requested: bool):
+        self.sampler = sampler
+        self.requested = requested
+
+
+class RequestProfiler:
+    """
+    Profile single invocations with an in-process sampling profiler.
+
+    A request is profiled when it carries the profile header, or at random with sample_rate. Its
+    event loop thread is sampled every interval_seconds from a background thread. Since requests
+    share the event loop, the samples also contain whatever other requests ran meanwhile.
+    Profiles of requested invocations, and of any profiled invocation slower than
+    slow_request_seconds, are saved to output_dir as a collapsed-stack file, which flamegraph.pl
+    and speedscope read directly, plus a JSON file with the stage timings.
+
+    Nothing is started for requests that are not profiled; when profiling is disabled in the
+    config no profiler is created at all.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        sample_rate: float,
+        slow_request_seconds: float,
+        interval_seconds: float,
+        max_samples: int,
+        max_concurrent: int,
+        logger: Logger,
+        random_fraction=random.random
+    ):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.slow_request_seconds = slow_request_seconds
+        self.interval_seconds = interval_seconds
+        self.max_samples = max_samples
+        self.max_concurrent = max_concurrent
+        self.logger = logger
+        self._random_fraction = random_fraction
+        self._active = 0
+
+    def begin(self, request_context: AgentRequestContext) -> Optional[ProfiledRequest]:
+        """Start sampling the calling thread if this request is to be profiled."""
+        requested = bool(getattr(request_context, "profile", None))
+        if not requested and not (self.sample_rate > 0 and self._random_fraction() < self.sample_rate):
+            return None
+        if self._active >= self.max_concurrent:
+            self.logger.info("Request profiling skipped: too many requests are being profiled.")
+            return None
+        self._active += 1
+        sampler = StackSampler(threading.get_ident(), self.interval_seconds, self.max_samples)
+        sampler.start()
+        return ProfiledRequest(sampler, requested)
+
+    def end(self, profile: ProfiledRequest, timings: RequestTimings) -> Optional[str]:
+        """Stop sampling and save the profile when it was requested or the request was slow. Returns the saved path."""
+        stacks = profile.sampler.stop()
+        self._active -= 1
+        elapsed = timings.elapsed()
+        if not profile.requested and elapsed < self.slow_request_seconds:
+            return None
+        try:
+            path = self._save(stacks, timings, elapsed, profile.sampler.samples)
+        except OSError as e:
+            self.logger.warning(f"Could not save request profile: {str(e)}")
+            return None
+        self.logger.info(f"Saved request profile of {elapsed:.1f}s request to {path}")
+        return path
+
+    def _save(self, stacks: Counter, timings: RequestTimings, elapsed: float, samples: int) -> str:
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{_file_safe(timings.trace_id) or uuid.uuid4().hex}"
+        path = os.path.join(self.output_dir, f"{name}.collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        details: Dict[str, Any] = {
+            "trace_id": timings.trace_id,
+            "session_id": timings.session_id,
+            "elapsed_seconds": elapsed,
+            "samples": samples,
+            "interval_seconds": self.interval_seconds,
+            "stage_seconds": timings.stages,
+        }
+        with open(os.path.join(self.output_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(details, f, indent=2)
+        return path
+
+
+def collapse_stack(frame: Any) -> str:
+    """Render a frame and its callers, outermost first, as one collapsed-stack line."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _file_safe(value: Optional[str]) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in value or "")[:80]
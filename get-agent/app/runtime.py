@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from logging import Logger
+from typing import Any, Callable, Optional
+
+from optum_us_ml_gen_ai_common_strands.agent.agentfactory import AgentFactory
+from optum_us_ml_gen_ai_common_strands.mcp import StreamableHttpMcpClientFactory
+
+from app.agentpool import AgentPool
+from app.answercache import AnswerCache
+from app.config import GapExceptionConfig
+from app.fastpath import FastPath
+from app.mcpsession import McpSessionPool
+from app.outputbatch import OutputBatcher
+from app.profiler import RequestProfiler
+from app.memory import PrefetchingMemoryClient
+from app.speculation import SearchSpeculator
+from app.tokenrefresh import KeyRefreshScheduler, ScheduledKeyRefresher
+from app.validation import InputValidator
+
+
+class AgentRuntime:
+    "Everything built from one GapExceptionConfig that a request needs"
+
+    def __init__(
+        self,
+        config: GapExceptionConfig,
+        model: Any,
+        agent_factory: AgentFactory,
+        mcp_client_factory: StreamableHttpMcpClientFactory,
+        mcp_session_pool: Optional[McpSessionPool],
+        agent_pool: Optional[AgentPool],
+        key_refresh_scheduler: KeyRefreshScheduler,
+        llm_key_refresher: Optional[ScheduledKeyRefresher],
+        memory_client: Optional[PrefetchingMemoryClient],
+        input_validator: Optional[InputValidator] = None,
+        fast_path: Optional[FastPath] = None,
+        speculator: Optional[SearchSpeculator] = None,
+        answer_cache: Optional[AnswerCache] = None,
+        output_batcher: Optional[OutputBatcher] = None,
+        profiler: Optional[RequestProfiler] = None
+    ):
+        self.config = config
+        self.model = model
+        self.agent_factory = agent_factory
+        self.mcp_client_factory = mcp_client_factory
+        self.mcp_session_pool = mcp_session_pool
+        self.agent_pool = agent_pool
+        self.key_refresh_scheduler = key_refresh_scheduler
+        self.llm_key_refresher = llm_key_refresher
+        self.memory_client = memory_client
+        self.input_validator = input_validator
+        self.fast_path = fast_path
+        self.speculator = speculator
+        self.answer_cache = answer_cache
+        self.output_batcher = output_batcher
+        self.profiler = profiler
+
+    async def close(self) -> None:
+        if self.mcp_session_pool is not None:
+            await self.mcp_session_pool.close()
+        await self.key_refresh_scheduler.close()
+
+
+class RuntimeHolder:
+    """
+    Holds the runtime new requests are served from and swaps it atomically on a config change.
+
+    The first runtime is only built by get(), on the first request or an explicit pre-warm, so a
+    cold start does not pay for it. A request calls get() once when it starts and keeps that
+    runtime to the end, so a swap never changes the model, keys or MCP session under a running
+    request. The replaced runtime, with its MCP sessions and key refresh schedule, is closed
+    retire_grace_seconds later, which should exceed the longest request that may still be using it.
+    """
+
+    def __init__(self, build: Callable[[], AgentRuntime], logger: Logger, retire_grace_seconds: float):
+        self.current: Optional[AgentRuntime] = None
+        self.logger = logger
+        self.retire_grace_seconds = retire_grace_seconds
+        self.swaps = 0
+        self._build = build
+        self._build_lock = threading.Lock()
+
+    def get(self) -> AgentRuntime:
+        if self.current is None:
+            with self._build_lock:
+                if self.current is None:
+                    self.current = self._build()
+        return self.current
+
+    def swap(self, runtime: AgentRuntime) -> None:
+        previous = self.current
+        self.current = runtime
+        self.swaps += 1
+        if previous is not None:
+            asyncio.get_running_loop().create_task(self._retire(previous))
+
+    async def _retire(self, runtime: Any) -> None:
+        await asyncio.sleep(self.retire_grace_seconds)
+        try:
+            await runtime.close()
+        except Exception as e:
+            self.logger.warning(f"Error while closing replaced runtime: {str(e)}")
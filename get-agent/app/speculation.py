@@ -0,0 +1,240 @@
+import asyncio
+import json
+import math
+import uuid
+from contextvars import ContextVar
+from logging import Logger
+from typing import Any, Dict, List, Optional
+
+from strands.hooks import BeforeToolCallEvent
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from app.context import AgentRequestContext
+from app.fastpath import METERS_PER_MILE, distance_in_miles, find_cpt_codes
+
+# The speculative search started for the request being handled.
+_speculation: ContextVar[Optional["SpeculativeSearch"]] = ContextVar("speculative_search", default=None)
+
+
+class SpeculationStats:
+    """Counters for tuning speculation: a hit is a tool call served from the prefetched search."""
+
+    def __init__(self):
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.unused = 0
+        self.failed = 0
+
+    def stats(self) -> Dict[str, Any]:
+        decided = self.hits + self.misses + self.unused
+        return {
+            "started": self.started,
+            "hits": self.hits,
+            "misses": self.misses,
+            "unused": self.unused,
+            "failed": self.failed,
+            "hit_rate": self.hits / decided if decided else 0.0,
+        }
+
+
+speculation_stats = SpeculationStats()
+
+
+class SpeculativeSearch:
+    "A search started before the model asked for it, with the arguments it is expected to ask with"
+
+    def __init__(self, tool_name: str, arguments: Dict[str, Any]):
+        self.tool_name = tool_name
+        self.arguments = arguments
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Set once the first search tool call has been compared with it. Kept on the object rather than
+        # by resetting the ContextVar, since hooks may run in a copy of the request's context.
+        self.decided = False
+        self._task: Optional[asyncio.Task] = None
+
+    def launch(self, mcp_client: Any) -> None:
+        """Start the tool call in the background; its result completes future."""
+        self._task = asyncio.ensure_future(mcp_client.call_tool_async(
+            tool_use_id=f"speculative-{uuid.uuid4()}", name=self.tool_name, arguments=self.arguments
+        ))
+        self._task.add_done_callback(self._complete)
+
+    def matches(self, tool_name: str, tool_input: Dict[str, Any]) -> bool:
+        """
+        Whether the prefetched search can answer the model's final tool call.
+
+        The codes, location and plan must be the ones predicted. The radius and page may be any
+        that fall inside the prefetched ones, since narrow() can cut the prefetched providers down.
+        """
+        if tool_name != self.tool_name:
+            return False
+        expected = self.arguments
+        radius = _number(tool_input.get("radius_in_meters"))
+        limit = tool_input.get("limit")
+        skip = tool_input.get("skip") or 0
+        return (
+            sorted(code.upper() for code in tool_input.get("cpt_codes") or []) == expected["cpt_codes"]
+            and _same_number(tool_input.get("lat"), expected["lat"])
+            and _same_number(tool_input.get("lng"), expected["lng"])
+            and (tool_input.get("plan") or "").casefold() == (expected["plan"] or "").casefold()
+            and radius is not None and 0 < radius <= expected["radius_in_meters"] * (1 + 1e-9)
+            and isinstance(skip, int) and isinstance(limit, int) and skip >= 0 and limit > 0
+            and skip + limit <= expected["limit"]
+        )
+
+    def narrow(self, result: Dict[str, Any], tool_input: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Cut the prefetched result down to the radius and page the model asked for.
+
+        The search returns providers nearest first, so the ones within a smaller radius are a prefix
+        of them. Returns None when the result cannot be narrowed, so the tool is called instead.
+        """
+        radius = float(tool_input["radius_in_meters"])
+        skip = tool_input.get("skip") or 0
+        limit = tool_input["limit"]
+        if _same_number(radius, self.arguments["radius_in_meters"]) and skip == 0 and limit == self.arguments["limit"]:
+            return result
+        try:
+            providers: List[Dict[str, Any]] = json.loads(result["content"][0]["text"])
+            distances = [distance_in_miles(provider) for provider in providers]
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError):
+            return None
+        if not isinstance(providers, list) or any(distance is None for distance in distances):
+            return None
+        radius_in_miles = radius / METERS_PER_MILE
+        within = [provider for provider, distance in zip(providers, distances) if distance <= radius_in_miles]
+        return {**result, "content": [{"text": json.dumps(within[skip:skip + limit])}]}
+
+    def discard(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        if not self.future.done():
+            self.future.cancel()
+
+    def _complete(self, task: asyncio.Task) -> None:
+        if self.future.done():
+            return
+        if task.cancelled():
+            self.future.cancel()
+        elif task.exception() is not None:
+            self.future.set_exception(task.exception())
+        else:
+            self.future.set_result(task.result())
+
+
+class PrefetchedSearchTool(AgentTool):
+    """Stands in for the search tool and returns the prefetched result, or calls the tool if it failed."""
+
+    def __init__(self, tool: AgentTool, speculation: SpeculativeSearch):
+        super().__init__()
+        self._tool = tool
+        self._speculation = speculation
+
+    @property
+    def tool_name(self) -> str:
+        return self._tool.tool_name
+
+    @property
+    def tool_spec(self):
+        return self._tool.tool_spec
+
+    @property
+    def tool_type(self) -> str:
+        return self._tool.tool_type
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        future = self._speculation.future
+        # Waiting rather than awaiting, so only cancellation of this tool call itself propagates.
+        await asyncio.wait([future])
+        result = None if future.cancelled() or future.exception() is not None else future.result()
+        if result is not None and result.get("status") == "success":
+            result = self._speculation.narrow(result, tool_use.get("input", {}))
+        if result is None or result.get("status") != "success":
+            speculation_stats.failed += 1
+            async for event in self._tool.stream(tool_use, invocation_state, **kwargs):
+                yield event
+            return
+        yield ToolResultEvent({**result, "toolUseId": tool_use["toolUseId"]})
+
+
+class SearchSpeculator:
+    """
+    Start the search the model is about to ask for while it is still planning.
+
+    When the request headers carry lat, lng and plan and the prompt names CPT codes, the arguments
+    of the model's gap_exception_service call are predictable, apart from the radius and page it
+    picks. begin predicts them, with radius_in_meters and limit as wide as the model is expected
+    to ask for, and stores a SpeculativeSearch for the request; launch starts the call once an MCP
+    client is available. RequestContextInjectingHook then swaps the prefetched result in, narrowed
+    to the model's radius and page, when they fall inside it, and the search is discarded otherwise.
+    """
+
+    def __init__(self, tool_name: str, radius_in_meters: float, limit: int):
+        self.tool_name = tool_name
+        self.radius_in_meters = radius_in_meters
+        self.limit = limit
+
+    def predict(self, prompt: str, request_context: AgentRequestContext) -> Optional[Dict[str, Any]]:
+        if request_context.lat is None or request_context.lng is None or request_context.plan is None:
+            return None
+        codes, _ = find_cpt_codes(prompt.lower())
+        if not codes:
+            return None
+        return {
+            "cpt_codes": codes,
+            "lat": request_context.lat,
+            "lng": request_context.lng,
+            "radius_in_meters": self.radius_in_meters,
+            "plan": request_context.plan,
+            "skip": 0,
+            "limit": self.limit,
+        }
+
+    def begin(self, prompt: str, request_context: AgentRequestContext) -> Optional[SpeculativeSearch]:
+        """Predict the search for this request and make it visible to the hook. Call from the request's own context."""
+        arguments = self.predict(prompt, request_context)
+        speculation = SpeculativeSearch(self.tool_name, arguments) if arguments is not None else None
+        _speculation.set(speculation)
+        if speculation is not None:
+            speculation_stats.started += 1
+        return speculation
+
+
+def end_speculation() -> None:
+    """Discard the request's speculative search if the model never asked for it."""
+    speculation = _speculation.get()
+    _speculation.set(None)
+    if speculation is not None and not speculation.decided:
+        speculation_stats.unused += 1
+        speculation.discard()
+
+
+def serve_speculative_search(event: BeforeToolCallEvent, logger: Logger) -> None:
+    """Answer the tool call from the request's speculative search when the final arguments match."""
+    speculation = _speculation.get()
+    if speculation is None or speculation.decided or event.selected_tool is None:
+        return
+    if event.tool_use.get("name") != speculation.tool_name:
+        return
+    speculation.decided = True
+    if speculation.matches(event.tool_use.get("name"), event.tool_use.get("input", {})):
+        speculation_stats.hits += 1
+        event.selected_tool = PrefetchedSearchTool(event.selected_tool, speculation)
+        logger.info("Serving tool call from the speculative search.")
+    else:
+        speculation_stats.misses += 1
+        speculation.discard()
+
+
+def _same_number(value: Any, expected: float) -> bool:
+    number = _number(value)
+    return number is not None and math.isclose(number, float(expected), rel_tol=1e-9, abs_tol=1e-9)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
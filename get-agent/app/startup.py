@@ -0,0 +1,59 @@
+import importlib
+import time
+from contextlib import contextmanager
+from logging import Logger
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# When this module was first imported. app.agent imports it ahead of its other dependencies, so the
+# time from here to the end of app.agent's imports is what loading them cost.
+IMPORTS_STARTED = time.perf_counter()
+
+
+class StartupTimer:
+    """Records how long each import and construction step of a cold start takes."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.phases: List[Tuple[str, float]] = []
+        self._clock = clock
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.record(name, self._clock() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        self.phases.append((name, seconds))
+
+    def report(self, logger: Logger, title: str = "Startup phases") -> None:
+        """Log the phases recorded since the last report, slowest first."""
+        phases, self.phases = self.phases, []
+        if not phases:
+            return
+        total = sum(seconds for _, seconds in phases)
+        lines = "\n".join(f"  {seconds:8.3f}s  {name}" for name, seconds in sorted(phases, key=lambda p: -p[1]))
+        logger.info(f"{title} ({total:.3f}s):\n{lines}")
+
+
+startup_timer = StartupTimer()
+
+
+def lazy_import(namespace: Dict[str, Any], name: str, module: str, attr: Optional[str] = None) -> Any:
+    """
+    Return namespace[name], importing it from module on first use.
+
+    Heavy dependencies are bound into the calling module's globals the first time they are needed
+    instead of at import time, and the import is recorded by startup_timer. A name that is already
+    bound (for example monkeypatched in tests) is used as is. Binding a module under its own name
+    binds the module itself.
+    """
+    value = namespace.get(name)
+    if value is None:
+        with startup_timer.phase(f"import {module}"):
+            value = importlib.import_module(module)
+            if name != module or attr:
+                value = getattr(value, attr or name)
+        namespace[name] = value
+    return value
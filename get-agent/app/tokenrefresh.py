@@ -0,0 +1,246 @@
+import asyncio
+import base64
+import json
+import random
+import time
+from logging import Logger
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from httpx import AsyncClient
+from optum_us_ml_gen_ai_common_basic.security.Keyrefresher import KeyRefresher
+
+
+def token_lifetime_seconds(token: str, now: float) -> Optional[float]:
+    """Seconds until a JWT access token's exp claim, or None when the token is not a readable JWT."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"]) - now
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class OAuth2TokenRequest:
+    """
+    Request a new token from an OAuth2 token endpoint with the client credentials grant.
+
+    Oauth2KeyRefresher.get_key serves its cached token until that expires, so it cannot renew a
+    token early. The background refresh posts the grant itself instead.
+    """
+
+    def __init__(self, token_url: str, client_id: str, client_secret: str, scope: str, httpx_async_client: AsyncClient):
+        self.token_url = token_url
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.scope = scope
+        self.httpx_async_client = httpx_async_client
+
+    async def __call__(self) -> str:
+        response = await self.httpx_async_client.post(self.token_url, data={
+            "grant_type": "client_credentials",
+            "client_id": self.client_id,
+            "client_secret": self.client_secret,
+            "scope": self.scope,
+        })
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+
+class ScheduledKeyRefresher:
+    """
+    KeyRefresher wrapper that renews its token in the background before it expires.
+
+    The token is renewed after refresh_fraction of its lifetime, minus up to jitter_fraction so
+    refreshers started together do not hit the token endpoint at the same moment. Renewal calls
+    request_token, or the wrapped refresher's refresh_key, and a renewal that returns the token
+    being replaced counts as failed and is retried. Requests are always served the last good
+    token; they only wait on the token endpoint for the very first token or once the last one has
+    actually expired, and then fall back to the wrapped refresher's get_key if renewal fails.
+    Concurrent refreshes share one call.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        refresher: KeyRefresher,
+        logger: Logger,
+        request_token: Optional[Callable[[], Awaitable[str]]] = None,
+        refresh_fraction: float = 0.8,
+        jitter_fraction: float = 0.1,
+        default_lifetime_seconds: float = 3600.0,
+        retry_seconds: float = 15.0,
+        clock=time.monotonic,
+        wall_clock=time.time
+    ):
+        self.name = name
+        self.logger = logger
+        self.refresh_fraction = refresh_fraction
+        self.jitter_fraction = jitter_fraction
+        self.default_lifetime_seconds = default_lifetime_seconds
+        self.retry_seconds = retry_seconds
+        self.refreshes = 0
+        self.failures = 0
+        self.last_refresh_seconds: Optional[float] = None
+        self.max_refresh_seconds = 0.0
+        self._refresher = refresher
+        self._request_token = request_token or getattr(refresher, "refresh_key", None)
+        self._token: Optional[str] = None
+        self._refreshed_at = 0.0
+        self._lifetime = 0.0
+        self._last_failed = False
+        self._inflight: Optional[asyncio.Future] = None
+        self._task: Optional[asyncio.Task] = None
+        self._clock = clock
+        self._wall_clock = wall_clock
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._refresher, name)
+
+    async def get_key(self) -> str:
+        self._ensure_scheduled()
+        if self._token is not None and not self.expired:
+            return self._token
+        return await self.refresh()
+
+    @property
+    def expired(self) -> bool:
+        return self._clock() - self._refreshed_at >= self._lifetime
+
+    async def refresh(self) -> str:
+        """Fetch a new token, joining the refresh already in flight if there is one."""
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+            self._inflight.add_done_callback(self._clear_inflight)
+        # A cancelled request must not cancel the refresh other requests are waiting on.
+        return await asyncio.shield(self._inflight)
+
+    def start(self) -> None:
+        """Start the background refresh loop on the running event loop."""
+        self._ensure_scheduled()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_refresh_seconds": self.last_refresh_seconds,
+            "max_refresh_seconds": self.max_refresh_seconds,
+            "expires_in_seconds": max(0.0, self._refreshed_at + self._lifetime - self._clock()),
+        }
+
+    def next_refresh_delay(self) -> float:
+        """Seconds until the background loop should renew the token."""
+        if self._last_failed:
+            return self.retry_seconds
+        if self._token is None:
+            return 0.0
+        jitter = 1.0 - self.jitter_fraction * random.random()
+        due = self._refreshed_at + self._lifetime * self.refresh_fraction * jitter
+        return max(0.0, due - self._clock())
+
+    async def _refresh(self) -> str:
+        started = self._clock()
+        renewed = False
+        try:
+            try:
+                token = await self._renew()
+                renewed = True
+            except Exception:
+                self.failures += 1
+                self._last_failed = True
+                if self._token is not None and not self.expired:
+                    raise
+                # Without a usable token, take whatever the wrapped refresher serves rather than fail the request.
+                token = await self._refresher.get_key()
+        finally:
+            elapsed = self._clock() - started
+            self.last_refresh_seconds = elapsed
+            self.max_refresh_seconds = max(self.max_refresh_seconds, elapsed)
+        lifetime = token_lifetime_seconds(token, self._wall_clock())
+        self._token = token
+        self._refreshed_at = started
+        self._lifetime = lifetime if lifetime is not None else self.default_lifetime_seconds
+        if renewed:
+            self._last_failed = False
+            self.refreshes += 1
+        return token
+
+    async def _renew(self) -> str:
+        request_token = self._request_token or self._refresher.get_key
+        token = await request_token()
+        if self._token is not None and token == self._token:
+            raise RuntimeError(f"The {self.name} token endpoint returned the token being renewed.")
+        return token
+
+    def _clear_inflight(self, _future: asyncio.Future) -> None:
+        self._inflight = None
+
+    def _ensure_scheduled(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.next_refresh_delay())
+            try:
+                await self.refresh()
+                self.logger.info(f"Refreshed {self.name} token in {self.last_refresh_seconds:.3f}s.")
+            except Exception as e:
+                self.logger.warning(f"Background refresh of {self.name} token failed: {str(e)}. Serving the last good token.")
+
+
+class KeyRefreshScheduler:
+    """Owns the background refresh of every OAuth2 token the agent uses (LLM gateway and MCP server)."""
+
+    def __init__(
+        self,
+        logger: Logger,
+        refresh_fraction: float = 0.8,
+        jitter_fraction: float = 0.1,
+        default_lifetime_seconds: float = 3600.0,
+        retry_seconds: float = 15.0
+    ):
+        self.logger = logger
+        self.refresh_fraction = refresh_fraction
+        self.jitter_fraction = jitter_fraction
+        self.default_lifetime_seconds = default_lifetime_seconds
+        self.retry_seconds = retry_seconds
+        self.refreshers: List[ScheduledKeyRefresher] = []
+
+    def schedule(
+            self,
+            name: str,
+            refresher: Optional[KeyRefresher],
+            request_token: Optional[Callable[[], Awaitable[str]]] = None
+    ) -> Optional[ScheduledKeyRefresher]:
+        """Wrap a key refresher so its token is renewed in the background. None is passed through."""
+        if refresher is None:
+            return None
+        scheduled = ScheduledKeyRefresher(
+            name=name,
+            refresher=refresher,
+            logger=self.logger,
+            request_token=request_token,
+            refresh_fraction=self.refresh_fraction,
+            jitter_fraction=self.jitter_fraction,
+            default_lifetime_seconds=self.default_lifetime_seconds,
+            retry_seconds=self.retry_seconds
+        )
+        self.refreshers.append(scheduled)
+        return scheduled
+
+    def start(self) -> None:
+        for refresher in self.refreshers:
+            refresher.start()
+
+    async def close(self) -> None:
+        for refresher in self.refreshers:
+            await refresher.close()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [refresher.stats() for refresher in self.refreshers]
@@ -1,30 +1,67 @@
+import re
+from typing import Iterable, Optional
+
+DEFAULT_MAX_WORDS = 100
+
+DEFAULT_BLACKLIST = [
+    "reveral" , "guideline", "you are a", "<script", "'''", "configuration", "ignore", "disregard",
+    "initial", "command", "bypass", "secret", "private", "sentive", "disclose", "expose", "hidden",
+    "backdoor", "exploit", "debug", "admin", "root", "access", "dump", "extract", "leak",
+]
+
+DEFAULT_DOMAIN_KEYWORDS = [
+    "provider", "gap", "gap exception" , "cpt", "cpt code", "network", "state", "city", "plan", "uhc", "doctor"
+    ,"clinic", "optum", "zip code", "npi", "radius"
+]
+
+TOO_LONG_MESSAGE = "Your question is too long. Please provide a concise query about provider or gap excpetion."
+BLACKLISTED_MESSAGE = "Your question contain term that cannot be processed. Please rephrese"
+OUT_OF_DOMAIN_MESSAGE = "Your question is outside the scope of the provider/gap-exception domain"
+
+
+def _alternation(terms: Iterable[str]) -> str:
+    # Longest first, so a longer term is preferred over a shorter term starting at the same position.
+    return "|".join(re.escape(term.lower()) for term in sorted(set(terms), key=len, reverse=True) if term)
+
+
+class InputValidator:
+    """
+    Guardrail check of a user prompt, run before any agent, MCP or memory work.
+
+    The blacklist and domain keywords are compiled into one regex that is tried at every position
+    of the prompt in a single scan. A blacklisted term wins over a domain keyword starting at the
+    same position, so overlapping terms can not hide each other.
+    """
+
+    def __init__(self, blacklist: Iterable[str], domain_keywords: Iterable[str], max_words: int):
+        self.max_words = max_words
+        blocked = _alternation(blacklist)
+        domain = _alternation(domain_keywords)
+        self._pattern = re.compile(f"(?=(?P<blocked>{blocked or '(?!)'})|(?P<domain>{domain or '(?!)'}))")
+
+    def validate(self, prompt: str) -> Optional[str]:
+        """
+        Validate user input against guardrails rules.
+        Return error message if validation fails. None if input is valid
+        """
+        if len(prompt.split()) > self.max_words:
+            return TOO_LONG_MESSAGE
+        in_domain = False
+        for match in self._pattern.finditer(prompt.lower()):
+            if match.group("blocked") is not None:
+                return BLACKLISTED_MESSAGE
+            in_domain = True
+        if not in_domain:
+            return OUT_OF_DOMAIN_MESSAGE
+        return None
+
+
+default_validator = InputValidator(DEFAULT_BLACKLIST, DEFAULT_DOMAIN_KEYWORDS, DEFAULT_MAX_WORDS)
+
+
 def validate_user_input(prompt:str) -> str | None:
     """
     Validate user input against guardrails rules.
     Return error message if validation fails. None if input is valid
     """
-    text_lower = prompt.lower()
-    word_count = len(prompt.split())
-
-    #check length
-    if word_count > 100:
-        return "Your question is too long. Please provide a concise query about provider or gap excpetion."
-    
-    #Check for balcklisted terms
-    blacklist = [
-        "reveral" , "guideline", "you are a", "<script", "'''", "configuration", "ignore", "disregard",
-        "initial", "command", "bypass", "secret", "private", "sentive", "disclose", "expose", "hidden",
-        "backdoor", "exploit", "debug", "admin", "root", "access", "dump", "extract", "leak",  
-    ]
-    if any(term in text_lower for term in blacklist):
-        return "Your question contain term that cannot be processed. Please rephrese"
-    
-    #check for domain relevance
-    domain_kewords = [
-        "provider", "gap", "gap exception" , "cpt", "cpt code", "network", "state", "city", "plan", "uhc", "doctor"
-        ,"clinic", "optum", "zip code", "npi", "radius"
-    ]
-    if not any(kw in test_lower for kw in domain_kewords):
-        return "Your question is outside the scope of the provider/gap-exception domain"
-    
-    return None
\ No newline at end of file
+    return default_validator.validate(prompt)
@@ -0,0 +1,119 @@
+import asyncio
+from logging import Logger
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.bootstrap import Bootstrap
+from app.runtime import AgentRuntime, RuntimeHolder
+from app.startup import startup_timer
+
+PING_HEALTHY_BUSY = "HealthyBusy"
+
+
+class WarmUp:
+    """
+    Warm a fresh runtime up before the app reports itself ready for traffic.
+
+    Token fetches, the MCP handshake and tool listing, the memory client and the agent pool
+    (LiteLLM client setup) are warmed concurrently. A synthetic tool call and a tiny LLM completion
+    can be added on top. A failing step is logged and does not stop the others. The ping status is
+    HealthyBusy until warm-up finishes or times out.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        timeout_seconds: float,
+        tool_name: Optional[str] = None,
+        tool_arguments: Optional[Dict[str, Any]] = None,
+        llm_completion: bool = False
+    ):
+        self.logger = logger
+        self.timeout_seconds = timeout_seconds
+        self.tool_name = tool_name
+        self.tool_arguments = tool_arguments or {}
+        self.llm_completion = llm_completion
+        self.ready = False
+        self.failed_steps = []
+
+    def ping_status(self) -> Optional[str]:
+        """HealthyBusy while warming up; None afterwards so the app's own busy tracking applies."""
+        return None if self.ready else PING_HEALTHY_BUSY
+
+    async def run(self, runtime: RuntimeHolder) -> None:
+        try:
+            with startup_timer.phase("warm-up"):
+                await asyncio.wait_for(self._warm(runtime), timeout=self.timeout_seconds)
+            self.logger.info("Warm-up finished.")
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Warm-up did not finish within {self.timeout_seconds}s. Accepting traffic anyway.")
+        except Exception as e:
+            self.logger.warning(f"Warm-up failed: {str(e)}. Accepting traffic anyway.")
+        finally:
+            self.ready = True
+            startup_timer.report(self.logger, "Warm-up phases")
+
+    async def _warm(self, holder: RuntimeHolder) -> None:
+        # Building the runtime imports litellm and friends, so keep it off the event loop.
+        runtime = await asyncio.to_thread(holder.get)
+
+        bootstrap = Bootstrap()
+        bootstrap.add("keys", self._step("fetch tokens", lambda: self._warm_keys(runtime)))
+        bootstrap.add("tools", self._step("open mcp session", lambda: self._open_session(runtime)))
+        bootstrap.add("memory", self._step("create memory client", lambda: self._warm_memory(runtime)))
+        bootstrap.add(
+            "agents",
+            self._step("pre-build agents", lambda session, _keys: self._warm_agents(runtime, session)),
+            depends_on=["tools", "keys"]
+        )
+        if self.tool_name:
+            bootstrap.add(
+                "tool_call",
+                self._step("synthetic tool call", lambda session: self._call_tool(session)),
+                depends_on=["tools"]
+            )
+        if self.llm_completion:
+            bootstrap.add(
+                "completion",
+                self._step("synthetic llm completion", lambda _agents: self._complete(runtime)),
+                depends_on=["agents"]
+            )
+        await bootstrap.run()
+
+    def _step(self, name: str, step: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        async def run(*dependencies):
+            try:
+                with startup_timer.phase(name):
+                    return await step(*dependencies)
+            except Exception as e:
+                self.failed_steps.append(name)
+                self.logger.warning(f"Warm-up step '{name}' failed: {str(e)}")
+                return None
+        return run
+
+    async def _warm_keys(self, runtime: AgentRuntime) -> None:
+        runtime.key_refresh_scheduler.start()
+        await asyncio.gather(*(refresher.get_key() for refresher in runtime.key_refresh_scheduler.refreshers))
+
+    async def _open_session(self, runtime: AgentRuntime) -> Any:
+        if runtime.mcp_session_pool is None:
+            return None
+        return await runtime.mcp_session_pool.acquire()
+
+    async def _warm_memory(self, runtime: AgentRuntime) -> None:
+        if runtime.memory_client is not None:
+            await asyncio.to_thread(lambda: runtime.memory_client.client)
+
+    async def _warm_agents(self, runtime: AgentRuntime, session: Any) -> None:
+        if runtime.agent_pool is not None and session is not None:
+            await runtime.agent_pool.prewarm(tool_factory=lambda: session.tools, tools_owner=session)
+
+    async def _call_tool(self, session: Any) -> None:
+        if session is not None:
+            await session.client.call_tool_async(
+                tool_use_id="warm-up", name=self.tool_name, arguments=self.tool_arguments
+            )
+
+    async def _complete(self, runtime: AgentRuntime) -> None:
+        messages = [{"role": "user", "content": [{"text": "Reply with OK."}]}]
+        async for _ in runtime.model.stream(messages):
+            pass
@@ -0,0 +1,43 @@
+import argparse
+import os
+from typing import Any, List
+
+import uvicorn
+
+# Serves create_app() for the benchmark in a process of its own, so its memory can be measured
+# apart from the load generator in bench/run.py, which starts it.
+
+
+class BenchMemoryClient:
+    "AgentCore memory stand-in: no history, no customer context, writes are dropped"
+
+    def get_last_k_turns(self, *args, **kwargs) -> List[Any]:
+        return []
+
+    def retrieve_memories(self, *args, **kwargs) -> List[Any]:
+        return []
+
+    def __getattr__(self, name: str) -> Any:
+        return lambda *args, **kwargs: {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the gap exception agent for the load benchmark.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--config-snapshot", required=True, help="Config snapshot written by bench/run.py")
+    args = parser.parse_args()
+
+    os.environ["ASKAI_SEARCH_GAP_EXCEPTION_CONFIG_SNAPSHOT_PATH"] = args.config_snapshot
+    os.environ["ASKAI_SEARCH_GAP_EXCEPTION_CONFIG_REFRESH_INTERVAL_SECONDS"] = "0"
+    os.environ.setdefault("AZURE_API_KEY", "bench")
+
+    from app.agent import SYSTEM_PROMPT, create_app
+    from app.config import GapExceptionConfig
+
+    GapExceptionConfig.create_memory_client = lambda self: BenchMemoryClient()
+    app = create_app(system_prompt=SYSTEM_PROMPT)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
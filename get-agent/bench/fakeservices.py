@@ -0,0 +1,245 @@
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+METERS_PER_MILE = 1609.344
+
+_CODE = re.compile(r"\b(?:\d{5}|\d{4}[ft]|[a-z]\d{4})\b", re.IGNORECASE)
+_LAT_LNG = re.compile(r"(?P<lat>[-+]?\d{1,2}\.\d+)\s*(?:,|and longitude)\s*(?P<lng>[-+]?\d{1,3}\.\d+)")
+
+# The model first asks for the provider search, then answers from its result.
+DEFAULT_SCRIPT = [
+    {"tool": "gap_exception_service"},
+    {"answer": None},
+]
+
+
+class FakeSearchService:
+    """
+    Stand-in for the Gap Exception Service /v1/search endpoint.
+
+    Returns limit providers around the requested location after latency_seconds, ordered by distance
+    within the radius, in the fields the MCP server projects.
+    """
+
+    def __init__(self, latency_seconds: float, seed: int = 7):
+        self.latency_seconds = latency_seconds
+        self.seed = seed
+        self.requests = 0
+
+    async def search(self, request: Request) -> JSONResponse:
+        self.requests += 1
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        params = request.query_params
+        limit = int(params.get("limit") or 10)
+        radius_in_miles = float(params.get("radius_in_meters") or 16093.44) / METERS_PER_MILE
+        cpt_codes = params.getlist("cpt_code")
+        return JSONResponse(self.providers(cpt_codes, radius_in_miles, limit))
+
+    def providers(self, cpt_codes: List[str], radius_in_miles: float, limit: int) -> List[Dict[str, Any]]:
+        generator = random.Random(f"{self.seed}:{','.join(sorted(cpt_codes))}")
+        distances = sorted(generator.uniform(0.1, radius_in_miles) for _ in range(limit))
+        return [
+            {
+                "npi": f"{1000000000 + number}",
+                "name": f"Provider {number + 1}",
+                "specialty": "General Dentistry",
+                "address": f"{100 + number} Main St, Chicago, IL",
+                "phone": f"555-01{number:02d}",
+                "web_url": f"https://providers.example.com/{number + 1}",
+                "distance_in_miles": round(distance, 2),
+            }
+            for number, distance in enumerate(distances)
+        ]
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[Route("/v1/search", self.search, methods=["GET"])])
+
+
+class FakeChatModel:
+    """
+    Stand-in for the LiteLLM/Azure OpenAI chat completions API, plus the OAuth2 token endpoint.
+
+    Every completion is streamed as server-sent chat.completion.chunk events. Which turn of script
+    is played depends on how many assistant turns follow the last user message: a tool turn calls
+    the tool with the arguments given, or with CPT codes and coordinates read from the prompt, and
+    an answer turn streams its text, or a rendering of the last tool result, at tokens_per_second.
+    """
+
+    def __init__(self, tokens_per_second: float, first_token_seconds: float, script: Optional[List[Dict[str, Any]]] = None):
+        self.tokens_per_second = tokens_per_second
+        self.first_token_seconds = first_token_seconds
+        self.script = script or DEFAULT_SCRIPT
+        self.completions = 0
+
+    async def token(self, request: Request) -> JSONResponse:
+        return JSONResponse({"access_token": f"bench-{uuid.uuid4().hex}", "token_type": "Bearer", "expires_in": 3600})
+
+    async def completions_endpoint(self, request: Request) -> StreamingResponse:
+        body = await request.json()
+        self.completions += 1
+        step = self.next_step(body.get("messages", []))
+        return StreamingResponse(self.stream(body.get("model", "bench"), step, body.get("messages", [])), media_type="text/event-stream")
+
+    def next_step(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        last_user = max((i for i, message in enumerate(messages) if message.get("role") == "user"), default=-1)
+        turn = sum(1 for message in messages[last_user + 1:] if message.get("role") == "assistant")
+        return self.script[min(turn, len(self.script) - 1)]
+
+    async def stream(self, model: str, step: Dict[str, Any], messages: List[Dict[str, Any]]) -> AsyncIterator[bytes]:
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        if self.first_token_seconds > 0:
+            await asyncio.sleep(self.first_token_seconds)
+        yield _event(_chunk(completion_id, model, {"role": "assistant", "content": ""}))
+        if "tool" in step:
+            arguments = step.get("arguments") or arguments_from_prompt(_last_user_text(messages))
+            delta = {"tool_calls": [{
+                "index": 0,
+                "id": f"call_{uuid.uuid4().hex[:12]}",
+                "type": "function",
+                "function": {"name": step["tool"], "arguments": json.dumps(arguments)},
+            }]}
+            yield _event(_chunk(completion_id, model, delta))
+            finish_reason = "tool_calls"
+        else:
+            text = step.get("answer") or render_answer(_last_tool_result(messages))
+            tokens = re.findall(r"\S+\s*", text)
+            delay = 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+            for token in tokens:
+                if delay:
+                    await asyncio.sleep(delay)
+                yield _event(_chunk(completion_id, model, {"content": token}))
+            finish_reason = "stop"
+        yield _event(_chunk(completion_id, model, {}, finish_reason))
+        yield _event({
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [], "usage": {"prompt_tokens": 500, "completion_tokens": 50, "total_tokens": 550},
+        })
+        yield b"data: [DONE]\n\n"
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route("/oauth2/token", self.token, methods=["POST"]),
+            Route("/chat/completions", self.completions_endpoint, methods=["POST"]),
+            Route("/openai/deployments/{deployment}/chat/completions", self.completions_endpoint, methods=["POST"]),
+        ])
+
+
+def arguments_from_prompt(prompt: str) -> Dict[str, Any]:
+    """Tool arguments a model would send for a provider search prompt."""
+    arguments: Dict[str, Any] = {
+        "cpt_codes": sorted({code.upper() for code in _CODE.findall(prompt)}) or ["D2750"],
+        "radius_in_meters": 16093.44,
+        "skip": 0,
+        "limit": 5,
+    }
+    match = _LAT_LNG.search(prompt)
+    if match is not None:
+        arguments["lat"] = float(match.group("lat"))
+        arguments["lng"] = float(match.group("lng"))
+    return arguments
+
+
+def render_answer(tool_result: str) -> str:
+    try:
+        providers = json.loads(tool_result)
+    except ValueError:
+        return "I could not find any providers for that request."
+    if isinstance(providers, dict):
+        providers = providers.get("providers", [])
+    if not providers:
+        return "I could not find any providers for that request."
+    lines = ["Here are the providers near the provided location:", ""]
+    for number, provider in enumerate(providers, start=1):
+        lines.append(f"{number}. **[{provider.get('name')}]({provider.get('web_url')})**")
+        lines.append(f"   - Specialty: {provider.get('specialty')}")
+        lines.append(f"   - Address: {provider.get('address')}")
+        lines.append(f"   - Phone: {provider.get('phone')}")
+        distance = provider.get("distance_in_miles")
+        if distance is not None:
+            lines.append(f"   - Distance: {float(distance):.1f} miles")
+    return "\n".join(lines)
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return _text(message.get("content"))
+    return ""
+
+
+def _last_tool_result(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            return _text(message.get("content"))
+    return ""
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _chunk(completion_id: str, model: str, delta: Dict[str, Any], finish_reason: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+def _event(payload: Dict[str, Any]) -> bytes:
+    return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+async def serve(search: FakeSearchService, model: FakeChatModel, host: str, search_port: int, llm_port: int) -> None:
+    servers = [
+        uvicorn.Server(uvicorn.Config(search.app(), host=host, port=search_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(model.app(), host=host, port=llm_port, log_level="warning")),
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the provider search and LLM stand-ins used by the benchmark.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--search-port", type=int, default=8001)
+    parser.add_argument("--llm-port", type=int, default=8002)
+    parser.add_argument("--search-latency-seconds", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-seconds", type=float, default=0.3)
+    parser.add_argument("--script", help="JSON file with the model's turns, for example " + json.dumps(DEFAULT_SCRIPT))
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+    asyncio.run(serve(
+        FakeSearchService(latency_seconds=args.search_latency_seconds),
+        FakeChatModel(tokens_per_second=args.tokens_per_second, first_token_seconds=args.first_token_seconds, script=script),
+        args.host,
+        args.search_port,
+        args.llm_port,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from bench.stats import compare, peak_rss_mb, summarize
+
+# Load benchmark of the gap exception agent, with no cloud dependency.
+#
+# Starts the provider search and LLM stand-ins (bench/fakeservices.py) and the local MCP server
+# against them, serves create_app() on localhost (bench/agentserver.py), and drives POST /invocations
+# at a fixed concurrency. Each runs in its own process. Requests/sec, latency and time-to-first-token
+# percentiles and the agent process's peak RSS are written to a JSON file so runs can be compared
+# across commits:
+#
+#     cd get-agent
+#     python -m bench.run --requests 200 --concurrency 16
+#     python -m bench.run --requests 200 --concurrency 16 --baseline bench/results/<earlier run>.json
+#
+# The agent process imports the app as deployed, so the optum_us_ml_gen_ai_common_* packages and
+# litellm (for strands.models.litellm) must be installed; without them bench/agentserver.py fails
+# at import and no results are written.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENT_DIR = os.path.dirname(BENCH_DIR)
+
+CPT_CODES = ["D2750", "D2740", "D1110", "D0120", "D2391", "D7140", "D4341", "D2950"]
+# Not plain lookups, so they go through the agent rather than the fast path.
+PROMPT = "Which providers would you recommend for CPT code {code}?"
+ERROR_MESSAGE = "Error occurred while processing your request"
+# Where localmcp/mcpserver.py listens: FastMCP's default port.
+MCP_PORT = 8000
+
+
+def bench_config(llm_port: int, mcp_port: int, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    config = {
+        "memory_id": "bench-memory",
+        "azure_api_base": f"http://127.0.0.1:{llm_port}",
+        "lim_project_id": "bench",
+        "llm_client_id": "bench",
+        "llm_client_secret": "bench",
+        "llm_token_url": f"http://127.0.0.1:{llm_port}/oauth2/token",
+        "llm_scope": "bench",
+        "llm_target_env": "bench",
+        "llm_model_id": "azure/bench-model",
+        "mcp_url": f"http://127.0.0.1:{mcp_port}/mcp",
+        # Every request should run the full path unless a run asks for the cache.
+        "answer_cache_enabled": False,
+    }
+    config.update(overrides)
+    return config
+
+
+def write_config_snapshot(config: Dict[str, Any], directory: str) -> str:
+    """Write the config where ConfigLoader looks first, so the app never calls SSM."""
+    from app.config import GapExceptionEnvSettings
+    from app.configloader import config_hash
+
+    path = os.path.join(directory, "config.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "parameter": GapExceptionEnvSettings().ssm_parameter_name(),
+            "sha256": config_hash(config),
+            "config": config,
+        }, f)
+    return path
+
+
+def wait_for_port(port: int, timeout_seconds: float) -> None:
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Nothing is listening on port {port} after {timeout_seconds}s")
+
+
+def start_stand_ins(args: argparse.Namespace) -> List[subprocess.Popen]:
+    """Start the search and LLM stand-ins and the local MCP server in their own processes, so their memory is not counted."""
+    fake_services = [
+        sys.executable, "-m", "bench.fakeservices",
+        "--search-port", str(args.search_port),
+        "--llm-port", str(args.llm_port),
+        "--search-latency-seconds", str(args.search_latency_seconds),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--first-token-seconds", str(args.first_token_seconds),
+    ]
+    if args.script:
+        fake_services += ["--script", args.script]
+    mcp_env = dict(
+        os.environ,
+        GAP_EXCEPTION_SERVICE_URL=f"http://127.0.0.1:{args.search_port}",
+    )
+    processes = [
+        subprocess.Popen(fake_services, cwd=AGENT_DIR),
+        subprocess.Popen([sys.executable, "mcpserver.py"], cwd=os.path.join(AGENT_DIR, "localmcp"), env=mcp_env),
+    ]
+    for port in (args.search_port, args.llm_port, MCP_PORT):
+        wait_for_port(port, args.startup_timeout_seconds)
+    return processes
+
+
+def start_agent(args: argparse.Namespace, snapshot_path: str) -> subprocess.Popen:
+    """Serve create_app() in its own process, so its peak RSS is measured without the load generator."""
+    agent = subprocess.Popen(
+        [sys.executable, "-m", "bench.agentserver", "--port", str(args.agent_port), "--config-snapshot", snapshot_path],
+        cwd=AGENT_DIR,
+    )
+    wait_for_port(args.agent_port, args.startup_timeout_seconds)
+    return agent
+
+
+async def wait_until_healthy(client: httpx.AsyncClient, base_url: str, timeout_seconds: float) -> None:
+    """Wait for warm-up to finish: /ping reports HealthyBusy until then."""
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        response = await client.get(f"{base_url}/ping")
+        if response.status_code == 200 and response.json().get("status") == "Healthy":
+            return
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"The agent did not report Healthy within {timeout_seconds}s")
+
+
+def request_headers(number: int) -> Dict[str, str]:
+    from app.constants import HDR_ACTOR_ID, HDR_LAT, HDR_LNG, HDR_PLAN, HDR_SESSION_ID
+
+    return {
+        HDR_LAT: "41.9576904",
+        HDR_LNG: "-87.7469924",
+        HDR_PLAN: "Choice Plus",
+        HDR_ACTOR_ID: f"bench-actor-{number % 50}",
+        HDR_SESSION_ID: f"bench-session-{uuid.uuid4()}",
+    }
+
+
+async def invoke_once(client: httpx.AsyncClient, base_url: str, number: int) -> Dict[str, Any]:
+    prompt = PROMPT.format(code=CPT_CODES[number % len(CPT_CODES)])
+    started = time.perf_counter()
+    first_token = None
+    body = []
+    async with client.stream("POST", f"{base_url}/invocations", json={"prompt": prompt}, headers=request_headers(number)) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_text():
+            if first_token is None and chunk.strip():
+                first_token = time.perf_counter() - started
+            body.append(chunk)
+    text = "".join(body)
+    if ERROR_MESSAGE in text or first_token is None:
+        raise RuntimeError(f"Agent answered with an error: {text[:200]}")
+    return {"latency": time.perf_counter() - started, "first_token": first_token}
+
+
+async def run_load(
+    base_url: str,
+    agent_pid: int,
+    requests: int,
+    concurrency: int,
+    warmup_requests: int,
+    timeout_seconds: float
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    errors = 0
+    numbers = itertools.count()
+
+    async with httpx.AsyncClient(timeout=timeout_seconds, limits=httpx.Limits(max_connections=concurrency)) as client:
+        await wait_until_healthy(client, base_url, timeout_seconds)
+        for number in range(warmup_requests):
+            await invoke_once(client, base_url, number)
+
+        async def worker():
+            nonlocal errors
+            while (number := next(numbers)) < requests:
+                try:
+                    result = await invoke_once(client, base_url, warmup_requests + number)
+                except Exception as e:
+                    errors += 1
+                    logging.getLogger("bench").warning(f"Request {number} failed: {str(e)}")
+                    continue
+                latencies.append(result["latency"])
+                first_tokens.append(result["first_token"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.perf_counter() - started
+    # Read while the agent is still running: /proc only has live processes.
+    return summarize(latencies, first_tokens, errors, duration, peak_rss_mb(agent_pid))
+
+
+def git_commit() -> Optional[str]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=AGENT_DIR, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=AGENT_DIR, capture_output=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit.stdout.strip() + ("-dirty" if dirty.stdout.strip() else "")
+
+
+def parse_override(value: str) -> tuple:
+    key, _, raw = value.partition("=")
+    try:
+        return key, json.loads(raw)
+    except ValueError:
+        return key, raw
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load benchmark of the gap exception agent against local stand-ins.")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup-requests", type=int, default=5)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--first-token-seconds", type=float, default=0.3)
+    parser.add_argument("--search-latency-seconds", type=float, default=0.05)
+    parser.add_argument("--script", help="JSON file with the fake model's turns, see bench/fakeservices.py")
+    parser.add_argument("--config", action="append", default=[], type=parse_override, metavar="KEY=VALUE",
+                        help="GapExceptionConfig override, for example --config answer_cache_enabled=true")
+    parser.add_argument("--agent-port", type=int, default=8080)
+    parser.add_argument("--search-port", type=int, default=8001)
+    parser.add_argument("--llm-port", type=int, default=8002)
+    parser.add_argument("--startup-timeout-seconds", type=float, default=60.0)
+    parser.add_argument("--request-timeout-seconds", type=float, default=120.0)
+    parser.add_argument("--output", help="Result file. Defaults to bench/results/<time>-<commit>.json")
+    parser.add_argument("--baseline", help="Earlier result file to compare this run with")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    processes = start_stand_ins(args)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            config = bench_config(args.llm_port, MCP_PORT, dict(args.config))
+            agent = start_agent(args, write_config_snapshot(config, directory))
+            processes.append(agent)
+            summary = asyncio.run(run_load(
+                f"http://127.0.0.1:{args.agent_port}",
+                agent.pid,
+                args.requests,
+                args.concurrency,
+                args.warmup_requests,
+                args.request_timeout_seconds,
+            ))
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(timeout=10)
+
+    commit = git_commit()
+    now = datetime.now(timezone.utc)
+    result = {
+        "commit": commit,
+        "timestamp": now.isoformat(),
+        "parameters": {
+            key: value for key, value in vars(args).items()
+            if key not in ("output", "baseline", "startup_timeout_seconds")
+        },
+        "summary": summary,
+    }
+    output = args.output or os.path.join(BENCH_DIR, "results", f"{now.strftime('%Y%m%dT%H%M%S')}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print(json.dumps(summary, indent=2))
+    print(f"Saved to {output}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.baseline} ({baseline.get('commit')}):")
+        for line in compare(result, baseline):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
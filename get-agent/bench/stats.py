@@ -0,0 +1,89 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+# Metrics compared across runs. Lower is better for all of them except throughput.
+COMPARED = ("requests_per_second", "latency_ms", "time_to_first_token_ms", "agent_peak_rss_mb")
+HIGHER_IS_BETTER = {"requests_per_second"}
+
+
+def percentile(values: Sequence[float], fraction: float) -> Optional[float]:
+    """Linearly interpolated percentile of values, for fraction between 0 and 1."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def distribution_ms(seconds: Sequence[float]) -> Dict[str, Optional[float]]:
+    result = {}
+    for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        value = percentile(seconds, fraction)
+        result[name] = round(value * 1000, 2) if value is not None else None
+    result["max"] = round(max(seconds) * 1000, 2) if seconds else None
+    return result
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Peak resident set size of a running process, from VmHWM in /proc. None where /proc is not available."""
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def summarize(
+    latencies: List[float],
+    first_token_latencies: List[float],
+    errors: int,
+    duration_seconds: float,
+    agent_peak_rss_mb: Optional[float] = None
+) -> Dict[str, Any]:
+    completed = len(latencies)
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "duration_seconds": round(duration_seconds, 3),
+        "requests_per_second": round(completed / duration_seconds, 2) if duration_seconds > 0 else 0.0,
+        "latency_ms": distribution_ms(latencies),
+        "time_to_first_token_ms": distribution_ms(first_token_latencies),
+        "agent_peak_rss_mb": agent_peak_rss_mb,
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """
+    One line per metric with the change from baseline, flagging changes worse than tolerance.
+
+    Both arguments are benchmark result files; their "summary" sections are compared.
+    """
+    lines = []
+    current = _flatten(result["summary"])
+    previous = _flatten(baseline["summary"])
+    for key, value in current.items():
+        before = previous.get(key)
+        if key.split(".")[0] not in COMPARED:
+            continue
+        if not isinstance(value, (int, float)) or not isinstance(before, (int, float)) or before == 0:
+            continue
+        change = (value - before) / before
+        worse = -change if key.split(".")[0] in HIGHER_IS_BETTER else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        lines.append(f"{key}: {before} -> {value} ({change:+.1%}){flag}")
+    return lines
+
+
+def _flatten(summary: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    flat = {}
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
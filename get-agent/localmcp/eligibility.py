@@ -0,0 +1,138 @@
+from collections import defaultdict
+from functools import reduce
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+import numpy as np
+
+NO_ROWS = np.empty(0, dtype=np.int32)
+
+
+class RowSet:
+    """
+    Sorted, unique provider row ids in an int32 array.
+
+    Single row additions and removals are buffered and merged into the array on the next read, so
+    adding a batch of providers costs one merge per touched code or plan rather than one per row.
+    """
+
+    __slots__ = ("_rows", "_added", "_removed")
+
+    def __init__(self, rows: Iterable[int] = ()):
+        self._rows = np.unique(np.fromiter(rows, dtype=np.int32))
+        self._added: Set[int] = set()
+        self._removed: Set[int] = set()
+
+    def add(self, row: int) -> None:
+        self._removed.discard(row)
+        self._added.add(row)
+
+    def remove(self, row: int) -> None:
+        self._added.discard(row)
+        self._removed.add(row)
+
+    def rows(self) -> np.ndarray:
+        if self._added:
+            added = np.sort(np.fromiter(self._added, dtype=np.int32, count=len(self._added)))
+            if len(self._rows) == 0 or added[0] > self._rows[-1]:
+                # Appended providers get new, higher row ids, so the merge is usually a concatenation.
+                self._rows = np.concatenate([self._rows, added])
+            else:
+                self._rows = np.union1d(self._rows, added).astype(np.int32, copy=False)
+            self._added.clear()
+        if self._removed:
+            removed = np.fromiter(self._removed, dtype=np.int32, count=len(self._removed))
+            self._rows = np.setdiff1d(self._rows, removed, assume_unique=True)
+            self._removed.clear()
+        return self._rows
+
+
+class EligibilityIndex:
+    """
+    Inverted CPT code -> rows and plan -> rows indexes over provider row ids.
+
+    Each code and plan keeps the sorted row ids eligible for it, so memory grows with the number of
+    (code, row) and (plan, row) pairs rather than with codes x rows, and AND/OR across codes and
+    plans are np.intersect1d/np.union1d merges over the matching rows only.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._by_cpt: Dict[str, RowSet] = {}
+        self._by_plan: Dict[str, RowSet] = {}
+        self._live = RowSet()
+        self._row_cpt_codes: Dict[int, FrozenSet[str]] = {}
+        self._row_plans: Dict[int, FrozenSet[str]] = {}
+
+    @staticmethod
+    def build(cpt_codes: List[Iterable[str]], plans: List[Iterable[str]]) -> "EligibilityIndex":
+        """Bulk build the index for rows 0..n-1 in one pass per distinct code and plan."""
+        index = EligibilityIndex()
+        index.size = len(cpt_codes)
+        cpt_rows = defaultdict(list)
+        plan_rows = defaultdict(list)
+        for row, (row_codes, row_plans) in enumerate(zip(cpt_codes, plans)):
+            index._row_cpt_codes[row] = frozenset(_normalize_cpt(code) for code in row_codes)
+            index._row_plans[row] = frozenset(_normalize_plan(plan) for plan in row_plans)
+            for code in index._row_cpt_codes[row]:
+                cpt_rows[code].append(row)
+            for plan in index._row_plans[row]:
+                plan_rows[plan].append(row)
+        index._by_cpt = {code: RowSet(rows) for code, rows in cpt_rows.items()}
+        index._by_plan = {plan: RowSet(rows) for plan, rows in plan_rows.items()}
+        index._live = RowSet(range(index.size))
+        return index
+
+    def add(self, row: int, cpt_codes: Iterable[str], plans: Iterable[str]) -> None:
+        """Add or replace the eligibility of a single provider row."""
+        if row in self._row_cpt_codes:
+            self.remove(row)
+        self.size = max(self.size, row + 1)
+        self._row_cpt_codes[row] = frozenset(_normalize_cpt(code) for code in cpt_codes)
+        self._row_plans[row] = frozenset(_normalize_plan(plan) for plan in plans)
+        for code in self._row_cpt_codes[row]:
+            self._by_cpt.setdefault(code, RowSet()).add(row)
+        for plan in self._row_plans[row]:
+            self._by_plan.setdefault(plan, RowSet()).add(row)
+        self._live.add(row)
+
+    def remove(self, row: int) -> None:
+        """Remove a provider row so it no longer matches any query."""
+        for code in self._row_cpt_codes.pop(row, ()):
+            self._by_cpt[code].remove(row)
+        for plan in self._row_plans.pop(row, ()):
+            self._by_plan[plan].remove(row)
+        self._live.remove(row)
+
+    def match(self, cpt_codes: Optional[List[str]], plan: Optional[str], match_all_cpt_codes: bool = False) -> np.ndarray:
+        """
+        Return the sorted ids of the rows eligible for the requested CPT codes and plan.
+
+        :param cpt_codes: Rows must handle any of these codes, or all of them when match_all_cpt_codes is set.
+        :param plan: Rows must be in network for this plan.
+        """
+        rows = None
+        codes = {_normalize_cpt(code) for code in cpt_codes or []}
+        if codes:
+            code_rows = [self._rows(self._by_cpt, code) for code in codes]
+            if match_all_cpt_codes:
+                rows = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), code_rows)
+            else:
+                rows = reduce(np.union1d, code_rows)
+        if plan:
+            plan_rows = self._rows(self._by_plan, _normalize_plan(plan))
+            rows = plan_rows if rows is None else np.intersect1d(rows, plan_rows, assume_unique=True)
+        # Removed rows are already gone from every code and plan; only an unfiltered query needs the live rows.
+        return self._live.rows() if rows is None else rows
+
+    @staticmethod
+    def _rows(index: Dict[str, RowSet], key: str) -> np.ndarray:
+        row_set = index.get(key)
+        return row_set.rows() if row_set is not None else NO_ROWS
+
+
+def _normalize_cpt(code: str) -> str:
+    return code.strip().upper()
+
+
+def _normalize_plan(plan: str) -> str:
+    return plan.strip().casefold()
@@ -0,0 +1,23 @@
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+METERS_PER_MILE = 1609.344
+
+
+def haversine_meters(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """
+    Vectorized great-circle distance from one point to many points.
+
+    :param lat: The latitude of the origin.
+    :param lng: The longitude of the origin.
+    :param lats: The latitudes of the destinations.
+    :param lngs: The longitudes of the destinations.
+    :return: The distances in meters.
+    """
+    lat1 = np.radians(lat)
+    lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlng = np.radians(np.asarray(lngs, dtype=np.float64) - lng)
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from httpx import AsyncClient, Limits, PoolTimeout, Timeout
+
+
+class PoolMetrics:
+    """Track in-flight upstream requests against the connection pool size."""
+
+    def __init__(self, max_connections: int, logger: logging.Logger):
+        self.max_connections = max_connections
+        self.logger = logger
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.saturated_requests = 0
+        self.pool_timeouts = 0
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[None]:
+        """Count a request for its whole duration. Requests started on a full pool are flagged as saturated."""
+        self.requests += 1
+        if self.in_flight >= self.max_connections:
+            self.saturated_requests += 1
+            self.logger.warning(
+                f"Upstream connection pool is saturated ({self.in_flight}/{self.max_connections} in flight). "
+                f"Pool metrics: {self.snapshot()}"
+            )
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        except PoolTimeout:
+            self.pool_timeouts += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "max_connections": self.max_connections,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "requests": self.requests,
+            "saturated_requests": self.saturated_requests,
+            "pool_timeouts": self.pool_timeouts,
+        }
+
+
+class SharedHttpClient:
+    """
+    Reference counted owner of the httpx client shared by all tool calls.
+
+    FastMCP enters its lifespan once per server run, which for streamable HTTP means once per
+    session. The first opener builds the pooled client and the last closer shuts it down.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry_seconds: float,
+        http2: bool,
+        connect_timeout_seconds: float,
+        read_timeout_seconds: float,
+        write_timeout_seconds: float,
+        pool_timeout_seconds: float,
+        logger: logging.Logger,
+    ):
+        self.limits = Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry_seconds,
+        )
+        self.timeout = Timeout(
+            connect=connect_timeout_seconds,
+            read=read_timeout_seconds,
+            write=write_timeout_seconds,
+            pool=pool_timeout_seconds,
+        )
+        self.http2 = http2
+        self.logger = logger
+        self.metrics = PoolMetrics(max_connections=max_connections, logger=logger)
+        self._client: Optional[AsyncClient] = None
+        self._ref_count = 0
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> AsyncClient:
+        async with self._lock:
+            if self._client is None:
+                # http2=True requires the optional "h2" package (pip install httpx[http2]).
+                self._client = AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+                self.logger.info(f"Created upstream HTTP client with limits: {self.limits} and timeout: {self.timeout}")
+            self._ref_count += 1
+            return self._client
+
+    async def close(self) -> None:
+        async with self._lock:
+            self._ref_count -= 1
+            if self._ref_count == 0 and self._client is not None:
+                await self._client.aclose()
+                self._client = None
+                self.logger.info(f"Closed upstream HTTP client. Pool metrics: {self.metrics.snapshot()}")
@@ -1,20 +1,126 @@
+import asyncio
+import json
 import logging
-from typing import List, Optional
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List, Literal, Optional
 
-from httpx import AsyncClient
+from httpx import AsyncClient, HTTPError, HTTPStatusError
 from mcp.server import FastMCP
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 from pydantic_settings import BaseSettings
 
+from httpclient import SharedHttpClient
+from metrics import MetricsRegistry
+from providerindex import load_provider_index
+from providers import OUTPUT_FIELDS, merge_providers, project_provider, rank_providers, stream_providers
+from resilience import CircuitBreaker, Hedger, LatencyTracker
+from searchcache import SearchResultCache, make_search_key
+from singleflight import SingleFlight
+
 class MCPSetting(BaseSettings):
     gap_exception_service_url: str = "http://localhost:8001"
+    upstream_results_field: Optional[str] = None
+    provider_output_fields: List[str] = list(OUTPUT_FIELDS)
+    search_backend: Literal["upstream", "local"] = "upstream"
+    provider_snapshot_path: Optional[str] = None
+    provider_index_cell_degrees: float = 0.05
+    provider_index_match_all_cpt_codes: bool = False
+    search_cache_enabled: bool = True
+    search_cache_ttl_seconds: float = 300.0
+    search_cache_max_entries: int = 1024
+    search_cache_max_bytes: int = 16 * 1024 * 1024
+    search_cache_geohash_precision: int = 6
+    search_cache_stale_ttl_seconds: float = 3600.0
+    search_coalescing_enabled: bool = True
+    cpt_fanout_shard_size: int = 0
+    cpt_fanout_concurrency: int = 4
+    radius_expansion_factor: float = 2.0
+    max_radius_in_meters: float = 80467.0
+    search_budget_seconds: float = 10.0
+    hedging_enabled: bool = False
+    hedge_latency_window: int = 200
+    hedge_min_samples: int = 20
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout_seconds: float = 30.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http2_enabled: bool = False
+    http_connect_timeout_seconds: float = 2.0
+    http_read_timeout_seconds: float = 10.0
+    http_write_timeout_seconds: float = 5.0
+    http_pool_timeout_seconds: float = 1.0
 
-#Create MCP server
-mcp = FastMCP("GAP Exception MCP Server")
+settings = MCPSetting()
+
+search_cache = SearchResultCache(
+    ttl_seconds=settings.search_cache_ttl_seconds,
+    max_entries=settings.search_cache_max_entries,
+    max_bytes=settings.search_cache_max_bytes,
+    stale_ttl_seconds=settings.search_cache_stale_ttl_seconds,
+)
+search_flight = SingleFlight()
+circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.circuit_failure_threshold,
+    reset_timeout_seconds=settings.circuit_reset_timeout_seconds,
+)
+hedger = Hedger(LatencyTracker(window=settings.hedge_latency_window, min_samples=settings.hedge_min_samples))
+metrics = MetricsRegistry()
+tool_call_seconds = metrics.histogram(
+    "gap_mcp_tool_call_seconds", "Time to answer a gap_exception_service tool call."
+)
+upstream_search_seconds = metrics.histogram(
+    "gap_mcp_upstream_search_seconds", "Time of one Gap Exception Service /v1/search call, body included."
+)
+metrics.add_gauges("gap_mcp_search_cache", search_cache.stats)
+metrics.add_gauges("gap_mcp_hedger", hedger.stats)
+metrics.add_gauges("gap_mcp_circuit_breaker", circuit_breaker.stats)
+# Deadline (time.monotonic) of the tool call in progress, shared by every upstream call it makes.
+search_deadline: ContextVar[Optional[float]] = ContextVar("search_deadline", default=None)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 logger.info("Starting MCP Server")
 
+upstream_client = SharedHttpClient(
+    max_connections=settings.http_max_connections,
+    max_keepalive_connections=settings.http_max_keepalive_connections,
+    keepalive_expiry_seconds=settings.http_keepalive_expiry_seconds,
+    http2=settings.http2_enabled,
+    connect_timeout_seconds=settings.http_connect_timeout_seconds,
+    read_timeout_seconds=settings.http_read_timeout_seconds,
+    write_timeout_seconds=settings.http_write_timeout_seconds,
+    pool_timeout_seconds=settings.http_pool_timeout_seconds,
+    logger=logger,
+)
+metrics.add_gauges("gap_mcp_upstream_pool", upstream_client.metrics.snapshot)
+httpx_client: Optional[AsyncClient] = None
+
+provider_index = None
+if settings.search_backend == "local":
+    provider_index = load_provider_index(
+        settings.provider_snapshot_path,
+        cell_degrees=settings.provider_index_cell_degrees,
+        match_all_cpt_codes=settings.provider_index_match_all_cpt_codes
+    )
+    logger.info(f"Loaded {len(provider_index)} providers from {settings.provider_snapshot_path}")
+
+@asynccontextmanager
+async def server_lifespan(server: FastMCP) -> AsyncIterator[None]:
+    """Keep the pooled upstream HTTP client open while the server is running."""
+    global httpx_client
+    httpx_client = await upstream_client.open()
+    try:
+        yield
+    finally:
+        await upstream_client.close()
+
+#Create MCP server
+mcp = FastMCP("GAP Exception MCP Server", lifespan=server_lifespan)
+
 @mcp.tool(description="The service to pull various provider data for gap exception project")
 async def gap_exception_service(
     cpt_codes: Optional[List[str]],
@@ -23,7 +129,8 @@ async def gap_exception_service(
     radius_in_meters: float ,
     plan: Optional[str],
     skip: Optional[int],
-    limit: Optional[int]
+    limit: Optional[int],
+    min_results: Optional[int] = None
 ):
     """
     Fetch provider data from gap exception service based on the provided parameters.
@@ -35,8 +142,235 @@ async def gap_exception_service(
     :param plan: The member insurance plan to consider during the search.
     :param skip: Number of records to skip for pagination.
     :param limit: Maximum number of records to return
-    :return: The provider information
+    :param min_results: Widen the radius until at least this many providers are found. The response then
+        reports the radius actually searched.
+    :return: The provider information, ordered by distance_in_miles from lat/lng when provided.
+    """
+    token = search_deadline.set(time.monotonic() + settings.search_budget_seconds)
+    try:
+        async with metrics.time(tool_call_seconds):
+            if min_results is not None and lat is not None and lng is not None:
+                return await _search_expanding_radius(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit, min_results)
+            return await _cached_search(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit)
+    finally:
+        search_deadline.reset(token)
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Prometheus text exposition of the server's latency histograms, caches and upstream pool."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def _radius_schedule(radius_in_meters: float) -> List[float]:
+    """The radii to try, growing by radius_expansion_factor up to and including max_radius_in_meters."""
+    radii = [radius_in_meters]
+    while radii[-1] < settings.max_radius_in_meters and settings.radius_expansion_factor > 1:
+        radii.append(min(radii[-1] * settings.radius_expansion_factor, settings.max_radius_in_meters))
+    return radii
+
+async def _search_expanding_radius(
+    cpt_codes: Optional[List[str]],
+    lat: float,
+    lng: float,
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int],
+    min_results: int
+) -> str:
+    """
+    Search progressively larger radii until min_results providers are found or the radius cap is reached.
+
+    Each radius is searched from the first provider, since the upstream's order is not relied on, and
+    its providers are merged with those already found, keeping one copy of each location. The page is
+    cut once, after the merged providers are ordered by distance.
+    """
+    start = skip or 0
+    enough = start + min_results
+    wanted = start + max(limit or 0, min_results)
+    found: List[dict] = []
+    radius = radius_in_meters
+    for radius in _radius_schedule(radius_in_meters):
+        result = await _cached_search(cpt_codes, lat, lng, radius, plan, 0, wanted)
+        found = merge_providers([found, json.loads(result)])
+        if len(found) >= enough:
+            break
+        logger.info(f"Found {len(found)} providers within {radius} meters. Expanding search radius.")
+
+    # Distances were already filled in from lat/lng by each search's ranking.
+    page = rank_providers(found, None, None, start, limit)
+    return json.dumps({"effective_radius_in_meters": radius, "providers": page})
+
+async def _cached_search(
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> str:
+    """
+    Run one search through the result cache and in-flight request coalescing.
+
+    Nearby searches share a cache key, so the cache and coalescing hold the unranked candidates with
+    their coordinates, and distances are computed from this caller's own lat/lng after the lookup.
+    """
+    search_key = make_search_key(
+        cpt_codes, lat, lng, radius_in_meters, plan, skip, limit,
+        geohash_precision=settings.search_cache_geohash_precision
+    )
+    if settings.search_cache_enabled:
+        cached = search_cache.get(search_key)
+        if cached is not None:
+            logger.info(f"Search cache hit. Cache stats: {search_cache.stats()}")
+            return _rank_candidates(cached, cpt_codes, lat, lng, skip, limit)
+
+    search = _search_local if settings.search_backend == "local" else _search_upstream
+    try:
+        if settings.search_coalescing_enabled:
+            result = await search_flight.do(
+                search_key,
+                lambda: search(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit)
+            )
+        else:
+            result = await search(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit)
+    except Exception as e:
+        stale = search_cache.get_stale(search_key) if settings.search_cache_enabled else None
+        if stale is None:
+            raise
+        logger.warning(f"Search failed with {e!r}. Serving stale cached result.")
+        return _rank_candidates(stale, cpt_codes, lat, lng, skip, limit)
+
+    if settings.search_cache_enabled:
+        search_cache.put(search_key, result)
+    return _rank_candidates(result, cpt_codes, lat, lng, skip, limit)
+
+def _fans_out(cpt_codes: Optional[List[str]]) -> bool:
+    shard_size = settings.cpt_fanout_shard_size
+    return settings.search_backend == "upstream" and shard_size > 0 and bool(cpt_codes) and len(cpt_codes) > shard_size
+
+def _rank_candidates(
+    candidates: str,
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> str:
     """
+    Rank the candidates of a search by distance from lat/lng and return them as JSON.
+
+    Single searches were already paged by the backend. A fanned out search returns the merged shards,
+    so its page is cut here, once the candidates are ordered by this caller's distance.
+    """
+    page = (skip, limit) if _fans_out(cpt_codes) else (None, None)
+    return json.dumps(rank_providers(json.loads(candidates), lat, lng, *page))
+
+async def _search_local(
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> str:
+    """Answer the search from the in-process provider index loaded from the provider snapshot, unranked."""
+    providers = provider_index.search(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit)
+    return json.dumps([project_provider(provider, settings.provider_output_fields) for provider in providers])
+
+async def _search_upstream(
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> str:
+    """Call the gap exception service /v1/search endpoint and return the unranked projected providers as JSON."""
+    if _fans_out(cpt_codes):
+        return await _search_upstream_fanout(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit)
+    return json.dumps(await _fetch_upstream(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit))
+
+async def _search_upstream_fanout(
+    cpt_codes: List[str],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> str:
+    """
+    Split the CPT codes into shards searched concurrently, then merge the results by provider location.
+
+    Each shard fetches the first skip + limit records so the original page can be cut from the merged set
+    once it is ranked by distance, which _rank_candidates does per caller.
+    """
+    shard_size = settings.cpt_fanout_shard_size
+    shards = [cpt_codes[i:i + shard_size] for i in range(0, len(cpt_codes), shard_size)]
+    shard_limit = (skip or 0) + limit if limit is not None else None
+    semaphore = asyncio.Semaphore(settings.cpt_fanout_concurrency)
+
+    async def fetch_shard(shard: List[str]) -> List[dict]:
+        async with semaphore:
+            return await _fetch_upstream(shard, lat, lng, radius_in_meters, plan, 0, shard_limit)
+
+    logger.info(f"Fanning out search for {len(cpt_codes)} CPT codes into {len(shards)} shards")
+    results = await asyncio.gather(*(fetch_shard(shard) for shard in shards))
+    return json.dumps(merge_providers(results))
+
+async def _fetch_upstream(
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> List[dict]:
+    """
+    Call /v1/search once, guarded by the circuit breaker and bounded by the remaining search budget.
+
+    With hedging enabled a duplicate request is sent when the first one is slower than the observed p95.
+    """
+    circuit_breaker.check()
+    try:
+        deadline = search_deadline.get()
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError("Search budget exhausted before calling the Gap Exception Service")
+
+        call = lambda: _stream_upstream(cpt_codes, lat, lng, radius_in_meters, plan, skip, limit)
+        try:
+            providers = await asyncio.wait_for(hedger.run(call) if settings.hedging_enabled else call(), remaining)
+        except HTTPStatusError as e:
+            # A client error is an answer from a healthy upstream.
+            if e.response.status_code >= 500:
+                circuit_breaker.record_failure()
+            else:
+                circuit_breaker.record_success()
+            raise
+        except (HTTPError, TimeoutError):
+            circuit_breaker.record_failure()
+            raise
+        circuit_breaker.record_success()
+        return providers
+    finally:
+        # Cancellation and unparseable bodies say nothing either way, but must not hold the trial slot.
+        circuit_breaker.release_trial()
+
+async def _stream_upstream(
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: float,
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> List[dict]:
+    """Stream one /v1/search response, parsing and projecting providers as the body arrives."""
     url = f"{settings.gap_exception_service_url}/v1/search"
 
     params = {
@@ -52,12 +386,12 @@ async def gap_exception_service(
     #delete on params that are None
     params = {k: v for k, v in params.items() if v is not None}
     logger.info(f"Calling Gap Exception Service at {url} with params: {params}")
-    response = await httpx_client.get(
-        url=url,
-        params=params,
-    )
-    response.raise_for_status()
-    return response.text
+    async with upstream_client.metrics.track(), metrics.time(upstream_search_seconds):
+        async with httpx_client.stream("GET", url=url, params=params) as response:
+            response.raise_for_status()
+            return await stream_providers(
+                response.aiter_bytes(), settings.upstream_results_field, limit, settings.provider_output_fields
+            )
 
 logging.info("MCP Server is initialized...")
 
@@ -0,0 +1,74 @@
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+# Seconds. Upstream searches are bounded by the search budget, 10s by default.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram in the Prometheus layout. Observing is a bisect and three additions."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str) -> List[str]:
+        lines = []
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{le="{float(bound)!r}"}} {total}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum {self.sum}")
+        lines.append(f"{name}_count {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Latency histograms of the MCP server and the stats() of its caches, rendered in the Prometheus text format.
+
+    Gauge sources are read at render time, so they cost nothing on the search path.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Tuple[str, Histogram]] = {}
+        self._gauge_sources: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = (help_text, Histogram(buckets))
+        return self._histograms[name][1]
+
+    @asynccontextmanager
+    async def time(self, histogram: Histogram) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    def add_gauges(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Expose the numeric values of a stats() dict as gauges named name_<key>."""
+        self._gauge_sources.append((name, source))
+
+    def render(self) -> str:
+        lines = []
+        for name, (help_text, histogram) in self._histograms.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            lines.extend(histogram.render(name))
+        for name, source in self._gauge_sources:
+            for key, value in source().items():
+                if isinstance(value, (bool, int, float)):
+                    lines.append(f"{name}_{key} {int(value) if isinstance(value, bool) else value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,190 @@
+import csv
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from eligibility import EligibilityIndex
+from geo import METERS_PER_DEGREE_LAT, haversine_meters
+
+CONTACT_FIELDS = ("name", "specialty", "address", "phone", "web_url")
+LIST_SEPARATOR = "|"
+
+
+def _as_list(value: Union[str, Iterable[str], None]) -> List[str]:
+    """CSV snapshots store multi-valued columns as "|" separated strings, Parquet/Arrow as lists."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [v for v in value.split(LIST_SEPARATOR) if v]
+    return list(value)
+
+
+class ProviderIndex:
+    """
+    In-memory provider snapshot with a lat/lng grid for radius searches.
+
+    Rows are stored column-wise in NumPy arrays. The eligibility index narrows rows by CPT code and
+    plan first, then the grid, which maps each cell of cell_degrees x cell_degrees to the row ids
+    located in it, limits distance math to eligible rows in nearby cells.
+    """
+
+    def __init__(self, columns: Dict[str, Sequence[Any]], cell_degrees: float, match_all_cpt_codes: bool = False):
+        self.cell_degrees = cell_degrees
+        self.match_all_cpt_codes = match_all_cpt_codes
+        self.npis = np.asarray([str(npi) for npi in columns["npi"]], dtype=str)
+        self.lats = np.asarray(columns["lat"], dtype=np.float32)
+        self.lngs = np.asarray(columns["lng"], dtype=np.float32)
+        self.contacts = {
+            field: np.asarray(columns.get(field, [None] * len(self.npis)), dtype=object)
+            for field in CONTACT_FIELDS
+        }
+        self.eligibility = EligibilityIndex.build(
+            [_as_list(v) for v in columns["cpt_codes"]],
+            [_as_list(v) for v in columns["plans"]]
+        )
+        self._rows_by_npi = defaultdict(list)
+        for row, npi in enumerate(self.npis):
+            self._rows_by_npi[str(npi)].append(row)
+        self._grid = self._build_grid()
+
+    def __len__(self) -> int:
+        return len(self.npis)
+
+    def add_providers(self, columns: Dict[str, Sequence[Any]]) -> None:
+        """Append provider rows without rebuilding the existing grid or eligibility index."""
+        start = len(self)
+        count = len(columns["npi"])
+        self.npis = np.concatenate([self.npis, np.asarray([str(npi) for npi in columns["npi"]], dtype=str)])
+        self.lats = np.concatenate([self.lats, np.asarray(columns["lat"], dtype=np.float32)])
+        self.lngs = np.concatenate([self.lngs, np.asarray(columns["lng"], dtype=np.float32)])
+        for field in CONTACT_FIELDS:
+            values = np.asarray(columns.get(field, [None] * count), dtype=object)
+            self.contacts[field] = np.concatenate([self.contacts[field], values])
+        for offset in range(count):
+            row = start + offset
+            self.eligibility.add(row, _as_list(columns["cpt_codes"][offset]), _as_list(columns["plans"][offset]))
+            self._rows_by_npi[str(self.npis[row])].append(row)
+            cell = (int(self._cell(self.lats[row])), int(self._cell(self.lngs[row])))
+            self._grid[cell] = np.append(self._grid.get(cell, np.empty(0, dtype=np.int64)), row)
+
+    def remove_provider(self, npi: str) -> int:
+        """
+        Remove every location of a provider from search results.
+
+        :return: The number of rows removed.
+        """
+        rows = self._rows_by_npi.pop(str(npi), [])
+        for row in rows:
+            self.eligibility.remove(row)
+        return len(rows)
+
+    def search(
+        self,
+        cpt_codes: Optional[List[str]],
+        lat: Optional[float],
+        lng: Optional[float],
+        radius_in_meters: float,
+        plan: Optional[str],
+        skip: Optional[int],
+        limit: Optional[int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer a provider search with the same contract as the gap exception service /v1/search.
+
+        :return: The matching providers ordered by distance when lat/lng is provided.
+        """
+        eligible = self.eligibility.match(cpt_codes, plan, self.match_all_cpt_codes)
+        distances = None
+        if lat is None or lng is None:
+            rows = eligible
+        else:
+            rows = np.intersect1d(self._candidate_rows(lat, lng, radius_in_meters), eligible, assume_unique=True)
+            distances = haversine_meters(lat, lng, self.lats[rows], self.lngs[rows])
+            within = distances <= radius_in_meters
+            rows, distances = rows[within], distances[within]
+
+        start = skip or 0
+        end = start + limit if limit is not None else None
+        if distances is not None:
+            if end is not None and end < len(rows):
+                top = np.argpartition(distances, end - 1)[:end]
+                rows, distances = rows[top], distances[top]
+            order = np.argsort(distances, kind="stable")
+            rows, distances = rows[order], distances[order]
+        page = rows[start:end]
+        page_distances = distances[start:end] if distances is not None else [None] * len(page)
+        return [
+            self._record(int(row), None if distance is None else float(distance))
+            for row, distance in zip(page, page_distances)
+        ]
+
+    def _build_grid(self) -> Dict[tuple, np.ndarray]:
+        if len(self) == 0:
+            return {}
+        cells = np.stack([self._cell(self.lats), self._cell(self.lngs)], axis=1)
+        unique_cells, inverse = np.unique(cells, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse))[:-1]
+        return {
+            (int(cell_lat), int(cell_lng)): rows
+            for (cell_lat, cell_lng), rows in zip(unique_cells, np.split(order, bounds))
+        }
+
+    def _cell(self, degrees) -> np.ndarray:
+        return np.floor(np.asarray(degrees, dtype=np.float64) / self.cell_degrees).astype(np.int64)
+
+    def _candidate_rows(self, lat: float, lng: float, radius_in_meters: float) -> np.ndarray:
+        """Collect the row ids of every grid cell overlapping the bounding box of the search circle."""
+        lat_span = radius_in_meters / METERS_PER_DEGREE_LAT
+        lng_span = radius_in_meters / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        lat_cells = range(int(self._cell(lat - lat_span)), int(self._cell(lat + lat_span)) + 1)
+        lng_cells = range(int(self._cell(lng - lng_span)), int(self._cell(lng + lng_span)) + 1)
+        if len(lat_cells) * len(lng_cells) > len(self._grid):
+            return np.arange(len(self), dtype=np.int64)
+        buckets = [
+            self._grid[(cell_lat, cell_lng)]
+            for cell_lat in lat_cells
+            for cell_lng in lng_cells
+            if (cell_lat, cell_lng) in self._grid
+        ]
+        return np.concatenate(buckets) if buckets else np.empty(0, dtype=np.int64)
+
+    def _record(self, row: int, distance_in_meters: Optional[float]) -> Dict[str, Any]:
+        record = {
+            "npi": str(self.npis[row]),
+            "lat": float(self.lats[row]),
+            "lng": float(self.lngs[row]),
+        }
+        record.update({field: values[row] for field, values in self.contacts.items()})
+        if distance_in_meters is not None:
+            record["distance_in_meters"] = round(distance_in_meters, 1)
+        return record
+
+
+def load_provider_index(path: str, cell_degrees: float, match_all_cpt_codes: bool = False) -> ProviderIndex:
+    """
+    Load a provider snapshot from a CSV, Parquet or Arrow IPC file.
+
+    The snapshot must have npi, lat, lng, cpt_codes and plans columns plus the optional contact
+    columns name, specialty, address, phone and web_url. Parquet and Arrow need pyarrow installed.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        columns = {key: [row[key] for row in rows] for key in (rows[0].keys() if rows else [])}
+    elif suffix in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        columns = pq.read_table(path).to_pydict()
+    elif suffix in (".arrow", ".feather", ".ipc"):
+        import pyarrow.feather as feather
+        columns = feather.read_table(path).to_pydict()
+    else:
+        raise ValueError(f"Unsupported provider snapshot format: {path}")
+    if not columns:
+        columns = {"npi": [], "lat": [], "lng": [], "cpt_codes": [], "plans": []}
+    return ProviderIndex(columns, cell_degrees=cell_degrees, match_all_cpt_codes=match_all_cpt_codes)
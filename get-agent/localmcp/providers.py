@@ -0,0 +1,150 @@
+import math
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+
+import ijson
+import numpy as np
+
+from geo import METERS_PER_MILE, haversine_meters
+
+DISTANCE_FIELDS = ("distance_in_miles", "distance", "distance_in_meters")
+COORDINATE_FIELDS = ("lat", "lng")
+# The default for the provider_output_fields setting: the fields SYSTEM_PROMPT in app/agent.py asks the
+# model to report, plus the NPI used to dedupe locations.
+OUTPUT_FIELDS = ("npi", "name", "specialty", "address", "phone", "web_url")
+
+
+class AsyncByteReader:
+    """Adapt an async iterator of byte chunks to the async file interface ijson reads from."""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            # ijson probes with read(0) to detect bytes vs str input.
+            return b""
+        try:
+            return await self._chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+
+
+def project_provider(provider: Dict[str, Any], output_fields: Sequence[str] = OUTPUT_FIELDS) -> Dict[str, Any]:
+    """
+    Keep only output_fields, plus the distance and coordinates ranking needs, dropping the rest of the record.
+
+    A record with none of output_fields is returned whole, since its fields are named differently from
+    what the projection expects and projecting it would leave the model nothing to report.
+    """
+    projected = {field: provider[field] for field in output_fields if field in provider}
+    if not projected:
+        return dict(provider)
+    for field in DISTANCE_FIELDS + COORDINATE_FIELDS:
+        if field in provider:
+            projected[field] = provider[field]
+    return projected
+
+
+async def stream_providers(
+    chunks: AsyncIterator[bytes],
+    results_field: Optional[str],
+    limit: Optional[int],
+    output_fields: Sequence[str] = OUTPUT_FIELDS
+) -> List[Dict[str, Any]]:
+    """
+    Incrementally parse provider records from a /v1/search response body.
+
+    :param chunks: The response body as it arrives from the network.
+    :param results_field: The field holding the provider list, or None when the body is the list itself.
+    :param limit: Stop reading once this many providers are collected.
+    :param output_fields: The fields to keep, see project_provider.
+    :return: The projected providers.
+    """
+    providers: List[Dict[str, Any]] = []
+    if limit is not None and limit <= 0:
+        return providers
+    prefix = "item" if results_field is None else f"{results_field}.item"
+    async for provider in ijson.items_async(AsyncByteReader(chunks), prefix, use_float=True):
+        providers.append(project_provider(provider, output_fields))
+        if limit is not None and len(providers) >= limit:
+            break
+    return providers
+
+
+def provider_distance(provider: Dict[str, Any]) -> float:
+    """The provider's distance in miles, taking a unit-less distance to be in miles as the prompt asks for."""
+    if provider.get("distance_in_miles") is not None:
+        return float(provider["distance_in_miles"])
+    if provider.get("distance") is not None:
+        return float(provider["distance"])
+    if provider.get("distance_in_meters") is not None:
+        return float(provider["distance_in_meters"]) / METERS_PER_MILE
+    return math.inf
+
+
+def set_distance_in_miles(provider: Dict[str, Any], miles: float) -> None:
+    """Replace whatever distance fields the provider has with distance_in_miles."""
+    for field in DISTANCE_FIELDS:
+        provider.pop(field, None)
+    provider["distance_in_miles"] = round(float(miles), 2)
+
+
+def provider_key(provider: Dict[str, Any]) -> tuple:
+    """Identify a provider location by NPI plus coordinates, or NPI plus address when coordinates are missing."""
+    if provider.get("lat") is not None and provider.get("lng") is not None:
+        return provider.get("npi"), provider["lat"], provider["lng"]
+    return provider.get("npi"), provider.get("address")
+
+
+def merge_providers(shards: Iterable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Merge provider lists from several searches, keeping the closest copy of each provider location."""
+    merged: Dict[tuple, Dict[str, Any]] = {}
+    for providers in shards:
+        for provider in providers:
+            key = provider_key(provider)
+            current = merged.get(key)
+            if current is None or provider_distance(provider) < provider_distance(current):
+                merged[key] = provider
+    return list(merged.values())
+
+
+def rank_providers(
+    providers: List[Dict[str, Any]],
+    lat: Optional[float],
+    lng: Optional[float],
+    skip: Optional[int],
+    limit: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Fill in distance_in_miles from the search location and return the requested page ordered by distance.
+
+    Only the first skip + limit providers are selected with argpartition and sorted, so large candidate
+    sets rank in linear time. Providers without coordinates keep the distance the upstream returned,
+    converted to distance_in_miles.
+    """
+    if lat is not None and lng is not None and providers:
+        lats = np.array([p.get("lat", np.nan) for p in providers], dtype=np.float64)
+        lngs = np.array([p.get("lng", np.nan) for p in providers], dtype=np.float64)
+        miles = haversine_meters(lat, lng, lats, lngs) / METERS_PER_MILE
+        for provider, distance in zip(providers, miles):
+            if not np.isnan(distance):
+                set_distance_in_miles(provider, distance)
+    for provider in providers:
+        distance = provider_distance(provider)
+        if "distance_in_miles" not in provider and distance != math.inf:
+            set_distance_in_miles(provider, distance)
+
+    distances = np.array([provider_distance(p) for p in providers], dtype=np.float64)
+    start = skip or 0
+    end = len(providers) if limit is None else min(len(providers), start + limit)
+    if start >= end:
+        return []
+    if end < len(providers):
+        top = np.argpartition(distances, end - 1)[:end]
+    else:
+        top = np.arange(len(providers))
+    top = top[np.argsort(distances[top], kind="stable")]
+    return [
+        {field: value for field, value in providers[i].items() if field not in COORDINATE_FIELDS}
+        for i in top[start:end]
+    ]
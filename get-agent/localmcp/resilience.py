@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling an unhealthy upstream after consecutive failures.
+
+    After failure_threshold consecutive failures the circuit opens and calls fail fast. Once
+    reset_timeout_seconds has passed a single trial call is let through; its outcome closes the
+    circuit again or re-opens it. Callers must end every call that passed check() with
+    release_trial(), so a trial that ends without an outcome, like a cancelled call, lets the
+    next one through.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_seconds: float, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._clock = clock
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout_seconds:
+            return "half_open"
+        return "open"
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "open": int(self.state == "open"),
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+        }
+
+    def check(self) -> None:
+        """Raise CircuitOpenError when the call should not be attempted."""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit is open after {self.consecutive_failures} consecutive failures")
+        if state == "half_open":
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._trial_in_flight = False
+        if self._opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+
+    def release_trial(self) -> None:
+        """End the call that passed check() without recording an outcome. A no-op after record_*."""
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of call latencies used to pick the hedging delay."""
+
+    def __init__(self, window: int, min_samples: int):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class Hedger:
+    """Send a duplicate request when the first one is slower than the observed p95, keeping the first to finish."""
+
+    def __init__(self, latency: LatencyTracker, clock=time.monotonic):
+        self.latency = latency
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self._clock = clock
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        delay = self.latency.p95()
+        started = self._clock()
+        primary = asyncio.ensure_future(call())
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                winner = primary
+            else:
+                self.hedges_fired += 1
+                hedge = asyncio.ensure_future(call())
+                done, pending = await asyncio.wait({primary, hedge}, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), next(iter(done)))
+                if winner.exception() is not None and pending:
+                    # A failed request only loses if the other one can still succeed.
+                    done, _ = await asyncio.wait(pending)
+                    winner = done.pop()
+                if winner is hedge and winner.exception() is None:
+                    self.hedges_won += 1
+            result = winner.result()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+        self.latency.record(self._clock() - started)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {"hedges_fired": self.hedges_fired, "hedges_won": self.hedges_won}
@@ -0,0 +1,153 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(lat: float, lng: float, precision: int) -> str:
+    """
+    Encode a coordinate as a geohash string.
+
+    :param lat: The latitude to encode.
+    :param lng: The longitude to encode.
+    :param precision: Number of geohash characters. 6 is roughly a 1.2km x 0.6km cell.
+    :return: The geohash of the cell containing the coordinate.
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def make_search_key(
+    cpt_codes: Optional[List[str]],
+    lat: Optional[float],
+    lng: Optional[float],
+    radius_in_meters: Optional[float],
+    plan: Optional[str],
+    skip: Optional[int],
+    limit: Optional[int],
+    geohash_precision: int,
+) -> Tuple[Hashable, ...]:
+    """
+    Build a normalized cache key for a provider search.
+
+    CPT codes are de-duplicated, upper-cased and sorted, the plan is case folded and
+    lat/lng are snapped to a geohash cell so nearby searches share one entry.
+    """
+    codes = tuple(sorted({code.strip().upper() for code in cpt_codes or []}))
+    cell = geohash(lat, lng, geohash_precision) if lat is not None and lng is not None else None
+    normalized_plan = plan.strip().casefold() if plan else None
+    return codes, cell, radius_in_meters, normalized_plan, skip, limit
+
+
+class SearchResultCache:
+    """
+    Bounded TTL + LRU cache for provider search results.
+
+    Expired entries are kept for another stale_ttl_seconds so they can still be served through
+    get_stale when the upstream is unavailable.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float,
+        max_entries: int,
+        max_bytes: int,
+        stale_ttl_seconds: float = 0.0,
+        clock=time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.stale_ttl_seconds = stale_ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.current_bytes = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        now = self._clock()
+        if expires_at <= now:
+            if expires_at + self.stale_ttl_seconds <= now:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key even if expired, as long as it is within the stale window."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, _, value = entry
+        if expires_at + self.stale_ttl_seconds <= self._clock():
+            self._remove(key)
+            return None
+        self.stale_hits += 1
+        return value
+
+    def put(self, key: Hashable, value: str) -> None:
+        """Store value under key, evicting least recently used entries to stay within bounds."""
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (self._clock() + self.ttl_seconds, size, value)
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class _Call:
+    "One in-flight call and the number of callers waiting for it"
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one in-flight call."""
+
+    def __init__(self):
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn once for all concurrent callers sharing key.
+
+        fn runs in its own task, so cancelling one caller, the first one included, does not
+        cancel the call for the others. The call is only cancelled once every caller is gone.
+        Every waiter receives the same result or exception. The key is released as soon as
+        the call completes, so later calls start a fresh request.
+        """
+        call = self._in_flight.get(key)
+        if call is None:
+            call = _Call()
+            self._in_flight[key] = call
+            call.task = asyncio.ensure_future(self._run(key, call, fn))
+        else:
+            self.coalesced += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._release(key, call)
+                call.task.cancel()
+
+    async def _run(self, key: Hashable, call: _Call, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            return await fn()
+        finally:
+            self._release(key, call)
+
+    def _release(self, key: Hashable, call: _Call) -> None:
+        if self._in_flight.get(key) is call:
+            del self._in_flight[key]
@@ -124,3 +124,303 @@ async def test_invoke_handles_exception(monkeypatch):
     assert len(chunks) == 1
     assert "Error occurred while processing your request" in chunks[0]
     assert any("Error during agent invocation" in m for m in logger.messages)
+
+
+@pytest.mark.asyncio
+async def test_invoke_uses_pooled_mcp_session(monkeypatch):
+    """With a session pool, invoke should reuse the pooled session's cached tools instead of a new client."""
+
+    logger = DummyLogger()
+    payload = {"prompt": "Find providers"}
+
+    class FakeAgentCoreContext:
+        @staticmethod
+        def get_context():
+            return object()
+
+    class FakeCtx:
+        def model_dump(self):
+            return {}
+
+    class FakeAgentRequestContext:
+        @staticmethod
+        def from_agent_core_context(_ctx):
+            return FakeCtx()
+
+    monkeypatch.setattr(agent_module, "AgentCoreContext", FakeAgentCoreContext, raising=False)
+    monkeypatch.setattr(agent_module, "AgentRequestContext", FakeAgentRequestContext, raising=False)
+
+    class FakeMcpFactory:
+        async def get_mcp_client(self):
+            raise AssertionError("should not create a new MCP client")
+
+    class FakeSession:
+        tools = ["cached-tool"]
+
+    class FakeSessionPool:
+        async def acquire(self):
+            return FakeSession()
+
+    class FakeAgent:
+        async def stream_async(self, user_input: str):
+            yield {"data": "done"}
+
+    captured = {}
+
+    class FakeAgentFactory:
+        async def create_agent(self, tool_factory, state):
+            captured["tools"] = tool_factory()
+            return FakeAgent()
+
+    chunks = []
+    async for item in agent_module.invoke(
+        mcp_client_factory=FakeMcpFactory(),
+        agent_factory=FakeAgentFactory(),
+        logger=logger,
+        payload=payload,
+        mcp_session_pool=FakeSessionPool(),
+    ):
+        chunks.append(item)
+
+    assert chunks == ["done"]
+    assert captured["tools"] == ["cached-tool"]
+
+
+@pytest.mark.asyncio
+async def test_invoke_bootstraps_memory_and_key_concurrently(monkeypatch):
+    """Memory prefetch, LLM key and MCP session should all be loaded before the agent is built."""
+
+    logger = DummyLogger()
+    payload = {"prompt": "Find providers"}
+
+    class FakeAgentCoreContext:
+        @staticmethod
+        def get_context():
+            return object()
+
+    class FakeCtx:
+        actor_id = "actor-1"
+        session_id = "session-1"
+
+        def model_dump(self):
+            return {}
+
+    class FakeAgentRequestContext:
+        @staticmethod
+        def from_agent_core_context(_ctx):
+            return FakeCtx()
+
+    monkeypatch.setattr(agent_module, "AgentCoreContext", FakeAgentCoreContext, raising=False)
+    monkeypatch.setattr(agent_module, "AgentRequestContext", FakeAgentRequestContext, raising=False)
+
+    loaded = []
+
+    class FakeMcpFactory:
+        async def get_mcp_client(self):
+            loaded.append("tools")
+            return object()
+
+    class FakeKeyRefresher:
+        async def get_key(self):
+            loaded.append("llm_key")
+            return "token"
+
+    class FakeMemoryClient:
+        def begin_request(self):
+            loaded.append("begin")
+
+        async def prefetch(self, actor_id, session_id, query):
+            loaded.append(("memory", actor_id, session_id, query))
+
+    class FakeAgent:
+        async def stream_async(self, user_input: str):
+            yield {"data": "done"}
+
+    class FakeAgentFactory:
+        async def create_agent(self, tool_factory, state):
+            loaded.append("agent")
+            return FakeAgent()
+
+    chunks = []
+    async for item in agent_module.invoke(
+        mcp_client_factory=FakeMcpFactory(),
+        agent_factory=FakeAgentFactory(),
+        logger=logger,
+        payload=payload,
+        llm_key_refresher=FakeKeyRefresher(),
+        memory_client=FakeMemoryClient(),
+    ):
+        chunks.append(item)
+
+    assert chunks == ["done"]
+    assert loaded[0] == "begin"
+    assert loaded[-1] == "agent"
+    assert set(loaded[1:-1]) == {"tools", "llm_key", ("memory", "actor-1", "session-1", "Find providers")}
+
+
+@pytest.mark.asyncio
+async def test_invoke_rejects_invalid_input_before_any_work(monkeypatch):
+    """A prompt failing validation should be answered without touching MCP, memory or the agent."""
+
+    class FailingMcpFactory:
+        async def get_mcp_client(self):
+            raise AssertionError("should not open an MCP client")
+
+    class FailingAgentFactory:
+        async def create_agent(self, tool_factory, state):
+            raise AssertionError("should not build an agent")
+
+    class RejectingValidator:
+        def validate(self, prompt):
+            return "Your question is outside the scope of the provider/gap-exception domain"
+
+    chunks = []
+    async for item in agent_module.invoke(
+        mcp_client_factory=FailingMcpFactory(),
+        agent_factory=FailingAgentFactory(),
+        logger=DummyLogger(),
+        payload={"prompt": "What is the weather today?"},
+        input_validator=RejectingValidator(),
+    ):
+        chunks.append(item)
+
+    assert chunks == ["Your question is outside the scope of the provider/gap-exception domain"]
+
+
+@pytest.mark.asyncio
+async def test_invoke_answers_structured_lookup_from_fast_path(monkeypatch):
+    """A lookup the fast path can extract should be answered by the tool alone, without an agent."""
+
+    class FakeAgentCoreContext:
+        @staticmethod
+        def get_context():
+            return object()
+
+    class FakeAgentRequestContext:
+        @staticmethod
+        def from_agent_core_context(_ctx):
+            return object()
+
+    monkeypatch.setattr(agent_module, "AgentCoreContext", FakeAgentCoreContext, raising=False)
+    monkeypatch.setattr(agent_module, "AgentRequestContext", FakeAgentRequestContext, raising=False)
+
+    class FakeSession:
+        client = object()
+
+    class FakeSessionPool:
+        async def acquire(self):
+            return FakeSession()
+
+    class FakeFastPath:
+        def extract(self, prompt, request_context):
+            return {"cpt_codes": ["D2750"]}
+
+        async def answer(self, mcp_client, arguments):
+            assert mcp_client is FakeSession.client
+            return "1. [Dr A](https://a.example.com)"
+
+    class FailingAgentFactory:
+        async def create_agent(self, tool_factory, state):
+            raise AssertionError("should not build an agent")
+
+    chunks = []
+    async for item in agent_module.invoke(
+        mcp_client_factory=object(),
+        agent_factory=FailingAgentFactory(),
+        logger=DummyLogger(),
+        payload={"prompt": "Find providers for D2750 at 41.9, -87.7"},
+        mcp_session_pool=FakeSessionPool(),
+        fast_path=FakeFastPath(),
+    ):
+        chunks.append(item)
+
+    assert chunks == ["1. [Dr A](https://a.example.com)"]
+
+
+@pytest.mark.asyncio
+async def test_invoke_replays_cached_answer(monkeypatch):
+    """A completed answer should be cached and replayed chunk by chunk for the same question."""
+
+    class FakeAgentCoreContext:
+        @staticmethod
+        def get_context():
+            return object()
+
+    class FakeCtx:
+        actor_id = "actor-1"
+        session_id = "session-1"
+
+        def model_dump(self):
+            return {}
+
+    class FakeAgentRequestContext:
+        @staticmethod
+        def from_agent_core_context(_ctx):
+            return FakeCtx()
+
+    monkeypatch.setattr(agent_module, "AgentCoreContext", FakeAgentCoreContext, raising=False)
+    monkeypatch.setattr(agent_module, "AgentRequestContext", FakeAgentRequestContext, raising=False)
+
+    class FakeMcpFactory:
+        async def get_mcp_client(self):
+            return object()
+
+    class FakeAgent:
+        async def stream_async(self, user_input: str):
+            yield {"data": "part-1"}
+            yield {"data": "part-2"}
+
+    class FakeAgentFactory:
+        def __init__(self):
+            self.created = 0
+
+        async def create_agent(self, tool_factory, state):
+            self.created += 1
+            return FakeAgent()
+
+    class FakeAnswerCache:
+        def __init__(self):
+            self.entries = {}
+
+        def key(self, prompt, request_context):
+            return prompt.lower()
+
+        def get(self, key):
+            return self.entries.get(key)
+
+        def put(self, key, chunks):
+            self.entries[key] = chunks
+
+    class FakeMemoryClient:
+        def __init__(self):
+            self.turns = []
+
+        def begin_request(self):
+            pass
+
+        async def prefetch(self, actor_id, session_id, query):
+            pass
+
+        async def record_turn(self, actor_id, session_id, prompt, answer):
+            self.turns.append((prompt, answer))
+
+    agent_factory = FakeAgentFactory()
+    answer_cache = FakeAnswerCache()
+    memory_client = FakeMemoryClient()
+
+    for prompt in ["Find providers for D2750", "find providers for d2750"]:
+        chunks = []
+        async for item in agent_module.invoke(
+            mcp_client_factory=FakeMcpFactory(),
+            agent_factory=agent_factory,
+            logger=DummyLogger(),
+            payload={"prompt": prompt},
+            memory_client=memory_client,
+            answer_cache=answer_cache,
+        ):
+            chunks.append(item)
+        assert chunks == ["part-1", "part-2"]
+
+    assert agent_factory.created == 1
+    # The agent's turn is saved by the memory hooks; the replayed one is saved by invoke.
+    assert memory_client.turns == [("find providers for d2750", "part-1part-2")]
@@ -0,0 +1,168 @@
+# tests/test_app_agentpool.py
+
+from typing import Any, Dict, List
+
+import pytest
+
+import app.agentpool as agentpool_module
+from app.agentpool import AgentPool
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+class FakeHooks:
+    def __init__(self):
+        self.events: List[Any] = []
+
+    def invoke_callbacks(self, event):
+        self.events.append(event)
+
+
+class FakeConversationManager:
+    def __init__(self):
+        self.removed_message_count = 0
+
+    def get_state(self) -> Dict[str, Any]:
+        return {"removed_message_count": self.removed_message_count}
+
+    def restore_from_session(self, state: Dict[str, Any]):
+        self.removed_message_count = state["removed_message_count"]
+
+
+class FakeMetrics:
+    def __init__(self):
+        self.cycle_count = 0
+
+
+class FakeAgent:
+    def __init__(self, state: Dict[str, Any]):
+        self.state = state
+        self.messages: List[Any] = []
+        self.system_prompt = "base prompt"
+        self.hooks = FakeHooks()
+        self.conversation_manager = FakeConversationManager()
+        self.event_loop_metrics = FakeMetrics()
+
+
+class FakeAgentFactory:
+    def __init__(self):
+        self.created: List[FakeAgent] = []
+
+    async def create_agent(self, tool_factory, state):
+        agent = FakeAgent(state)
+        self.created.append(agent)
+        return agent
+
+
+class FakeInitializedEvent:
+    def __init__(self, agent):
+        self.agent = agent
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(agentpool_module, "AgentState", lambda state: dict(state), raising=False)
+    monkeypatch.setattr(agentpool_module, "AgentInitializedEvent", FakeInitializedEvent, raising=False)
+    monkeypatch.setattr(agentpool_module, "EventLoopMetrics", FakeMetrics, raising=False)
+    return AgentPool(agent_factory=FakeAgentFactory(), logger=DummyLogger(), max_size=2, idle_timeout_seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_released_agent_is_reset_and_reused(pool):
+    owner = object()
+
+    agent = await pool.acquire(tool_factory=list, state={"lat": 1.0}, tools_owner=owner)
+    agent.messages.append({"role": "user"})
+    agent.system_prompt += "\nCustomer context"
+    pool.release(agent)
+
+    reused = await pool.acquire(tool_factory=list, state={"lat": 2.0}, tools_owner=owner)
+
+    assert reused is agent
+    assert reused.messages == []
+    assert reused.system_prompt == "base prompt"
+    assert reused.state == {"lat": 2.0}
+    assert isinstance(reused.hooks.events[-1], FakeInitializedEvent)
+    assert pool.reused == 1
+    assert pool.created == 1
+
+
+@pytest.mark.asyncio
+async def test_reused_agent_starts_with_clean_metrics_and_conversation_manager(pool):
+    owner = object()
+
+    agent = await pool.acquire(tool_factory=list, state={}, tools_owner=owner)
+    agent.event_loop_metrics.cycle_count = 7
+    agent.conversation_manager.removed_message_count = 12
+    pool.release(agent)
+
+    reused = await pool.acquire(tool_factory=list, state={}, tools_owner=owner)
+
+    assert reused is agent
+    assert reused.event_loop_metrics.cycle_count == 0
+    assert reused.conversation_manager.removed_message_count == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_is_retired_after_max_uses(pool):
+    owner = object()
+    pool.max_uses = 2
+
+    agent = await pool.acquire(tool_factory=list, state={}, tools_owner=owner)
+    pool.release(agent)
+    assert await pool.acquire(tool_factory=list, state={}, tools_owner=owner) is agent
+    pool.release(agent)
+
+    assert len(pool) == 0
+    assert await pool.acquire(tool_factory=list, state={}, tools_owner=owner) is not agent
+
+
+@pytest.mark.asyncio
+async def test_agents_from_another_tools_owner_are_kept_for_their_owner(pool):
+    """With several MCP sessions in rotation, an agent waits for its own session's next request."""
+
+    first_owner, second_owner = object(), object()
+    agent = await pool.acquire(tool_factory=list, state={}, tools_owner=first_owner)
+    pool.release(agent)
+
+    other = await pool.acquire(tool_factory=list, state={}, tools_owner=second_owner)
+
+    assert other is not agent
+    assert len(pool) == 1
+    assert await pool.acquire(tool_factory=list, state={}, tools_owner=first_owner) is agent
+
+
+@pytest.mark.asyncio
+async def test_discarded_and_excess_agents_are_not_pooled(pool):
+    owner = object()
+    agents = [await pool.acquire(tool_factory=list, state={}, tools_owner=owner) for _ in range(4)]
+
+    pool.discard(agents[0])
+    for agent in agents[1:]:
+        pool.release(agent)
+
+    assert len(pool) == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_agents_are_evicted(pool):
+    owner = object()
+    agent = await pool.acquire(tool_factory=list, state={}, tools_owner=owner)
+    pool.release(agent)
+    pool.idle_timeout_seconds = -1
+
+    assert await pool.acquire(tool_factory=list, state={}, tools_owner=owner) is not agent
+
+
+@pytest.mark.asyncio
+async def test_prewarm_fills_pool(pool):
+    await pool.prewarm(tool_factory=list, tools_owner=object())
+
+    assert len(pool) == 2
+    assert pool.created == 2
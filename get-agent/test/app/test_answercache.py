@@ -0,0 +1,97 @@
+# tests/test_app_answercache.py
+
+from app.answercache import AnswerCache, prompt_fingerprint
+from app.context import AgentRequestContext
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(clock=None, **kwargs):
+    options = {"ttl_seconds": 60, "max_entries": 10, "max_bytes": 1024, "location_precision_degrees": 0.01}
+    options.update(kwargs)
+    return AnswerCache(clock=clock or FakeClock(), **options)
+
+
+def _context(lat=41.8781, lng=-87.6298, plan="Gold"):
+    return AgentRequestContext(lat=lat, lng=lng, plan=plan)
+
+
+def test_prompt_fingerprint_ignores_case_punctuation_order_and_stopwords():
+    assert prompt_fingerprint("Please find me dentists for D2750!") == prompt_fingerprint("dentists D2750, find")
+    assert prompt_fingerprint("dentists for D2750") != prompt_fingerprint("orthodontists for D2750")
+
+
+def test_prompt_fingerprint_keeps_the_sign_of_numbers():
+    assert prompt_fingerprint("D2750 near 41.88, -87.63") != prompt_fingerprint("D2750 near 41.88, 87.63")
+    assert prompt_fingerprint("D2750 near 41.88,-87.63") == prompt_fingerprint("D2750 near 41.88, -87.63")
+
+
+def test_key_is_none_without_cpt_codes():
+    assert _cache().key("What is a gap exception?", _context()) is None
+
+
+def test_key_groups_nearby_locations_and_plan_case():
+    cache = _cache()
+    key = cache.key("Find providers for D2750", _context())
+
+    assert cache.key("find providers for d2750", _context(lat=41.8782, lng=-87.6297, plan="gold")) == key
+    assert cache.key("Find providers for D2750", _context(lat=42.5)) != key
+    assert cache.key("Find providers for D2750 within 5 miles", _context()) != key
+    assert cache.key("Find providers for D2750", _context(plan="Silver")) != key
+
+
+def test_key_is_scoped_to_actor_and_session_by_default():
+    cache = _cache()
+    prompt = "Find providers for D2750"
+
+    def key(actor_id, session_id):
+        return cache.key(prompt, AgentRequestContext(lat=41.9, lng=-87.7, plan="Gold", actor_id=actor_id, session_id=session_id))
+
+    assert key("a", "s1") == key("a", "s1")
+    assert key("a", "s1") != key("b", "s1")
+    assert key("a", "s1") != key("a", "s2")
+
+
+def test_key_can_be_shared_per_actor_or_across_actors():
+    first = AgentRequestContext(lat=41.9, lng=-87.7, plan="Gold", actor_id="a", session_id="s1")
+    second = AgentRequestContext(lat=41.9, lng=-87.7, plan="Gold", actor_id="a", session_id="s2")
+    third = AgentRequestContext(lat=41.9, lng=-87.7, plan="Gold", actor_id="b", session_id="s3")
+    per_actor = _cache(scope="actor")
+    shared = _cache(scope="shared")
+    prompt = "Find providers for D2750"
+
+    assert per_actor.key(prompt, first) == per_actor.key(prompt, second) != per_actor.key(prompt, third)
+    assert shared.key(prompt, first) == shared.key(prompt, third)
+
+
+def test_get_returns_chunks_until_ttl_expires():
+    clock = FakeClock()
+    cache = _cache(clock=clock)
+    cache.put("k", ["part-1", "part-2"])
+
+    assert cache.get("k") == ["part-1", "part-2"]
+    clock.now = 61
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "entries": 0, "bytes": 0}
+
+
+def test_put_evicts_least_recently_used_within_bounds():
+    cache = _cache(max_entries=2, max_bytes=10)
+    cache.put("a", ["aaaa"])
+    cache.put("b", ["bbbb"])
+    cache.get("a")
+    cache.put("c", ["cccc"])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == ["aaaa"]
+    assert cache.get("c") == ["cccc"]
+
+    cache.put("d", ["d" * 11])
+    assert cache.get("d") is None
+    assert cache.stats()["bytes"] == 8
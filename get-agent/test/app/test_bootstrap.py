@@ -0,0 +1,75 @@
+# tests/test_app_bootstrap.py
+
+import asyncio
+
+import pytest
+
+from app.bootstrap import Bootstrap
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_runs_independent_steps_concurrently():
+    """Independent steps should overlap, and a dependent step should receive their results."""
+
+    started = []
+    release = asyncio.Event()
+
+    async def slow(name):
+        started.append(name)
+        if len(started) == 2:
+            release.set()
+        await release.wait()
+        return name
+
+    bootstrap = Bootstrap()
+    bootstrap.add("tools", lambda: slow("tools"))
+    bootstrap.add("memory", lambda: slow("memory"))
+
+    async def agent(tools, memory):
+        return f"{tools}+{memory}"
+
+    bootstrap.add("agent", agent, depends_on=["tools", "memory"])
+
+    results = await asyncio.wait_for(bootstrap.run(), timeout=1)
+
+    assert sorted(started) == ["memory", "tools"]
+    assert results["agent"] == "tools+memory"
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_cancels_remaining_steps_on_failure():
+    """When one step fails the others should be cancelled and the error raised."""
+
+    cancelled = []
+
+    async def hangs():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("hangs")
+            raise
+
+    async def fails():
+        raise RuntimeError("token endpoint down")
+
+    async def never(_value):
+        raise AssertionError("should not run")
+
+    bootstrap = Bootstrap()
+    bootstrap.add("tools", hangs)
+    bootstrap.add("llm_key", fails)
+    bootstrap.add("agent", never, depends_on=["llm_key"])
+
+    with pytest.raises(RuntimeError, match="token endpoint down"):
+        await asyncio.wait_for(bootstrap.run(), timeout=1)
+    assert cancelled == ["hangs"]
+
+
+def test_bootstrap_rejects_unknown_dependency():
+    bootstrap = Bootstrap()
+
+    async def step(_value):
+        return None
+
+    with pytest.raises(ValueError):
+        bootstrap.add("agent", step, depends_on=["missing"])
@@ -45,7 +45,7 @@ def test_create_llm_key_refresher(monkeypatch):
 
     monkeypatch.setattr(cfg_module, "Oauth2KeyRefresher", FakeRefresher, raising=False)
 
-    refresher = cfg.create_lim_key_refresher(async_client=object(), logger=object())
+    refresher = cfg.create_llm_key_refresher(async_client=object(), logger=object())
     assert isinstance(refresher, FakeRefresher)
     assert captured["client_id"] == cfg.llm_client_id
     assert captured["token_url"] == cfg.llm_token_url
@@ -126,6 +126,16 @@ def test_create_mcp_client_factory(monkeypatch):
     assert captured["key_refresher"] == "REFRESHER"
 
 
+def test_create_mcp_session_pool_passes_retire_grace():
+    cfg = _make_min_config()
+    cfg.mcp_session_retire_grace_seconds = 1200.0
+
+    pool = cfg.create_mcp_session_pool(client_factory=object(), key_refresher=None, logger=object())
+
+    assert pool.retire_grace_seconds == 1200.0
+    assert pool.max_session_age_seconds == cfg.mcp_session_max_age_seconds
+
+
 def test_create_memory_hooks(monkeypatch):
     from app import config as cfg_module
 
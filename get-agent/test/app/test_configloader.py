@@ -0,0 +1,147 @@
+# tests/test_app_configloader.py
+
+import json
+
+import pytest
+
+import app.configloader as configloader_module
+from app.config import GapExceptionEnvSettings
+from app.configloader import ConfigLoader
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+def _config_dict(model_id: str = "model-id"):
+    return {
+        "memory_id": "mem-123",
+        "lim_project_id": "proj-1",
+        "llm_client_id": "client",
+        "llm_client_secret": "secret",
+        "llm_token_url": "https://example.com/token",
+        "llm_scope": "scope",
+        "llm_target_env": "dev",
+        "llm_model_id": model_id,
+        "mcp_url": "https://mcp.example.com",
+    }
+
+
+class FakeParameterStore:
+    def __init__(self, value):
+        self.value = value
+        self.calls = []
+
+    def __call__(self, name, ssm):
+        self.calls.append(name)
+        return self.value
+
+
+def _make_loader(tmp_path, logger=None):
+    return ConfigLoader(
+        env_settings=GapExceptionEnvSettings(env="dev"),
+        ssm_factory=object,
+        logger=logger or DummyLogger(),
+        snapshot_path=str(tmp_path / "config.json"),
+        refresh_interval_seconds=60,
+    )
+
+
+def test_load_writes_snapshot_and_next_start_skips_ssm(monkeypatch, tmp_path):
+    """The first start reads SSM and snapshots it; later starts come up from the snapshot."""
+
+    store = FakeParameterStore(_config_dict())
+    monkeypatch.setattr(configloader_module, "get_json_ssm_parameter", store)
+
+    first = _make_loader(tmp_path).load()
+    second = _make_loader(tmp_path).load()
+
+    assert store.calls == ["/askai/search/gap-exception/dev/config"]
+    assert first.llm_model_id == second.llm_model_id == "model-id"
+
+
+def test_tampered_snapshot_is_ignored(monkeypatch, tmp_path):
+    store = FakeParameterStore(_config_dict())
+    monkeypatch.setattr(configloader_module, "get_json_ssm_parameter", store)
+    _make_loader(tmp_path).load()
+
+    path = tmp_path / "config.json"
+    snapshot = json.loads(path.read_text())
+    snapshot["config"]["llm_model_id"] = "other-model"
+    path.write_text(json.dumps(snapshot))
+
+    logger = DummyLogger()
+    config = _make_loader(tmp_path, logger).load()
+
+    assert config.llm_model_id == "model-id"
+    assert len(store.calls) == 2
+    assert any("Ignoring config snapshot" in m for m in logger.messages)
+
+
+@pytest.mark.asyncio
+async def test_reload_notifies_listeners_only_on_change(monkeypatch, tmp_path):
+    store = FakeParameterStore(_config_dict())
+    monkeypatch.setattr(configloader_module, "get_json_ssm_parameter", store)
+    loader = _make_loader(tmp_path)
+    loader.load()
+    applied = []
+    loader.add_listener(lambda config: applied.append(config.llm_model_id))
+
+    assert await loader.reload() is False
+    store.value = _config_dict("new-model")
+    assert await loader.reload() is True
+
+    assert applied == ["new-model"]
+    assert json.loads((tmp_path / "config.json").read_text())["config"]["llm_model_id"] == "new-model"
+
+
+@pytest.mark.asyncio
+async def test_invalid_parameter_keeps_current_config(monkeypatch, tmp_path):
+    store = FakeParameterStore(_config_dict())
+    monkeypatch.setattr(configloader_module, "get_json_ssm_parameter", store)
+    loader = _make_loader(tmp_path)
+    loader.load()
+    applied = []
+    loader.add_listener(applied.append)
+
+    store.value = {"llm_model_id": "missing-required-fields"}
+    with pytest.raises(Exception):
+        await loader.reload()
+
+    assert applied == []
+    assert json.loads((tmp_path / "config.json").read_text())["config"]["llm_model_id"] == "model-id"
+
+
+@pytest.mark.asyncio
+async def test_failed_apply_is_retried_and_not_snapshotted(monkeypatch, tmp_path):
+    """A listener that fails to apply the new config leaves it to be applied on the next poll."""
+
+    store = FakeParameterStore(_config_dict())
+    monkeypatch.setattr(configloader_module, "get_json_ssm_parameter", store)
+    loader = _make_loader(tmp_path)
+    loader.load()
+    applied = []
+
+    def apply(config):
+        if not applied:
+            applied.append(None)
+            raise RuntimeError("build failed")
+        applied.append(config.llm_model_id)
+
+    loader.add_listener(apply)
+    store.value = _config_dict("new-model")
+
+    with pytest.raises(RuntimeError):
+        await loader.reload()
+    assert json.loads((tmp_path / "config.json").read_text())["config"]["llm_model_id"] == "model-id"
+
+    assert await loader.reload() is True
+    assert applied == [None, "new-model"]
+    assert json.loads((tmp_path / "config.json").read_text())["config"]["llm_model_id"] == "new-model"
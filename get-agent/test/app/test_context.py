@@ -3,7 +3,7 @@
 from typing import Any, Dict
 
 from app.context import AgentRequestContext
-from app.constants import HDR_LAT, HDR_LANG, HDR_PLAN
+from app.constants import HDR_LAT, HDR_LNG, HDR_PLAN
 
 
 class DummyLogger:
@@ -15,13 +15,13 @@ class DummyLogger:
 
 
 def test_from_agent_core_context_reads_headers():
-    """AgentRequestContext should pull lat/lang/plan from AgentCoreContext headers."""
+    """AgentRequestContext should pull lat/lng/plan from AgentCoreContext headers."""
 
     class FakeAgentCoreContext:
         def __init__(self):
             self._values = {
                 HDR_LAT: 41.0,
-                HDR_LANG: -87.0,
+                HDR_LNG: -87.0,
                 HDR_PLAN: "Choice Plus",
             }
 
@@ -32,14 +32,14 @@ def test_from_agent_core_context_reads_headers():
     ctx = AgentRequestContext.from_agent_core_context(src)
 
     assert ctx.lat == 41.0
-    assert ctx.lang == -87.0
+    assert ctx.lng == -87.0
     assert ctx.plan == "Choice Plus"
 
 
 def test_update_event_injects_lat_lang_plan():
-    """update_event should inject lat, lang, plan into tool input if tool schema has those fields."""
+    """update_event should inject lat, lng, plan into tool input if tool schema has those fields."""
     logger = DummyLogger()
-    ctx = AgentRequestContext(lat=41.0, lang=-87.0, plan="Choice Plus")
+    ctx = AgentRequestContext(lat=41.0, lng=-87.0, plan="Choice Plus")
 
     class FakeSelectedTool:
         def __init__(self):
@@ -48,7 +48,7 @@ def test_update_event_injects_lat_lang_plan():
                     "json": {
                         "properties": {
                             "lat": {"type": "number"},
-                            "lang": {"type": "number"},
+                            "lng": {"type": "number"},
                             "plan": {"type": "string"},
                         }
                     }
@@ -65,15 +65,15 @@ def test_update_event_injects_lat_lang_plan():
     ctx.update_event(event, logger)
 
     assert event.tool_use["input"]["lat"] == 41.0
-    assert event.tool_use["input"]["lang"] == -87.0
+    assert event.tool_use["input"]["lng"] == -87.0
     assert event.tool_use["input"]["plan"] == "Choice Plus"
     assert any("Tool input is updated" in m for m in logger.messages)
 
 
 def test_update_event_no_matching_keys():
-    """If tool schema doesn't expose lat/lang/plan, nothing should be injected."""
+    """If tool schema doesn't expose lat/lng/plan, nothing should be injected."""
     logger = DummyLogger()
-    ctx = AgentRequestContext(lat=41.0, lang=-87.0, plan="Choice")
+    ctx = AgentRequestContext(lat=41.0, lng=-87.0, plan="Choice")
 
     class FakeSelectedTool:
         def __init__(self):
@@ -0,0 +1,126 @@
+# tests/test_app_fastpath.py
+
+import json
+
+import pytest
+
+from app.context import AgentRequestContext
+from app.fastpath import FastPath, find_cpt_codes, render_providers
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+def _fast_path():
+    return FastPath(tool_name="gap_exception_service", default_radius_in_meters=16093.44, limit=5, logger=DummyLogger())
+
+
+def _context(lat=None, lng=None, plan=None):
+    return AgentRequestContext(lat=lat, lng=lng, plan=plan)
+
+
+class FakeMcpClient:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None):
+        self.calls.append((name, arguments))
+        return self.result
+
+
+def test_extract_reads_the_sample_prompt():
+    arguments = _fast_path().extract(
+        "Find provider data that can handle CPT code D2750 with latitude 41.9576904 and longitude -87.7469924",
+        _context(),
+    )
+
+    assert arguments == {
+        "cpt_codes": ["D2750"],
+        "lat": 41.9576904,
+        "lng": -87.7469924,
+        "radius_in_meters": 16093.44,
+        "plan": None,
+        "skip": 0,
+        "limit": 5,
+    }
+
+
+def test_extract_takes_location_and_plan_from_headers_and_reads_radius():
+    arguments = _fast_path().extract(
+        "Find dentists for CPT codes D2750 and 99213 within 5 miles", _context(lat=41.0, lng=-87.0, plan="Choice")
+    )
+
+    assert arguments["cpt_codes"] == ["99213", "D2750"]
+    assert (arguments["lat"], arguments["lng"], arguments["plan"]) == (41.0, -87.0, "Choice")
+    assert arguments["radius_in_meters"] == pytest.approx(5 * 1609.344)
+
+
+def test_extract_keeps_the_casing_of_the_plan():
+    arguments = _fast_path().extract(
+        "Find providers for CPT code D2750 at latitude 41.9 and longitude -87.7, plan is Choice Plus", _context()
+    )
+
+    assert arguments["plan"] == "Choice Plus"
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "Find providers for CPT code D2750",
+        "Find providers for CPT code D2750 within 0 miles of latitude 41.9 and longitude -87.7",
+        f"Find providers for CPT code D2750 within {'9' * 400} miles of latitude 41.9 and longitude -87.7",
+        "Find providers for CPT code D2750 near 41.9, -87.7 that speak Spanish",
+        "Compare the two cheapest providers for D2750 at latitude 41.9 and longitude -87.7",
+        "Find providers near zip code 60601 with latitude 41.9 and longitude -87.7",
+    ],
+)
+def test_extract_falls_back_when_ambiguous(prompt):
+    assert _fast_path().extract(prompt, _context()) is None
+
+
+def test_find_cpt_codes_does_not_take_a_zip_code_for_a_procedure_code():
+    assert find_cpt_codes("Find providers near zip code 60601 for D2750")[0] == ["D2750"]
+    assert find_cpt_codes("Find providers for cpt code 99213 near zip code 60601")[0] == ["99213"]
+
+
+@pytest.mark.asyncio
+async def test_answer_calls_tool_and_renders_required_fields():
+    provider = {
+        "name": "Dr A",
+        "specialty": "General Dentistry",
+        "address": "1 Main St",
+        "phone": "555-0100",
+        "web_url": "https://a.example.com",
+        "distance_in_miles": 1.234,
+    }
+    client = FakeMcpClient({"status": "success", "content": [{"text": json.dumps([provider])}]})
+    arguments = _fast_path().extract("Find providers for D2750 at 41.9, -87.7", _context())
+
+    answer = await _fast_path().answer(client, arguments)
+
+    assert client.calls == [("gap_exception_service", arguments)]
+    assert "[Dr A](https://a.example.com)" in answer
+    assert all(part in answer for part in ("General Dentistry", "1 Main St", "555-0100", "1.2 miles"))
+
+
+@pytest.mark.asyncio
+async def test_answer_falls_back_on_tool_error():
+    client = FakeMcpClient({"status": "error", "content": [{"text": "upstream down"}]})
+    arguments = _fast_path().extract("Find providers for D2750 at 41.9, -87.7", _context())
+
+    assert await _fast_path().answer(client, arguments) is None
+
+
+def test_render_providers_reports_empty_result():
+    arguments = {"cpt_codes": ["D2750"], "radius_in_meters": 16093.44}
+
+    assert "could not find any providers" in render_providers([], arguments)
@@ -35,7 +35,7 @@ def test_request_context_injecting_hook_before_invocation(monkeypatch):
 
     class FakeState:
         def get(self):
-            return {"lat": 10.0, "lang": 20.0, "plan": "Choice"}
+            return {"lat": 10.0, "lng": 20.0, "plan": "Choice"}
 
     class FakeAgent:
         def __init__(self):
@@ -48,7 +48,7 @@ def test_request_context_injecting_hook_before_invocation(monkeypatch):
     hook = RequestContextInjectingHook(logger=DummyLogger())
     hook.before_invocation(FakeEvent())
 
-    assert calls["kwargs"] == {"lat": 10.0, "lang": 20.0, "plan": "Choice"}
+    assert calls["kwargs"] == {"lat": 10.0, "lng": 20.0, "plan": "Choice"}
     assert calls["updated"] is True
 
     # restore (optional; pytest will clean anyway)
@@ -67,12 +67,12 @@ def test_request_context_injecting_hook_registers(monkeypatch):
             self.callbacks.append((event_type, callback))
 
     # We don't actually need real BeforeToolCallEvent, just that something is registered
-    from strands import hooks as strands_hooks
+    import app.hook as hook_module
 
     class FakeEventType:
         pass
 
-    monkeypatch.setattr(strands_hooks, "BeforeToolCallEvent", FakeEventType, raising=False)
+    monkeypatch.setattr(hook_module, "BeforeToolCallEvent", FakeEventType, raising=False)
 
     registry = FakeRegistry()
     hook = RequestContextInjectingHook(logger=DummyLogger())
@@ -83,3 +83,28 @@ def test_request_context_injecting_hook_registers(monkeypatch):
     event_type, cb = registry.callbacks[0]
     assert event_type is FakeEventType
     assert callable(cb)
+
+
+def test_tool_call_timing_hook_observes_matching_after_event(monkeypatch):
+    """Each tool call should be timed from its before event to the after event with the same toolUseId."""
+
+    from app import hook as hook_module
+    from app.hook import ToolCallTimingHook
+    from app.metrics import STAGE_SECONDS
+
+    observed = []
+    monkeypatch.setattr(hook_module.metrics, "observe", lambda name, seconds, **labels: observed.append((name, labels)))
+
+    class FakeEvent:
+        def __init__(self, tool_use_id):
+            self.tool_use = {"toolUseId": tool_use_id, "name": "gap_exception_service"}
+
+    hook = ToolCallTimingHook()
+    hook.before_tool_call(FakeEvent("a"))
+    hook.after_tool_call(FakeEvent("b"))
+    hook.after_tool_call(FakeEvent("a"))
+
+    assert observed == [
+        (hook_module.TOOL_CALL_SECONDS, {"tool": "gap_exception_service"}),
+        (STAGE_SECONDS, {"stage": "tool_calls"}),
+    ]
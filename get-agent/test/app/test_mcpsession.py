@@ -0,0 +1,133 @@
+# tests/test_app_mcpsession.py
+
+from typing import Any, Dict, List
+
+import pytest
+
+import app.mcpsession as mcpsession_module
+from app.mcpsession import McpSessionPool
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def exception(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+class FakeTool:
+    def __init__(self, name: str, description: str = ""):
+        self.tool_spec: Dict[str, Any] = {"name": name, "description": description}
+
+
+class FakeClient:
+    def __init__(self, number: int):
+        self.number = number
+        self.stopped = False
+        self.healthy = True
+        self.tools: List[FakeTool] = [FakeTool("gap_exception_service")]
+
+    def stop(self, exc_type, exc_val, exc_tb):
+        self.stopped = True
+
+
+class FakeClientFactory:
+    def __init__(self):
+        self.clients: List[FakeClient] = []
+
+    async def get_mcp_client(self):
+        client = FakeClient(len(self.clients))
+        self.clients.append(client)
+        return client
+
+
+class FakeKeyRefresher:
+    def __init__(self):
+        self.key = "token-1"
+
+    async def get_key(self):
+        return self.key
+
+
+def fake_get_mcp_tools(client: FakeClient):
+    if not client.healthy:
+        raise ConnectionError("session expired")
+    return list(client.tools)
+
+
+@pytest.fixture
+def pool_parts(monkeypatch):
+    monkeypatch.setattr(mcpsession_module, "get_mcp_tools", fake_get_mcp_tools, raising=False)
+    factory = FakeClientFactory()
+    refresher = FakeKeyRefresher()
+    pool = McpSessionPool(
+        client_factory=factory,
+        key_refresher=refresher,
+        logger=DummyLogger(),
+        health_check_interval_seconds=0,
+        retire_grace_seconds=0,
+    )
+    return pool, factory, refresher
+
+
+@pytest.mark.asyncio
+async def test_acquire_reuses_session_and_tools(pool_parts):
+    pool, factory, _ = pool_parts
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+
+    assert first is second
+    assert len(factory.clients) == 1
+    assert [t.tool_spec["name"] for t in first.tools] == ["gap_exception_service"]
+
+
+@pytest.mark.asyncio
+async def test_acquire_rotates_session_when_token_changes(pool_parts):
+    pool, factory, refresher = pool_parts
+
+    first = await pool.acquire()
+    refresher.key = "token-2"
+    second = await pool.acquire()
+
+    assert second is not first
+    assert second.token == "token-2"
+    assert len(factory.clients) == 2
+
+
+@pytest.mark.asyncio
+async def test_health_check_refreshes_changed_tools_and_reconnects_broken_sessions(pool_parts):
+    pool, factory, _ = pool_parts
+
+    session = await pool.acquire()
+    factory.clients[0].tools.append(FakeTool("new_tool"))
+    await pool.health_check()
+
+    refreshed = await pool.acquire()
+    assert refreshed is not session
+    assert refreshed.client is session.client
+    assert refreshed.fingerprint != session.fingerprint
+    assert [t.tool_spec["name"] for t in refreshed.tools] == ["gap_exception_service", "new_tool"]
+    assert len(factory.clients) == 1
+
+    factory.clients[0].healthy = False
+    await pool.health_check()
+
+    assert (await pool.acquire()).client is factory.clients[1]
+
+
+@pytest.mark.asyncio
+async def test_close_stops_sessions(pool_parts):
+    pool, factory, _ = pool_parts
+
+    await pool.acquire()
+    await pool.close()
+
+    assert factory.clients[0].stopped
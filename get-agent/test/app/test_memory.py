@@ -0,0 +1,109 @@
+# tests/test_app_memory.py
+
+import asyncio
+
+import pytest
+
+from app.memory import PrefetchingMemoryClient
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+class FakeMemoryClient:
+    def __init__(self):
+        self.calls = []
+
+    def get_last_k_turns(self, memory_id, actor_id, session_id, k=5, **kwargs):
+        self.calls.append(("get_last_k_turns", actor_id, session_id, k))
+        return [f"turns-{session_id}"]
+
+    def retrieve_memories(self, memory_id, namespace=None, query=None, top_k=3, **kwargs):
+        self.calls.append(("retrieve_memories", namespace, query, top_k))
+        return [f"context-{namespace}"]
+
+    def create_event(self, **kwargs):
+        self.calls.append(("create_event", kwargs))
+        return "event"
+
+
+def make_client(inner, logger=None):
+    return PrefetchingMemoryClient(
+        client_factory=lambda: inner,
+        memory_id="mem-1",
+        number_of_events=20,
+        customer_context_top_k=3,
+        customer_context_namespaces=["ns/{actorId}/preferences"],
+        logger=logger or DummyLogger(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_hook_reads_are_served_from_prefetch():
+    """Reads prefetched in a child task should be served to the request without another round trip."""
+
+    inner = FakeMemoryClient()
+    client = make_client(inner)
+
+    client.begin_request()
+    await asyncio.ensure_future(client.prefetch("actor-1", "session-1", "find a dentist"))
+    assert len(inner.calls) == 2
+
+    turns = client.get_last_k_turns(memory_id="mem-1", actor_id="actor-1", session_id="session-1", k=20)
+    context = client.retrieve_memories(
+        memory_id="mem-1", namespace="ns/actor-1/preferences", query="find a dentist", top_k=3
+    )
+
+    assert turns == ["turns-session-1"]
+    assert context == ["context-ns/actor-1/preferences"]
+    assert len(inner.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_reads_without_prefetch_and_other_calls_go_to_client():
+    inner = FakeMemoryClient()
+    client = make_client(inner)
+
+    client.begin_request()
+    await client.prefetch("actor-1", "session-1", "find a dentist")
+
+    client.get_last_k_turns(memory_id="mem-1", actor_id="actor-1", session_id="other", k=20)
+    assert client.create_event(memory_id="mem-1") == "event"
+    assert [call[0] for call in inner.calls[2:]] == ["get_last_k_turns", "create_event"]
+
+
+@pytest.mark.asyncio
+async def test_prefetch_failure_is_logged_not_raised():
+    class BrokenMemoryClient(FakeMemoryClient):
+        def get_last_k_turns(self, *args, **kwargs):
+            raise RuntimeError("throttled")
+
+    logger = DummyLogger()
+    client = make_client(BrokenMemoryClient(), logger)
+
+    client.begin_request()
+    await client.prefetch("actor-1", "session-1", "find a dentist")
+
+    assert any("Memory prefetch failed" in m for m in logger.messages)
+
+
+@pytest.mark.asyncio
+async def test_record_turn_saves_prompt_and_answer():
+    inner = FakeMemoryClient()
+    client = make_client(inner)
+
+    await client.record_turn("actor-1", "session-1", "find a dentist", "Here are the providers")
+    await client.record_turn(None, "session-1", "find a dentist", "Here are the providers")
+
+    assert inner.calls == [("create_event", {
+        "memory_id": "mem-1",
+        "actor_id": "actor-1",
+        "session_id": "session-1",
+        "messages": [("find a dentist", "USER"), ("Here are the providers", "ASSISTANT")],
+    })]
+
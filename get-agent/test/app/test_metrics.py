@@ -0,0 +1,75 @@
+# tests/test_app_metrics.py
+
+from app.metrics import (
+    STAGE_SECONDS,
+    Histogram,
+    MetricsRegistry,
+    begin_request,
+    end_request,
+    metrics,
+    stage,
+)
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+def test_histogram_counts_values_in_upper_inclusive_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == 2.65
+
+
+def test_render_prometheus_text_with_labels_and_gauges():
+    registry = MetricsRegistry(buckets=(1.0,))
+    registry.describe("stage_seconds", "Stage time.")
+    registry.observe("stage_seconds", 0.5, stage="validation")
+    registry.add_gauges("cache", lambda: {"hits": 3, "enabled": True, "state": "closed"})
+    registry.add_gauges("refresh", lambda: [{"name": "llm", "failures": 1}, {"name": "mcp", "failures": 0}])
+    registry.add_gauges("broken", lambda: 1 / 0)
+
+    assert registry.render().splitlines() == [
+        "# HELP stage_seconds Stage time.",
+        "# TYPE stage_seconds histogram",
+        'stage_seconds_bucket{stage="validation",le="1.0"} 1',
+        'stage_seconds_bucket{stage="validation",le="+Inf"} 1',
+        'stage_seconds_sum{stage="validation"} 0.5',
+        'stage_seconds_count{stage="validation"} 1',
+        "cache_hits 3",
+        "cache_enabled 1",
+        'refresh_failures{name="llm"} 1',
+        'refresh_failures{name="mcp"} 0',
+    ]
+
+
+def test_stage_records_histogram_and_request_timings_logged_with_ids():
+    before = metrics.histogram(STAGE_SECONDS, stage="test_stage")
+    count = before.count if before is not None else 0
+    logger = DummyLogger()
+
+    timings = begin_request()
+    timings.trace_id = "trace-1"
+    timings.session_id = "session-1"
+    with stage("test_stage"):
+        pass
+    with stage("test_stage"):
+        pass
+    end_request(logger)
+
+    assert metrics.histogram(STAGE_SECONDS, stage="test_stage").count == count + 2
+    assert len(logger.messages) == 1
+    assert logger.messages[0].startswith("Request timings trace_id=trace-1 session_id=session-1: test_stage=")
+
+    with stage("test_stage"):
+        pass
+    end_request(logger)
+    assert len(logger.messages) == 1
@@ -0,0 +1,97 @@
+# tests/test_app_outputbatch.py
+
+import asyncio
+
+import pytest
+
+from app.outputbatch import OutputBatcher
+
+
+async def _stream(*chunks, delay=0.0):
+    for chunk in chunks:
+        if delay:
+            await asyncio.sleep(delay)
+        yield chunk
+
+
+async def _collect(stream):
+    return [frame async for frame in stream]
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_is_flushed_alone_and_rest_coalesced_until_boundary():
+    batcher = OutputBatcher(max_bytes=1024, max_delay_seconds=10)
+
+    frames = await _collect(batcher.batch(_stream("Here", " are", " the", " providers.", " 1.", " Dr", " A")))
+
+    assert frames == ["Here", " are the providers.", " 1.", " Dr A"]
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_markdown_line_break():
+    batcher = OutputBatcher(max_bytes=1024, max_delay_seconds=10)
+
+    frames = await _collect(batcher.batch(_stream("#", " Providers", "\n", "- Dr", " A", "\n", "- Dr B")))
+
+    assert frames == ["#", " Providers\n", "- Dr A\n", "- Dr B"]
+
+
+@pytest.mark.asyncio
+async def test_flushes_on_byte_threshold():
+    batcher = OutputBatcher(max_bytes=6, max_delay_seconds=10)
+
+    frames = await _collect(batcher.batch(_stream("a", "bbb", "ccc", "dd", "e")))
+
+    assert frames == ["a", "bbbccc", "dde"]
+
+
+@pytest.mark.asyncio
+async def test_flushes_after_max_delay_when_source_stalls():
+    batcher = OutputBatcher(max_bytes=1024, max_delay_seconds=0.01)
+
+    async def stalling():
+        yield "first"
+        yield " pending"
+        await asyncio.sleep(0.2)
+        yield " late"
+
+    frames = await _collect(batcher.batch(stalling()))
+
+    assert frames == ["first", " pending", " late"]
+
+
+@pytest.mark.asyncio
+async def test_source_error_is_raised_after_flushing_pending_text():
+    batcher = OutputBatcher(max_bytes=1024, max_delay_seconds=10)
+
+    async def failing():
+        yield "first"
+        yield " partial"
+        raise RuntimeError("boom")
+
+    frames = []
+    with pytest.raises(RuntimeError):
+        async for frame in batcher.batch(failing()):
+            frames.append(frame)
+
+    assert frames == ["first", " partial"]
+
+
+@pytest.mark.asyncio
+async def test_closing_the_batch_cancels_the_source():
+    batcher = OutputBatcher(max_bytes=1024, max_delay_seconds=10)
+    closed = asyncio.Event()
+
+    async def endless():
+        try:
+            while True:
+                yield "x"
+                await asyncio.sleep(0)
+        finally:
+            closed.set()
+
+    stream = batcher.batch(endless())
+    assert await stream.__anext__() == "x"
+    await stream.aclose()
+
+    assert closed.is_set()
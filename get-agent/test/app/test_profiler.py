@@ -0,0 +1,100 @@
+# tests/test_app_profiler.py
+
+import json
+import sys
+import time
+
+from app.context import AgentRequestContext
+from app.metrics import RequestTimings
+from app.profiler import RequestProfiler, collapse_stack
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+def _profiler(output_dir, sample_rate=0.0, slow_request_seconds=30.0, max_concurrent=2, random_fraction=lambda: 0.5):
+    return RequestProfiler(
+        output_dir=str(output_dir),
+        sample_rate=sample_rate,
+        slow_request_seconds=slow_request_seconds,
+        interval_seconds=0.001,
+        max_samples=1000,
+        max_concurrent=max_concurrent,
+        logger=DummyLogger(),
+        random_fraction=random_fraction
+    )
+
+
+def _context(profile=None):
+    return AgentRequestContext(lat=None, lng=None, plan=None, profile=profile)
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_collapse_stack_lists_callers_outermost_first():
+    def inner():
+        return collapse_stack(sys._getframe())
+
+    stack = inner()
+
+    assert stack.split(";")[-1].startswith("inner (test_profiler.py:")
+    assert "test_collapse_stack_lists_callers_outermost_first" in stack.split(";")[-2]
+
+
+def test_unrequested_requests_are_not_profiled_without_sample_rate(tmp_path):
+    profiler = _profiler(tmp_path)
+
+    assert profiler.begin(_context()) is None
+    assert _profiler(tmp_path, sample_rate=0.4).begin(_context()) is None
+
+
+def test_requested_profile_is_saved_with_stage_timings(tmp_path):
+    profiler = _profiler(tmp_path)
+    timings = RequestTimings()
+    timings.trace_id = "Root=1-abc/def"
+    timings.stages["validation"] = 0.001
+
+    profile = profiler.begin(_context(profile=True))
+    _busy(0.05)
+    path = profiler.end(profile, timings)
+
+    assert path is not None and path.endswith(".collapsed")
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("_busy" in line for line in lines)
+    details = json.load(open(path[: -len(".collapsed")] + ".json", encoding="utf-8"))
+    assert details["trace_id"] == "Root=1-abc/def"
+    assert details["stage_seconds"] == {"validation": 0.001}
+    assert details["samples"] > 0
+
+
+def test_sampled_profile_is_only_saved_when_slow(tmp_path):
+    fast = _profiler(tmp_path / "fast", sample_rate=1.0)
+    assert fast.end(fast.begin(_context()), RequestTimings()) is None
+    assert not (tmp_path / "fast").exists()
+
+    slow = _profiler(tmp_path / "slow", sample_rate=1.0, slow_request_seconds=0.0)
+    assert slow.end(slow.begin(_context()), RequestTimings()) is not None
+
+
+def test_concurrent_profiles_are_capped(tmp_path):
+    profiler = _profiler(tmp_path, max_concurrent=1)
+
+    first = profiler.begin(_context(profile=True))
+    assert profiler.begin(_context(profile=True)) is None
+    profiler.end(first, RequestTimings())
+    second = profiler.begin(_context(profile=True))
+    assert second is not None
+    profiler.end(second, RequestTimings())
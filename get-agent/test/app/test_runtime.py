@@ -0,0 +1,54 @@
+# tests/test_app_runtime.py
+
+import asyncio
+
+import pytest
+
+from app.runtime import RuntimeHolder
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+class FakeRuntime:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_swap_serves_new_runtime_and_retires_old_after_grace():
+    old = FakeRuntime("old")
+    new = FakeRuntime("new")
+    holder = RuntimeHolder(build=lambda: old, logger=DummyLogger(), retire_grace_seconds=0.01)
+
+    in_flight = holder.get()
+    holder.swap(new)
+
+    assert holder.current is new
+    assert in_flight is old and not old.closed
+    await asyncio.sleep(0.05)
+    assert old.closed
+    assert not new.closed
+
+
+def test_runtime_is_built_once_on_first_use():
+    built = []
+
+    def build():
+        built.append(FakeRuntime("first"))
+        return built[-1]
+
+    holder = RuntimeHolder(build=build, logger=DummyLogger(), retire_grace_seconds=0.01)
+
+    assert holder.current is None
+    assert holder.get() is holder.get()
+    assert len(built) == 1
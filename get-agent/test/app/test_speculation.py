@@ -0,0 +1,165 @@
+# tests/test_app_speculation.py
+
+import asyncio
+import json
+
+import pytest
+
+import app.speculation as speculation_module
+from app.context import AgentRequestContext
+from app.speculation import SearchSpeculator, end_speculation, serve_speculative_search
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+class FakeMcpClient:
+    def __init__(self, status="success", providers=None):
+        self.status = status
+        self.providers = providers or []
+        self.calls = []
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None):
+        self.calls.append((name, arguments))
+        return {"toolUseId": tool_use_id, "status": self.status, "content": [{"text": json.dumps(self.providers)}]}
+
+
+class FakeTool:
+    tool_name = "gap_exception_service"
+    tool_spec = {"name": "gap_exception_service"}
+    tool_type = "mcp"
+
+    def __init__(self):
+        self.called = False
+
+    async def stream(self, tool_use, invocation_state, **kwargs):
+        self.called = True
+        yield {"toolUseId": tool_use["toolUseId"], "status": "success", "content": [{"text": "live"}]}
+
+
+class FakeEvent:
+    def __init__(self, tool_input):
+        self.selected_tool = FakeTool()
+        self.tool_use = {"toolUseId": "model-call-1", "name": "gap_exception_service", "input": tool_input}
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(speculation_module, "speculation_stats", speculation_module.SpeculationStats())
+
+
+def _speculator():
+    return SearchSpeculator(tool_name="gap_exception_service", radius_in_meters=16093.44, limit=5)
+
+
+def _context():
+    return AgentRequestContext(lat=41.9, lng=-87.7, plan="Choice")
+
+
+def _model_input(**overrides):
+    tool_input = {
+        "cpt_codes": ["d2750"], "lat": 41.9, "lng": -87.7, "radius_in_meters": 16093.44,
+        "plan": "choice", "skip": None, "limit": 5,
+    }
+    tool_input.update(overrides)
+    return tool_input
+
+
+async def _run_tool(tool, tool_use):
+    return [event async for event in tool.stream(tool_use, {})]
+
+
+@pytest.mark.asyncio
+async def test_matching_tool_call_is_served_from_speculative_search():
+    client = FakeMcpClient()
+    speculation = _speculator().begin("Which dentists near me do D2750 and are open late?", _context())
+    speculation.launch(client)
+
+    event = FakeEvent(_model_input())
+    original = event.selected_tool
+    serve_speculative_search(event, DummyLogger())
+    events = await _run_tool(event.selected_tool, event.tool_use)
+    end_speculation()
+
+    assert len(client.calls) == 1
+    assert not original.called
+    assert events[-1]["tool_result"]["toolUseId"] == "model-call-1"
+    assert speculation_module.speculation_stats.stats()["hit_rate"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_mismatching_tool_call_discards_speculative_search():
+    speculation = _speculator().begin("Which dentists near me do D2750?", _context())
+    speculation.launch(FakeMcpClient())
+
+    event = FakeEvent(_model_input(radius_in_meters=50000.0))
+    original = event.selected_tool
+    serve_speculative_search(event, DummyLogger())
+    end_speculation()
+    await asyncio.sleep(0)
+
+    assert event.selected_tool is original
+    assert speculation.future.cancelled()
+    assert speculation_module.speculation_stats.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_narrower_tool_call_is_served_from_the_wider_speculative_search():
+    """A smaller radius and page than the prefetch are cut from it rather than searched again."""
+
+    providers = [{"npi": str(n), "distance_in_miles": float(n)} for n in range(1, 6)]
+    client = FakeMcpClient(providers=providers)
+    speculation = _speculator().begin("Which dentists near me do D2750?", _context())
+    speculation.launch(client)
+
+    event = FakeEvent(_model_input(radius_in_meters=3.5 * 1609.344, skip=1, limit=2))
+    original = event.selected_tool
+    serve_speculative_search(event, DummyLogger())
+    events = await _run_tool(event.selected_tool, event.tool_use)
+    end_speculation()
+
+    assert not original.called
+    assert json.loads(events[-1]["tool_result"]["content"][0]["text"]) == providers[1:3]
+    assert speculation_module.speculation_stats.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_page_beyond_the_speculative_search_is_a_miss():
+    speculation = _speculator().begin("Which dentists near me do D2750?", _context())
+    speculation.launch(FakeMcpClient())
+
+    event = FakeEvent(_model_input(skip=5, limit=5))
+    serve_speculative_search(event, DummyLogger())
+    end_speculation()
+
+    assert speculation_module.speculation_stats.stats()["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_speculative_search_falls_back_to_the_tool():
+    speculation = _speculator().begin("Which dentists near me do D2750?", _context())
+    speculation.launch(FakeMcpClient(status="error"))
+
+    event = FakeEvent(_model_input())
+    original = event.selected_tool
+    serve_speculative_search(event, DummyLogger())
+    events = await _run_tool(event.selected_tool, event.tool_use)
+    end_speculation()
+
+    assert original.called
+    assert events[-1]["content"] == [{"text": "live"}]
+    assert speculation_module.speculation_stats.stats()["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_no_speculation_without_headers_or_codes():
+    assert _speculator().begin("Which dentists near me?", _context()) is None
+    assert _speculator().begin("D2750 please", AgentRequestContext(lat=None, lng=None, plan=None)) is None
+    end_speculation()
+
+    assert speculation_module.speculation_stats.stats()["started"] == 0
@@ -0,0 +1,50 @@
+# tests/test_app_startup.py
+
+from app.startup import StartupTimer, lazy_import, startup_timer
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+def test_startup_timer_reports_slowest_phase_first():
+    clock = [0.0]
+    timer = StartupTimer(clock=lambda: clock[0])
+    logger = DummyLogger()
+
+    with timer.phase("load config"):
+        clock[0] += 0.5
+    with timer.phase("import litellm"):
+        clock[0] += 2.0
+    timer.report(logger)
+
+    report = logger.messages[0]
+    assert "(2.500s)" in report
+    assert report.index("import litellm") < report.index("load config")
+    assert timer.phases == []
+
+
+def test_startup_timer_records_measured_phases():
+    timer = StartupTimer()
+    logger = DummyLogger()
+
+    timer.record("import strands", 0.75)
+    timer.report(logger)
+
+    assert "0.750s  import strands" in logger.messages[0]
+
+
+def test_lazy_import_binds_on_first_use_and_keeps_bound_names():
+    namespace = {"patched": "fake"}
+
+    dumps = lazy_import(namespace, "dumps", "json")
+    module = lazy_import(namespace, "json", "json")
+
+    assert namespace["dumps"] is dumps
+    assert module.dumps is dumps
+    assert lazy_import(namespace, "patched", "json", "dumps") == "fake"
+    assert any(name == "import json" for name, _ in startup_timer.phases)
@@ -0,0 +1,226 @@
+# tests/test_app_tokenrefresh.py
+
+import asyncio
+import base64
+import json
+
+import pytest
+
+from app.tokenrefresh import KeyRefreshScheduler, OAuth2TokenRequest, ScheduledKeyRefresher, token_lifetime_seconds
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+def make_jwt(exp: float) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return f"header.{payload}.signature"
+
+
+class FakeOauth2KeyRefresher:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.release = None
+
+    async def refresh_key(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail:
+            raise RuntimeError("token endpoint unavailable")
+        return f"token-{self.calls}"
+
+
+def make_refresher(inner, clock, logger=None):
+    return ScheduledKeyRefresher(
+        name="llm",
+        refresher=inner,
+        logger=logger or DummyLogger(),
+        refresh_fraction=0.8,
+        jitter_fraction=0.0,
+        default_lifetime_seconds=100.0,
+        retry_seconds=5.0,
+        clock=lambda: clock[0],
+    )
+
+
+def test_token_lifetime_reads_jwt_exp():
+    assert token_lifetime_seconds(make_jwt(1300), now=1000) == 300
+    assert token_lifetime_seconds("opaque-token", now=1000) is None
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_call():
+    """Requests arriving while the token is fetched should all wait on the same token endpoint call."""
+
+    inner = FakeOauth2KeyRefresher()
+    inner.release = asyncio.Event()
+    refresher = make_refresher(inner, [0.0])
+
+    waiters = [asyncio.ensure_future(refresher.get_key()) for _ in range(5)]
+    await asyncio.sleep(0)
+    inner.release.set()
+
+    assert await asyncio.gather(*waiters) == ["token-1"] * 5
+    assert inner.calls == 1
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_last_good_token_is_served_while_refresh_runs_or_fails():
+    """Before expiry requests never wait on the token endpoint, even when a refresh is failing."""
+
+    clock = [0.0]
+    logger = DummyLogger()
+    inner = FakeOauth2KeyRefresher()
+    refresher = make_refresher(inner, clock, logger)
+
+    assert await refresher.get_key() == "token-1"
+    clock[0] = 85.0
+    assert refresher.next_refresh_delay() == 0.0
+
+    inner.fail = True
+    inner.release = asyncio.Event()
+    background = asyncio.ensure_future(refresher.refresh())
+    await asyncio.sleep(0)
+
+    assert await refresher.get_key() == "token-1"
+    inner.release.set()
+    with pytest.raises(RuntimeError):
+        await background
+
+    assert await refresher.get_key() == "token-1"
+    assert refresher.failures == 1
+    assert refresher.next_refresh_delay() == 5.0
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_scheduled_at_fraction_of_lifetime():
+    clock = [0.0]
+    refresher = make_refresher(FakeOauth2KeyRefresher(), clock)
+
+    await refresher.get_key()
+    clock[0] = 30.0
+
+    assert refresher.next_refresh_delay() == pytest.approx(50.0)
+    assert refresher.stats()["expires_in_seconds"] == pytest.approx(70.0)
+    await refresher.close()
+
+
+class CachingKeyRefresher:
+    """Serves one cached token until told it has expired, as Oauth2KeyRefresher.get_key does."""
+
+    def __init__(self):
+        self.token = "cached-1"
+
+    async def get_key(self):
+        return self.token
+
+
+@pytest.mark.asyncio
+async def test_unchanged_token_is_a_failed_refresh_and_retried():
+    """A renewal that hands back the token being replaced must not reset its lifetime."""
+
+    clock = [0.0]
+    refresher = make_refresher(CachingKeyRefresher(), clock)
+
+    assert await refresher.get_key() == "cached-1"
+    clock[0] = 85.0
+    with pytest.raises(RuntimeError):
+        await refresher.refresh()
+
+    assert refresher.failures == 1
+    assert refresher.next_refresh_delay() == 5.0
+    assert refresher.stats()["expires_in_seconds"] == pytest.approx(15.0)
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_request_token_renews_ahead_of_the_wrapped_refresher():
+    clock = [0.0]
+    inner = CachingKeyRefresher()
+    tokens = iter(["fresh-1", "fresh-2"])
+
+    async def request_token():
+        return next(tokens)
+
+    refresher = ScheduledKeyRefresher(
+        name="llm", refresher=inner, logger=DummyLogger(), request_token=request_token,
+        jitter_fraction=0.0, default_lifetime_seconds=100.0, clock=lambda: clock[0],
+    )
+
+    assert await refresher.get_key() == "fresh-1"
+    clock[0] = 85.0
+    assert await refresher.refresh() == "fresh-2"
+    assert refresher.refreshes == 2
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_expired_token_falls_back_to_the_wrapped_refresher():
+    clock = [0.0]
+    inner = CachingKeyRefresher()
+    fail = [False]
+
+    async def request_token():
+        if fail[0]:
+            raise RuntimeError("token endpoint unavailable")
+        return "fresh-1"
+
+    refresher = ScheduledKeyRefresher(
+        name="llm", refresher=inner, logger=DummyLogger(), request_token=request_token,
+        jitter_fraction=0.0, default_lifetime_seconds=100.0, retry_seconds=5.0, clock=lambda: clock[0],
+    )
+
+    assert await refresher.get_key() == "fresh-1"
+    clock[0] = 150.0
+    fail[0] = True
+    inner.token = "cached-2"
+    assert await refresher.get_key() == "cached-2"
+    assert refresher.failures == 1
+    assert refresher.next_refresh_delay() == 5.0
+    await refresher.close()
+
+
+@pytest.mark.asyncio
+async def test_oauth2_token_request_posts_client_credentials():
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"access_token": "new-token", "expires_in": 3600}
+
+    class FakeClient:
+        def __init__(self):
+            self.posts = []
+
+        async def post(self, url, data):
+            self.posts.append((url, data))
+            return FakeResponse()
+
+    client = FakeClient()
+    request = OAuth2TokenRequest("https://example.com/token", "client", "secret", "scope", client)
+
+    assert await request() == "new-token"
+    assert client.posts == [("https://example.com/token", {
+        "grant_type": "client_credentials", "client_id": "client", "client_secret": "secret", "scope": "scope",
+    })]
+
+
+def test_scheduler_skips_missing_refreshers():
+    scheduler = KeyRefreshScheduler(logger=DummyLogger())
+
+    assert scheduler.schedule("mcp", None) is None
+    assert isinstance(scheduler.schedule("llm", FakeOauth2KeyRefresher()), ScheduledKeyRefresher)
+    assert [stats["name"] for stats in scheduler.stats()] == ["llm"]
@@ -0,0 +1,158 @@
+# tests/test_app_warmup.py
+
+import pytest
+
+from app.warmup import WarmUp
+
+
+class DummyLogger:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+    def warning(self, msg: str, *args, **kwargs):
+        self.messages.append(msg)
+
+
+class FakeRefresher:
+    def __init__(self, events):
+        self.events = events
+
+    async def get_key(self):
+        self.events.append("key")
+        return "token"
+
+
+class FakeScheduler:
+    def __init__(self, events):
+        self.refreshers = [FakeRefresher(events), FakeRefresher(events)]
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+
+class FakeMcpClient:
+    def __init__(self, events):
+        self.events = events
+
+    async def call_tool_async(self, tool_use_id, name, arguments=None):
+        self.events.append(("tool", name, arguments))
+
+
+class FakeSession:
+    def __init__(self, events):
+        self.client = FakeMcpClient(events)
+        self.tools = ["gap_exception_service"]
+
+
+class FakeSessionPool:
+    def __init__(self, events, fail=False):
+        self.events = events
+        self.fail = fail
+
+    async def acquire(self):
+        if self.fail:
+            raise RuntimeError("mcp handshake failed")
+        self.events.append("session")
+        return FakeSession(self.events)
+
+
+class FakeAgentPool:
+    def __init__(self, events):
+        self.events = events
+
+    async def prewarm(self, tool_factory, tools_owner):
+        self.events.append(("agents", tool_factory()))
+
+
+class FakeModel:
+    def __init__(self, events):
+        self.events = events
+
+    async def stream(self, messages):
+        self.events.append("completion")
+        yield {"contentBlockDelta": {"delta": {"text": "OK"}}}
+
+
+class FakeMemoryClient:
+    def __init__(self, events):
+        self.events = events
+
+    @property
+    def client(self):
+        self.events.append("memory")
+        return object()
+
+
+class FakeRuntime:
+    def __init__(self, events, fail_mcp=False):
+        self.key_refresh_scheduler = FakeScheduler(events)
+        self.mcp_session_pool = FakeSessionPool(events, fail=fail_mcp)
+        self.agent_pool = FakeAgentPool(events)
+        self.memory_client = FakeMemoryClient(events)
+        self.model = FakeModel(events)
+
+
+class FakeHolder:
+    def __init__(self, runtime):
+        self.runtime = runtime
+
+    def get(self):
+        return self.runtime
+
+
+@pytest.mark.asyncio
+async def test_warm_up_warms_everything_and_reports_ready():
+    events = []
+    runtime = FakeRuntime(events)
+    warm_up = WarmUp(
+        logger=DummyLogger(),
+        timeout_seconds=5,
+        tool_name="gap_exception_service",
+        tool_arguments={"cpt_codes": ["D1110"], "limit": 1},
+        llm_completion=True,
+    )
+
+    assert warm_up.ping_status() == "HealthyBusy"
+    await warm_up.run(FakeHolder(runtime))
+
+    assert warm_up.ping_status() is None
+    assert runtime.key_refresh_scheduler.started
+    assert events.count("key") == 2
+    assert all(step in events for step in ("session", "memory", "completion"))
+    assert ("agents", ["gap_exception_service"]) in events
+    assert ("tool", "gap_exception_service", {"cpt_codes": ["D1110"], "limit": 1}) in events
+    assert events.index(("agents", ["gap_exception_service"])) < events.index("completion")
+
+
+@pytest.mark.asyncio
+async def test_failed_step_does_not_stop_the_rest():
+    events = []
+    logger = DummyLogger()
+    warm_up = WarmUp(logger=logger, timeout_seconds=5)
+
+    await warm_up.run(FakeHolder(FakeRuntime(events, fail_mcp=True)))
+
+    assert warm_up.ready
+    assert warm_up.failed_steps == ["open mcp session"]
+    assert "memory" in events and events.count("key") == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_warm_up_times_out_and_reports_ready():
+    class SlowHolder:
+        def get(self):
+            import time
+            time.sleep(0.2)
+            return FakeRuntime([])
+
+    logger = DummyLogger()
+    warm_up = WarmUp(logger=logger, timeout_seconds=0.05)
+
+    await warm_up.run(SlowHolder())
+
+    assert warm_up.ready
+    assert any("did not finish" in m for m in logger.messages)
@@ -0,0 +1,67 @@
+# tests/test_bench_fakeservices.py
+
+import json
+
+from starlette.testclient import TestClient
+
+from bench.fakeservices import FakeChatModel, FakeSearchService, arguments_from_prompt
+
+
+def _events(response):
+    events = []
+    for line in response.text.split("\n\n"):
+        if line.startswith("data: ") and line != "data: [DONE]":
+            events.append(json.loads(line[len("data: "):]))
+    return events
+
+
+def test_search_returns_limit_providers_sorted_by_distance_within_radius():
+    client = TestClient(FakeSearchService(latency_seconds=0).app())
+
+    response = client.get("/v1/search", params={"cpt_code": ["D2750"], "radius_in_meters": 8046.72, "limit": 3})
+    providers = response.json()
+
+    assert len(providers) == 3
+    distances = [provider["distance_in_miles"] for provider in providers]
+    assert distances == sorted(distances) and distances[-1] <= 5.0
+    assert {"name", "specialty", "address", "phone", "web_url"} <= set(providers[0])
+
+
+def test_arguments_from_prompt_reads_codes_and_coordinates():
+    arguments = arguments_from_prompt("Find providers for CPT code d2750 with latitude 41.95 and longitude -87.74")
+
+    assert arguments["cpt_codes"] == ["D2750"]
+    assert arguments["lat"] == 41.95
+    assert arguments["lng"] == -87.74
+
+
+def test_model_calls_the_tool_then_streams_the_answer_from_its_result():
+    model = FakeChatModel(tokens_per_second=0, first_token_seconds=0)
+    client = TestClient(model.app())
+    messages = [{"role": "user", "content": "Which providers would you recommend for CPT code D2750?"}]
+
+    first = _events(client.post("/openai/deployments/bench/chat/completions", json={"model": "bench", "messages": messages}))
+    tool_call = first[1]["choices"][0]["delta"]["tool_calls"][0]
+    assert tool_call["function"]["name"] == "gap_exception_service"
+    assert json.loads(tool_call["function"]["arguments"])["cpt_codes"] == ["D2750"]
+    assert first[2]["choices"][0]["finish_reason"] == "tool_calls"
+
+    messages += [
+        {"role": "assistant", "tool_calls": [tool_call]},
+        {"role": "tool", "tool_call_id": tool_call["id"], "content": json.dumps([{"name": "Dr A", "web_url": "https://a"}])},
+    ]
+    second = _events(client.post("/chat/completions", json={"model": "bench", "messages": messages}))
+    text = "".join(event["choices"][0]["delta"].get("content", "") for event in second if event["choices"])
+    assert "**[Dr A](https://a)**" in text
+    assert second[-2]["choices"][0]["finish_reason"] == "stop"
+    assert second[-1]["usage"]["total_tokens"] > 0
+
+
+def test_model_plays_a_custom_script_and_serves_tokens():
+    model = FakeChatModel(tokens_per_second=0, first_token_seconds=0, script=[{"answer": "No tools needed."}])
+    client = TestClient(model.app())
+
+    events = _events(client.post("/chat/completions", json={"messages": [{"role": "user", "content": "hi"}]}))
+
+    assert "".join(event["choices"][0]["delta"].get("content", "") for event in events if event["choices"]) == "No tools needed."
+    assert client.post("/oauth2/token").json()["token_type"] == "Bearer"
@@ -0,0 +1,50 @@
+# tests/test_bench_stats.py
+
+import os
+
+from bench.stats import compare, peak_rss_mb, percentile, summarize
+
+
+def test_percentile_interpolates_between_samples():
+    values = [4.0, 1.0, 3.0, 2.0]
+
+    assert percentile(values, 0.0) == 1.0
+    assert percentile(values, 0.5) == 2.5
+    assert percentile(values, 1.0) == 4.0
+    assert percentile([], 0.5) is None
+
+
+def test_summarize_reports_throughput_and_distributions_in_ms():
+    summary = summarize(
+        [0.1, 0.2, 0.3, 0.4], [0.05, 0.05, 0.06, 0.07], errors=1, duration_seconds=2.0, agent_peak_rss_mb=150.0
+    )
+
+    assert summary["requests"] == 5
+    assert summary["errors"] == 1
+    assert summary["requests_per_second"] == 2.0
+    assert summary["latency_ms"]["p50"] == 250.0
+    assert summary["latency_ms"]["max"] == 400.0
+    assert summary["time_to_first_token_ms"]["p50"] == 55.0
+    assert summary["agent_peak_rss_mb"] == 150.0
+
+
+def test_peak_rss_mb_reads_the_given_process():
+    if not os.path.exists(f"/proc/{os.getpid()}/status"):
+        assert peak_rss_mb(os.getpid()) is None
+        return
+
+    assert peak_rss_mb(os.getpid()) > 0
+    assert peak_rss_mb(2 ** 22 + 1) is None
+
+
+def test_compare_flags_regressions_in_the_worse_direction():
+    baseline = {"summary": {"requests": 100, "requests_per_second": 10.0, "latency_ms": {"p95": 100.0}, "agent_peak_rss_mb": 200.0}}
+    result = {"summary": {"requests": 200, "requests_per_second": 8.0, "latency_ms": {"p95": 90.0}, "agent_peak_rss_mb": 250.0}}
+
+    lines = compare(result, baseline)
+
+    assert lines == [
+        "requests_per_second: 10.0 -> 8.0 (-20.0%)  REGRESSION",
+        "latency_ms.p95: 100.0 -> 90.0 (-10.0%)",
+        "agent_peak_rss_mb: 200.0 -> 250.0 (+25.0%)  REGRESSION",
+    ]
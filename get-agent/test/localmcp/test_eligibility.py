@@ -0,0 +1,52 @@
+# tests/test_eligibility.py
+
+import numpy as np
+
+from eligibility import EligibilityIndex, RowSet
+
+
+def _make_index() -> EligibilityIndex:
+    return EligibilityIndex.build(
+        cpt_codes=[["D2750"], ["D2750", "D1110"], ["D1110"], []],
+        plans=[["Choice"], ["Choice Plus"], ["Choice"], ["Choice"]],
+    )
+
+
+def test_row_set_merges_buffered_changes_in_order():
+    rows = RowSet([9, 0, 3])
+    rows.add(5)
+    rows.remove(3)
+    rows.remove(7)
+    rows.add(7)
+
+    assert rows.rows().tolist() == [0, 5, 7, 9]
+    assert rows.rows().dtype == np.int32
+
+
+def test_match_any_and_all_cpt_codes():
+    index = _make_index()
+
+    assert index.match(["D2750", "d1110"], None).tolist() == [0, 1, 2]
+    assert index.match(["D2750", "D1110"], None, match_all_cpt_codes=True).tolist() == [1]
+    assert index.match(None, None).tolist() == [0, 1, 2, 3]
+    assert index.match(["UNKNOWN"], None).tolist() == []
+
+
+def test_match_intersects_plan():
+    index = _make_index()
+
+    assert index.match(["D2750", "D1110"], " choice ").tolist() == [0, 2]
+    assert index.match(None, "Choice Plus").tolist() == [1]
+
+
+def test_incremental_add_and_remove():
+    index = _make_index()
+
+    index.remove(0)
+    index.add(4, ["D2750"], ["Choice"])
+    index.add(2, ["D2750"], ["Choice"])
+
+    assert index.size == 5
+    assert index.match(["D2750"], "Choice").tolist() == [2, 4]
+    assert index.match(["D1110"], None).tolist() == [1]
+    assert index.match(None, None).tolist() == [1, 2, 3, 4]
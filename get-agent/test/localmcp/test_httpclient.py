@@ -0,0 +1,62 @@
+# tests/test_httpclient.py
+
+import logging
+
+import pytest
+from httpx import PoolTimeout
+
+from httpclient import PoolMetrics, SharedHttpClient
+
+
+def _make_client() -> SharedHttpClient:
+    return SharedHttpClient(
+        max_connections=2,
+        max_keepalive_connections=1,
+        keepalive_expiry_seconds=5.0,
+        http2=False,
+        connect_timeout_seconds=1.0,
+        read_timeout_seconds=2.0,
+        write_timeout_seconds=2.0,
+        pool_timeout_seconds=0.5,
+        logger=logging.getLogger("test"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reference_counted():
+    shared = _make_client()
+
+    first = await shared.open()
+    second = await shared.open()
+    assert first is second
+    assert first.timeout.pool == 0.5
+
+    await shared.close()
+    assert not first.is_closed
+
+    await shared.close()
+    assert first.is_closed
+
+    third = await shared.open()
+    assert third is not first
+    await shared.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_report_saturation():
+    metrics = PoolMetrics(max_connections=1, logger=logging.getLogger("test"))
+
+    async with metrics.track():
+        async with metrics.track():
+            assert metrics.in_flight == 2
+
+    with pytest.raises(PoolTimeout):
+        async with metrics.track():
+            raise PoolTimeout("pool exhausted")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["in_flight"] == 0
+    assert snapshot["peak_in_flight"] == 2
+    assert snapshot["requests"] == 3
+    assert snapshot["saturated_requests"] == 1
+    assert snapshot["pool_timeouts"] == 1
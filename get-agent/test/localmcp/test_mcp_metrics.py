@@ -0,0 +1,42 @@
+# tests/test_mcp_metrics.py
+
+import pytest
+
+from metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value)
+
+    assert histogram.render("search_seconds") == [
+        'search_seconds_bucket{le="0.1"} 1',
+        'search_seconds_bucket{le="1.0"} 2',
+        'search_seconds_bucket{le="+Inf"} 3',
+        "search_seconds_sum 2.55",
+        "search_seconds_count 3",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_registry_times_blocks_and_renders_gauges():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("search_seconds", "Search time.")
+    assert registry.histogram("search_seconds", "Search time.") is histogram
+
+    async with registry.time(histogram):
+        pass
+    with pytest.raises(RuntimeError):
+        async with registry.time(histogram):
+            raise RuntimeError("boom")
+    registry.add_gauges("cache", lambda: {"hits": 2, "open": False, "state": "closed"})
+
+    text = registry.render()
+
+    assert histogram.count == 2
+    assert "# TYPE search_seconds histogram" in text
+    assert "search_seconds_count 2" in text
+    assert "cache_hits 2" in text
+    assert "cache_open 0" in text
+    assert "state" not in text
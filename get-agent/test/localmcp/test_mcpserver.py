@@ -1,36 +1,61 @@
 # tests/test_mcpserver.py
 
-from types import SimpleNamespace
-from typing import Any, Dict, List
+import asyncio
+import json
+from typing import Any, Callable, Dict, List
 
+import httpx
 import pytest
 
 import mcpserver
 
 
-@pytest.mark.asyncio
-async def test_gap_exception_service_builds_url_and_params(monkeypatch):
-    """MCP gap_exception_service should call /v1/search with correct params and return response.text."""
+class FakeStreamResponse:
+    def __init__(self, body: bytes, chunk_size: int = 16):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.raised = False
+
+    def raise_for_status(self):
+        self.raised = True
+
+    async def aiter_bytes(self):
+        for i in range(0, len(self.body), self.chunk_size):
+            yield self.body[i:i + self.chunk_size]
+
+
+class FakeStreamContext:
+    def __init__(self, response: FakeStreamResponse):
+        self.response = response
+
+    async def __aenter__(self):
+        return self.response
+
+    async def __aexit__(self, *exc):
+        return False
 
-    mcpserver.settings = SimpleNamespace(gap_exception_service_url="http://test-service")
 
-    class FakeResponse:
-        def __init__(self, text):
-            self.text = text
-            self.raised = False
+class FakeHttpxClient:
+    def __init__(self, respond: Callable[[Dict[str, Any]], Any]):
+        self.respond = respond
+        self.calls: List[Dict[str, Any]] = []
 
-        def raise_for_status(self):
-            self.raised = True
+    def stream(self, method, url, params):
+        self.calls.append({"method": method, "url": url, "params": params})
+        return FakeStreamContext(FakeStreamResponse(json.dumps(self.respond(params)).encode()))
 
-    class FakeHttpxClient:
-        def __init__(self):
-            self.calls: List[Dict[str, Any]] = []
 
-        async def get(self, url, params):
-            self.calls.append({"url": url, "params": params})
-            return FakeResponse("OK")
+@pytest.mark.asyncio
+async def test_gap_exception_service_builds_url_and_params(monkeypatch):
+    """MCP gap_exception_service should call /v1/search with correct params and return the providers."""
+
+    monkeypatch.setattr(
+        mcpserver,
+        "settings",
+        mcpserver.MCPSetting(gap_exception_service_url="http://test-service", search_cache_enabled=False),
+    )
 
-    fake_client = FakeHttpxClient()
+    fake_client = FakeHttpxClient(lambda params: [{"npi": "1", "name": "Dr A"}])
     monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
 
     result = await mcpserver.gap_exception_service(
@@ -43,9 +68,10 @@ async def test_gap_exception_service_builds_url_and_params(monkeypatch):
         limit=5,
     )
 
-    assert result == "OK"
+    assert json.loads(result) == [{"npi": "1", "name": "Dr A"}]
     assert len(fake_client.calls) == 1
     call = fake_client.calls[0]
+    assert call["method"] == "GET"
     assert call["url"] == "http://test-service/v1/search"
     assert call["params"]["cpt_code"] == ["D2750", "D1111"]
     assert call["params"]["lat"] == 41.0
@@ -54,3 +80,344 @@ async def test_gap_exception_service_builds_url_and_params(monkeypatch):
     assert call["params"]["plan"] == "Choice"
     assert call["params"]["skip"] == 0
     assert call["params"]["limit"] == 5
+
+
+@pytest.mark.asyncio
+async def test_gap_exception_service_projects_fields_and_stops_at_limit(monkeypatch):
+    """Only the fields the agent reports should be returned, and reading stops at limit."""
+
+    monkeypatch.setattr(
+        mcpserver,
+        "settings",
+        mcpserver.MCPSetting(
+            gap_exception_service_url="http://test-service",
+            search_cache_enabled=False,
+            upstream_results_field="results",
+        ),
+    )
+
+    provider = {
+        "npi": "1",
+        "name": "Dr A",
+        "specialty": "Dentist",
+        "address": "1 Main St",
+        "phone": "555-0100",
+        "web_url": "https://a.example.com",
+        "distance": 1.5,
+        "taxonomy": {"code": "1223G0001X", "description": "General Practice"},
+        "hours": ["9-5"] * 50,
+    }
+    fake_client = FakeHttpxClient(lambda params: {"total": 3, "results": [provider] * 3})
+    monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
+
+    result = await mcpserver.gap_exception_service(
+        cpt_codes=["D2750"], lat=41.0, lng=-87.0, radius_in_meters=5000.0, plan=None, skip=None, limit=2,
+    )
+
+    providers = json.loads(result)
+    assert len(providers) == 2
+    expected = {k: v for k, v in provider.items() if k not in ("taxonomy", "hours", "distance")}
+    assert providers[0] == {**expected, "distance_in_miles": 1.5}
+
+
+@pytest.mark.asyncio
+async def test_gap_exception_service_serves_repeat_search_from_cache(monkeypatch):
+    """Repeat searches with the same normalized params should only hit upstream once."""
+
+    monkeypatch.setattr(mcpserver, "settings", mcpserver.MCPSetting(gap_exception_service_url="http://test-service"))
+    monkeypatch.setattr(
+        mcpserver,
+        "search_cache",
+        mcpserver.SearchResultCache(ttl_seconds=60, max_entries=10, max_bytes=1024),
+    )
+
+    fake_client = FakeHttpxClient(lambda params: [{"npi": "1"}])
+    monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
+
+    first = await mcpserver.gap_exception_service(
+        cpt_codes=["D2750", "D1111"], lat=41.00001, lng=-87.0, radius_in_meters=5000.0,
+        plan="Choice", skip=0, limit=5,
+    )
+    second = await mcpserver.gap_exception_service(
+        cpt_codes=["d1111", "D2750"], lat=41.00002, lng=-87.0, radius_in_meters=5000.0,
+        plan="choice", skip=0, limit=5,
+    )
+
+    assert first == second
+    assert len(fake_client.calls) == 1
+    assert mcpserver.search_cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_search_ranks_from_each_callers_own_location(monkeypatch):
+    """Searches from two origins in one geohash cell share the upstream call but get their own distances."""
+
+    monkeypatch.setattr(mcpserver, "settings", mcpserver.MCPSetting(gap_exception_service_url="http://test-service"))
+    monkeypatch.setattr(
+        mcpserver,
+        "search_cache",
+        mcpserver.SearchResultCache(ttl_seconds=60, max_entries=10, max_bytes=4096),
+    )
+    # Each provider sits right next to one of the two origins.
+    near_first = {"npi": "1", "lat": 41.9001, "lng": -87.7001}
+    near_second = {"npi": "2", "lat": 41.8966, "lng": -87.7036}
+    fake_client = FakeHttpxClient(lambda params: [near_first, near_second])
+    monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
+
+    async def search(lat, lng):
+        return json.loads(await mcpserver.gap_exception_service(
+            cpt_codes=["D2750"], lat=lat, lng=lng, radius_in_meters=5000.0, plan=None, skip=0, limit=5,
+        ))
+
+    first = await search(41.9001, -87.7001)
+    second = await search(41.8966, -87.7036)
+
+    assert len(fake_client.calls) == 1
+    assert [p["npi"] for p in first] == ["1", "2"]
+    assert [p["npi"] for p in second] == ["2", "1"]
+    assert first[0]["distance_in_miles"] == 0.0
+    assert second[0]["distance_in_miles"] == 0.0
+    assert "lat" not in first[0]
+
+
+@pytest.mark.asyncio
+async def test_gap_exception_service_fans_out_cpt_codes(monkeypatch):
+    """Long CPT code lists should be split into shards and merged by provider location."""
+
+    monkeypatch.setattr(
+        mcpserver,
+        "settings",
+        mcpserver.MCPSetting(
+            gap_exception_service_url="http://test-service",
+            search_cache_enabled=False,
+            cpt_fanout_shard_size=2,
+        ),
+    )
+
+    calls: List[Dict[str, Any]] = []
+
+    def respond(params):
+        calls.append(params)
+        return [
+            {"npi": "shared", "address": "1 Main St", "distance": float(len(calls))},
+            {"npi": params["cpt_code"][0], "address": "2 Main St", "distance": 5.0},
+        ]
+
+    fake_client = FakeHttpxClient(respond)
+    monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
+
+    result = await mcpserver.gap_exception_service(
+        cpt_codes=["A", "B", "C", "D", "E"],
+        lat=41.0,
+        lng=-87.0,
+        radius_in_meters=5000.0,
+        plan=None,
+        skip=1,
+        limit=2,
+    )
+
+    providers = json.loads(result)
+    assert [c["cpt_code"] for c in calls] == [["A", "B"], ["C", "D"], ["E"]]
+    assert all(c["skip"] == 0 and c["limit"] == 3 for c in calls)
+    assert [p["npi"] for p in providers] == ["A", "C"]
+
+
+@pytest.mark.asyncio
+async def test_gap_exception_service_expands_radius_until_min_results(monkeypatch):
+    """With min_results the tool should widen the radius itself, searching each radius from the start."""
+
+    monkeypatch.setattr(
+        mcpserver,
+        "settings",
+        mcpserver.MCPSetting(
+            gap_exception_service_url="http://test-service",
+            search_cache_enabled=False,
+            radius_expansion_factor=2.0,
+            max_radius_in_meters=40000.0,
+        ),
+    )
+
+    # One provider every 1km going out from the search location, nearest last, so paging is not by distance.
+    everyone = [{"npi": str(km), "distance_in_meters": km * 1000.0} for km in range(99, 0, -1)]
+
+    def respond(params):
+        within = [p for p in everyone if p["distance_in_meters"] <= params["radius_in_meters"]]
+        return within[params["skip"]:params["skip"] + params["limit"]]
+
+    fake_client = FakeHttpxClient(respond)
+    monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
+
+    result = json.loads(await mcpserver.gap_exception_service(
+        cpt_codes=["D2750"], lat=41.0, lng=-87.0, radius_in_meters=2500.0, plan=None, skip=0, limit=10,
+        min_results=6,
+    ))
+
+    assert result["effective_radius_in_meters"] == 10000.0
+    assert [p["npi"] for p in result["providers"]] == [str(km) for km in range(1, 11)]
+    assert [(c["params"]["radius_in_meters"], c["params"]["skip"], c["params"]["limit"]) for c in fake_client.calls] == [
+        (2500.0, 0, 10),
+        (5000.0, 0, 10),
+        (10000.0, 0, 10),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_gap_exception_service_serves_stale_result_when_circuit_is_open(monkeypatch):
+    """Once the upstream keeps failing the circuit should open and the last cached answer be served."""
+
+    monkeypatch.setattr(mcpserver, "settings", mcpserver.MCPSetting(gap_exception_service_url="http://test-service"))
+    clock = [0.0]
+    monkeypatch.setattr(
+        mcpserver,
+        "search_cache",
+        mcpserver.SearchResultCache(
+            ttl_seconds=10, max_entries=10, max_bytes=1024, stale_ttl_seconds=600, clock=lambda: clock[0]
+        ),
+    )
+    monkeypatch.setattr(
+        mcpserver,
+        "circuit_breaker",
+        mcpserver.CircuitBreaker(failure_threshold=1, reset_timeout_seconds=60),
+    )
+
+    healthy = [True]
+
+    def respond(params):
+        if not healthy[0]:
+            raise mcpserver.HTTPError("connection refused")
+        return [{"npi": "1"}]
+
+    fake_client = FakeHttpxClient(respond)
+    monkeypatch.setattr(mcpserver, "httpx_client", fake_client, raising=False)
+
+    async def search():
+        return await mcpserver.gap_exception_service(
+            cpt_codes=["D2750"], lat=None, lng=None, radius_in_meters=5000.0, plan=None, skip=None, limit=5,
+        )
+
+    fresh = await search()
+    healthy[0] = False
+    clock[0] = 20
+
+    assert await search() == fresh
+    assert mcpserver.circuit_breaker.state == "open"
+    assert await search() == fresh
+    assert len(fake_client.calls) == 2
+    assert mcpserver.circuit_breaker.rejected == 1
+
+
+class FakeRawHttpxClient(FakeHttpxClient):
+    def __init__(self, body: bytes):
+        super().__init__(lambda params: None)
+        self.body = body
+
+    def stream(self, method, url, params):
+        self.calls.append({"method": method, "url": url, "params": params})
+        return FakeStreamContext(FakeStreamResponse(self.body))
+
+
+def half_open_breaker(monkeypatch):
+    clock = [0.0]
+    breaker = mcpserver.CircuitBreaker(failure_threshold=1, reset_timeout_seconds=60, clock=lambda: clock[0])
+    breaker.record_failure()
+    clock[0] = 60
+    monkeypatch.setattr(mcpserver, "circuit_breaker", breaker)
+    monkeypatch.setattr(
+        mcpserver,
+        "settings",
+        mcpserver.MCPSetting(gap_exception_service_url="http://test-service", search_cache_enabled=False),
+    )
+    return breaker
+
+
+async def search_once():
+    return await mcpserver.gap_exception_service(
+        cpt_codes=["D2750"], lat=None, lng=None, radius_in_meters=5000.0, plan=None, skip=None, limit=5,
+    )
+
+
+@pytest.mark.asyncio
+async def test_circuit_trial_ending_in_client_error_closes_circuit(monkeypatch):
+    """A 4xx answer comes from a healthy upstream, so the trial call closes the circuit."""
+
+    breaker = half_open_breaker(monkeypatch)
+
+    def respond(params):
+        request = httpx.Request("GET", "http://test-service/v1/search")
+        raise httpx.HTTPStatusError("bad request", request=request, response=httpx.Response(400, request=request))
+
+    monkeypatch.setattr(mcpserver, "httpx_client", FakeHttpxClient(respond), raising=False)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await search_once()
+
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_circuit_trial_lets_next_call_through(monkeypatch):
+    """A trial call cancelled by its caller must not keep the circuit open."""
+
+    breaker = half_open_breaker(monkeypatch)
+    started = asyncio.Event()
+    stopped = asyncio.Event()
+
+    async def hang(*args):
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            stopped.set()
+
+    monkeypatch.setattr(mcpserver, "_stream_upstream", hang)
+    trial = asyncio.create_task(search_once())
+    await started.wait()
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+    # The coalesced upstream call runs in its own task, which is cancelled once its last caller is gone.
+    await asyncio.wait_for(stopped.wait(), timeout=1)
+    await asyncio.sleep(0)
+
+    breaker.check()
+    assert breaker.rejected == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_trial_with_unparseable_body_lets_next_call_through(monkeypatch):
+    """A trial call that fails while parsing the body must not keep the circuit open."""
+
+    breaker = half_open_breaker(monkeypatch)
+    monkeypatch.setattr(mcpserver, "httpx_client", FakeRawHttpxClient(b'[{"npi": "1",'), raising=False)
+
+    with pytest.raises(Exception):
+        await search_once()
+
+    monkeypatch.setattr(mcpserver, "httpx_client", FakeHttpxClient(lambda params: [{"npi": "1"}]), raising=False)
+    assert json.loads(await search_once()) == [{"npi": "1"}]
+    assert breaker.state == "closed"
+    assert breaker.rejected == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_search_is_timed_and_exposed_at_metrics(monkeypatch):
+    """Each /v1/search call should be observed and rendered by the /metrics route."""
+
+    monkeypatch.setattr(
+        mcpserver,
+        "settings",
+        mcpserver.MCPSetting(gap_exception_service_url="http://test-service", search_cache_enabled=False),
+    )
+    monkeypatch.setattr(mcpserver, "httpx_client", FakeHttpxClient(lambda params: [{"npi": "1"}]), raising=False)
+    count = mcpserver.upstream_search_seconds.count
+
+    await mcpserver.gap_exception_service(
+        cpt_codes=["D2750"], lat=None, lng=None, radius_in_meters=5000.0, plan=None, skip=None, limit=5,
+    )
+    response = await mcpserver.metrics_endpoint(None)
+    body = response.body.decode()
+
+    assert mcpserver.upstream_search_seconds.count == count + 1
+    assert f"gap_mcp_upstream_search_seconds_count {count + 1}" in body
+    assert "gap_mcp_search_cache_hits" in body
+    assert "gap_mcp_circuit_breaker_open" in body
@@ -0,0 +1,90 @@
+# tests/test_providerindex.py
+
+import numpy as np
+
+from geo import haversine_meters
+from providerindex import ProviderIndex, load_provider_index
+
+CHICAGO = (41.8781, -87.6298)
+
+
+def _make_index() -> ProviderIndex:
+    return ProviderIndex(
+        {
+            "npi": ["1", "2", "3", "4"],
+            "lat": [41.8781, 41.8881, 41.9781, 40.7128],
+            "lng": [-87.6298, -87.6298, -87.6298, -74.0060],
+            "cpt_codes": [["D2750"], ["D2750", "D1110"], ["D2750"], ["D2750"]],
+            "plans": [["Choice"], ["Choice Plus"], ["Choice"], ["Choice"]],
+            "name": ["Near", "Close", "Far", "New York"],
+        },
+        cell_degrees=0.05,
+    )
+
+
+def test_haversine_meters_matches_known_distance():
+    # Chicago to New York is about 1145 km.
+    distance = haversine_meters(CHICAGO[0], CHICAGO[1], np.array([40.7128]), np.array([-74.0060]))
+    assert abs(distance[0] - 1_145_000) < 5_000
+
+
+def test_search_filters_by_radius_and_orders_by_distance():
+    index = _make_index()
+
+    results = index.search(["D2750"], CHICAGO[0], CHICAGO[1], 5_000, None, None, None)
+
+    assert [r["npi"] for r in results] == ["1", "2"]
+    assert results[0]["distance_in_meters"] < results[1]["distance_in_meters"]
+    assert results[0]["name"] == "Near"
+
+
+def test_search_applies_cpt_plan_and_pagination():
+    index = _make_index()
+
+    assert [r["npi"] for r in index.search(["d1110"], CHICAGO[0], CHICAGO[1], 20_000, None, None, None)] == ["2"]
+    assert [r["npi"] for r in index.search(["D2750"], CHICAGO[0], CHICAGO[1], 20_000, "choice", None, None)] == ["1", "3"]
+    assert [r["npi"] for r in index.search(["D2750"], CHICAGO[0], CHICAGO[1], 20_000, None, 1, 1)] == ["2"]
+
+
+def test_search_without_location_scans_all_rows():
+    index = _make_index()
+
+    results = index.search(["D2750"], None, None, 5_000, "Choice", None, None)
+
+    assert [r["npi"] for r in results] == ["1", "3", "4"]
+    assert "distance_in_meters" not in results[0]
+
+
+def test_load_provider_index_from_csv(tmp_path):
+    path = tmp_path / "providers.csv"
+    path.write_text(
+        "npi,lat,lng,cpt_codes,plans,name,specialty,address,phone,web_url\n"
+        "1,41.8781,-87.6298,D2750|D1110,Choice,Dr A,Dentist,1 Main St,555-0100,https://a.example.com\n"
+    )
+
+    index = load_provider_index(str(path), cell_degrees=0.05)
+    results = index.search(["D1110"], CHICAGO[0], CHICAGO[1], 1_000, "Choice", None, None)
+
+    assert len(index) == 1
+    assert results[0]["web_url"] == "https://a.example.com"
+
+
+def test_add_and_remove_providers_without_rebuild():
+    index = _make_index()
+
+    index.add_providers(
+        {
+            "npi": ["5"],
+            "lat": [41.8791],
+            "lng": [-87.6298],
+            "cpt_codes": [["D2750"]],
+            "plans": [["Choice"]],
+            "name": ["Added"],
+        }
+    )
+    removed = index.remove_provider("1")
+    results = index.search(["D2750"], CHICAGO[0], CHICAGO[1], 5_000, None, None, None)
+
+    assert removed == 1
+    assert [r["npi"] for r in results] == ["5", "2"]
+    assert results[0]["name"] == "Added"
@@ -0,0 +1,107 @@
+# tests/test_providers.py
+
+import json
+
+import pytest
+
+from providers import merge_providers, rank_providers, stream_providers
+
+
+async def _chunks(body: bytes, size: int = 7):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_stream_providers_projects_fields():
+    body = json.dumps([{"npi": "1", "name": "Dr A", "distance": 1.25, "notes": "x" * 100}]).encode()
+
+    providers = await stream_providers(_chunks(body), results_field=None, limit=None)
+
+    assert providers == [{"npi": "1", "name": "Dr A", "distance": 1.25}]
+
+
+@pytest.mark.asyncio
+async def test_stream_providers_projects_configured_fields_or_keeps_unknown_records():
+    body = json.dumps([
+        {"providerId": "1", "fullName": "Dr A", "lat": 41.0, "lng": -87.0, "notes": "x"},
+        {"npi": "2", "name": "Dr B"},
+    ]).encode()
+
+    configured = await stream_providers(_chunks(body), None, None, output_fields=["providerId", "fullName"])
+    default = await stream_providers(_chunks(body), None, None)
+
+    assert configured == [{"providerId": "1", "fullName": "Dr A", "lat": 41.0, "lng": -87.0}, {"npi": "2", "name": "Dr B"}]
+    assert default[0] == {"providerId": "1", "fullName": "Dr A", "lat": 41.0, "lng": -87.0, "notes": "x"}
+
+
+@pytest.mark.asyncio
+async def test_stream_providers_stops_reading_at_limit():
+    read = []
+    body = json.dumps({"results": [{"npi": str(i)} for i in range(1000)]}).encode()
+
+    async def tracking_chunks():
+        async for chunk in _chunks(body, size=64):
+            read.append(chunk)
+            yield chunk
+
+    providers = await stream_providers(tracking_chunks(), results_field="results", limit=2)
+
+    assert [p["npi"] for p in providers] == ["0", "1"]
+    assert sum(len(chunk) for chunk in read) < len(body)
+
+
+def test_merge_providers_dedupes_and_keeps_min_distance():
+    shard_a = [
+        {"npi": "1", "lat": 41.0, "lng": -87.0, "distance": 3.0, "cpt": "D2750"},
+        {"npi": "2", "lat": 41.1, "lng": -87.0, "distance": 1.0},
+    ]
+    shard_b = [
+        {"npi": "1", "lat": 41.0, "lng": -87.0, "distance": 2.0, "cpt": "D1110"},
+        {"npi": "1", "lat": 42.0, "lng": -87.0, "distance": 9.0},
+        {"npi": "3", "address": "1 Main St"},
+    ]
+
+    merged = merge_providers([shard_a, shard_b])
+
+    assert sorted((p["npi"], p.get("distance", 99)) for p in merged) == [("1", 2.0), ("1", 9.0), ("2", 1.0), ("3", 99)]
+    assert [p for p in merged if p.get("distance") == 2.0][0]["cpt"] == "D1110"
+
+
+def test_rank_providers_computes_miles_and_drops_coordinates():
+    providers = [
+        {"npi": "far", "lat": 41.9781, "lng": -87.6298, "distance_in_meters": 1.0},
+        {"npi": "near", "lat": 41.8881, "lng": -87.6298},
+        {"npi": "unknown", "distance": 50.0},
+    ]
+
+    ranked = rank_providers(providers, 41.8781, -87.6298, None, None)
+
+    assert [p["npi"] for p in ranked] == ["near", "far", "unknown"]
+    assert ranked[0]["distance_in_miles"] == pytest.approx(0.69, abs=0.01)
+    assert ranked[1]["distance_in_miles"] == pytest.approx(6.91, abs=0.01)
+    assert "distance_in_meters" not in ranked[1]
+    assert ranked[2] == {"npi": "unknown", "distance_in_miles": 50.0}
+    assert all("lat" not in p and "lng" not in p for p in ranked)
+
+
+def test_rank_providers_converts_upstream_meters_to_miles():
+    providers = [
+        {"npi": "a", "distance_in_meters": 16093.44},
+        {"npi": "b", "distance": 2.0},
+        {"npi": "c", "distance_in_miles": 5.0},
+    ]
+
+    ranked = rank_providers(providers, None, None, None, None)
+
+    assert [(p["npi"], p["distance_in_miles"]) for p in ranked] == [("b", 2.0), ("c", 5.0), ("a", 10.0)]
+    assert all(set(p) == {"npi", "distance_in_miles"} for p in ranked)
+
+
+def test_rank_providers_applies_skip_and_limit_after_ordering():
+    providers = [{"npi": str(i), "distance": float(i)} for i in (7, 3, 9, 0, 5, 1, 8, 2, 6, 4)]
+
+    ranked = rank_providers(providers, None, None, skip=2, limit=3)
+
+    assert [p["npi"] for p in ranked] == ["2", "3", "4"]
+    assert rank_providers(providers, None, None, skip=20, limit=3) == []
@@ -0,0 +1,114 @@
+# tests/test_resilience.py
+
+import asyncio
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, Hedger, LatencyTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_and_recovers():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_seconds=30, clock=clock)
+
+    breaker.check()
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    clock.now = 31
+    breaker.check()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.rejected == 2
+
+
+def test_circuit_breaker_reopens_when_trial_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 31
+    breaker.check()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+
+
+def test_circuit_breaker_lets_next_trial_through_after_release():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=30, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 31
+    breaker.check()
+    breaker.release_trial()
+    breaker.check()
+
+    assert breaker.state == "half_open"
+    assert breaker.rejected == 0
+
+
+def test_latency_tracker_needs_min_samples():
+    tracker = LatencyTracker(window=100, min_samples=10)
+    for i in range(9):
+        tracker.record(i / 100)
+    assert tracker.p95() is None
+
+    for i in range(9, 100):
+        tracker.record(i / 100)
+    assert tracker.p95() == pytest.approx(0.95)
+
+
+@pytest.mark.asyncio
+async def test_hedger_fires_duplicate_and_cancels_loser():
+    tracker = LatencyTracker(window=10, min_samples=1)
+    tracker.record(0.01)
+    hedger = Hedger(tracker)
+    calls = []
+    cancelled = []
+
+    async def call():
+        attempt = len(calls)
+        calls.append(attempt)
+        try:
+            await asyncio.sleep(1.0 if attempt == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(attempt)
+            raise
+        return attempt
+
+    result = await hedger.run(call)
+    await asyncio.sleep(0)
+
+    assert result == 1
+    assert cancelled == [0]
+    assert hedger.stats() == {"hedges_fired": 1, "hedges_won": 1}
+
+
+@pytest.mark.asyncio
+async def test_hedger_does_not_hedge_fast_calls():
+    tracker = LatencyTracker(window=10, min_samples=1)
+    tracker.record(1.0)
+    hedger = Hedger(tracker)
+
+    async def call():
+        return "fast"
+
+    assert await hedger.run(call) == "fast"
+    assert hedger.stats() == {"hedges_fired": 0, "hedges_won": 0}
@@ -0,0 +1,81 @@
+# tests/test_searchcache.py
+
+from searchcache import SearchResultCache, geohash, make_search_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_geohash_known_value():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_make_search_key_normalizes_params():
+    key_a = make_search_key(["D2750", "d1111"], 41.95769, -87.74699, 5000.0, "Choice ", 0, 5, geohash_precision=6)
+    key_b = make_search_key(["D1111", "D2750", "D2750"], 41.95770, -87.74700, 5000.0, "choice", 0, 5, geohash_precision=6)
+    key_c = make_search_key(["D1111", "D2750"], 41.95770, -87.74700, 5000.0, "choice", 5, 5, geohash_precision=6)
+
+    assert key_a == key_b
+    assert key_a != key_c
+
+
+def test_cache_expires_entries_after_ttl():
+    clock = FakeClock()
+    cache = SearchResultCache(ttl_seconds=10, max_entries=10, max_bytes=1024, clock=clock)
+
+    cache.put("k", "value")
+    assert cache.get("k") == "value"
+
+    clock.now = 11
+    assert cache.get("k") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["bytes"] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = SearchResultCache(ttl_seconds=10, max_entries=2, max_bytes=1024)
+
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_cache_respects_byte_cap():
+    cache = SearchResultCache(ttl_seconds=10, max_entries=10, max_bytes=8)
+
+    cache.put("a", "12345")
+    cache.put("b", "12345")
+    cache.put("too-big", "123456789")
+
+    assert cache.get("a") is None
+    assert cache.get("b") == "12345"
+    assert cache.get("too-big") is None
+    assert cache.current_bytes == 5
+
+
+def test_cache_serves_stale_entries_within_stale_window():
+    clock = FakeClock()
+    cache = SearchResultCache(ttl_seconds=10, max_entries=10, max_bytes=1024, stale_ttl_seconds=60, clock=clock)
+
+    cache.put("k", "value")
+    clock.now = 30
+
+    assert cache.get("k") is None
+    assert cache.get_stale("k") == "value"
+    assert cache.stale_hits == 1
+
+    clock.now = 71
+    assert cache.get_stale("k") is None
+    assert len(cache) == 0